@@ -0,0 +1,233 @@
+"""
+Throttle-aware admission control
+
+Each route class (read, write, bulk, scan) has a token bucket. The buckets
+live in each worker's memory, holding a 1/workers share of the host-wide
+rate and burst, so admitting a request takes a lock and a few float
+operations rather than a shared write. A request that finds its bucket
+empty is rejected with 429 and a Retry-After telling the client when a
+token will be available.
+
+The buckets also adapt to DynamoDB throttling. Every throttled attempt
+botocore sees (including ones its own retries absorb) halves a rate factor
+shared by the host's workers through a SQLite database on a tmpfs path;
+the factor then recovers linearly over recovery_seconds. The database is
+only written when a throttle happens, and workers re-read it at most once
+per BREAKER_REFRESH_SECONDS. While throttling is recent, the scan class
+(full-table operations) is shed outright so the remaining capacity goes
+to interactive reads and writes.
+"""
+
+import os
+import math
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+THROTTLING_CODES = frozenset([
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+])
+ROUTE_CLASSES = ('read', 'write', 'bulk', 'scan')
+# Lowest fraction of the configured rates the buckets fall back to
+MIN_RATE_FACTOR = 0.1
+# Throttle events closer together than this count as one backoff step
+BACKOFF_STEP_SECONDS = 1.0
+# How stale a worker's copy of the shared breaker state may get
+BREAKER_REFRESH_SECONDS = 1.0
+
+def _default_path():
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'maintenance-admission.sqlite3')
+
+def parse_limit(value):
+    """Parse 'rate:burst' (requests per second, bucket size) into floats"""
+    rate, _, burst = value.partition(':')
+    rate = float(rate)
+    burst = float(burst) if burst else max(rate, 1.0)
+    if rate <= 0 or burst < 1:
+        raise ValueError(f'Invalid rate limit: {value}')
+    return rate, burst
+
+def is_throttling_error(error):
+    """True for a botocore ClientError caused by DynamoDB throttling"""
+    return error.response.get('Error', {}).get('Code') in THROTTLING_CODES
+
+class Decision:
+    """Outcome of an admission check"""
+
+    __slots__ = ('allowed', 'retry_after', 'reason')
+
+    def __init__(self, allowed, retry_after=0, reason=None):
+        self.allowed = allowed
+        self.retry_after = retry_after
+        self.reason = reason
+
+ALLOW = Decision(True)
+
+class AdmissionController:
+    """Per-worker token buckets with a host-wide adaptive rate factor"""
+
+    def __init__(self, limits, path=None, shed_scan_seconds=30, recovery_seconds=60, workers=1):
+        self.limits = limits  # route class -> host-wide (rate per second, burst)
+        self.path = path or _default_path()
+        self.shed_scan_seconds = shed_scan_seconds
+        self.recovery_seconds = recovery_seconds
+        self.workers = max(1, workers)
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS breaker ('
+            ' id INTEGER PRIMARY KEY CHECK (id = 1), factor REAL NOT NULL,'
+            ' last_throttle REAL NOT NULL, throttles INTEGER NOT NULL)'
+        )
+        conn.execute('INSERT OR IGNORE INTO breaker VALUES (1, 1.0, 0, 0)')
+        self.reset()
+
+    def reset(self):
+        """Start this process's buckets full and forget connections inherited across fork"""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._buckets = {}  # route class -> (tokens, updated_at)
+        self._breaker = None
+        self._breaker_read_at = 0.0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def _share(self, route_class):
+        """This worker's (rate, burst) share of route_class's host-wide limit"""
+        rate, burst = self.limits[route_class]
+        return rate / self.workers, max(1.0, burst / self.workers)
+
+    def _factor(self, factor, last_throttle, now):
+        """Rate factor after linear recovery since the last throttle"""
+        recovered = factor + (now - last_throttle) / self.recovery_seconds * (1 - MIN_RATE_FACTOR)
+        return min(1.0, recovered)
+
+    def _read_breaker(self, now):
+        """(factor, last_throttle), re-read from the shared store at most once per refresh period"""
+        if self._breaker is None or now - self._breaker_read_at >= BREAKER_REFRESH_SECONDS:
+            try:
+                self._breaker = self._connect().execute(
+                    'SELECT factor, last_throttle FROM breaker WHERE id = 1').fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not read admission breaker: {e}")
+                self._breaker = self._breaker or (1.0, 0.0)
+            self._breaker_read_at = now
+        return self._breaker
+
+    def acquire(self, route_class, cost=1.0):
+        """Take cost tokens from route_class's bucket, or say when to retry"""
+        rate, burst = self._share(route_class)
+        now = time.time()
+        factor, last_throttle = self._read_breaker(now)
+        since_throttle = now - last_throttle
+        if route_class == 'scan' and since_throttle < self.shed_scan_seconds:
+            return Decision(False, math.ceil(self.shed_scan_seconds - since_throttle), 'shed')
+
+        rate *= self._factor(factor, last_throttle, now)
+        with self._lock:
+            state = self._buckets.get(route_class)
+            tokens = burst if state is None else min(burst, state[0] + (now - state[1]) * rate)
+            if tokens >= cost:
+                tokens -= cost
+                decision = ALLOW
+            else:
+                decision = Decision(False, math.ceil((cost - tokens) / rate), 'rate_limited')
+            self._buckets[route_class] = (tokens, now)
+        return decision
+
+    def record_throttle(self):
+        """Back off: halve the shared rate factor and start shedding scans"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            factor, last_throttle = conn.execute(
+                'SELECT factor, last_throttle FROM breaker WHERE id = 1').fetchone()
+            if now - last_throttle >= BACKOFF_STEP_SECONDS:
+                factor = max(MIN_RATE_FACTOR, self._factor(factor, last_throttle, now) / 2)
+                logger.warning(f"DynamoDB throttling, admission rate factor now {factor:.2f}")
+            else:
+                factor = self._factor(factor, last_throttle, now)
+            conn.execute('UPDATE breaker SET factor = ?, last_throttle = ?, throttles = throttles + 1 WHERE id = 1',
+                         (factor, now))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        # This worker backs off at once; the others on their next refresh
+        self._breaker = (factor, now)
+        self._breaker_read_at = now
+
+    def retry_after(self):
+        """Seconds a client should wait after a request failed on throttling"""
+        now = time.time()
+        factor, last_throttle = self._read_breaker(now)
+        return math.ceil(1 / self._factor(factor, last_throttle, now))
+
+    def stats(self):
+        factor, last_throttle, throttles = self._connect().execute(
+            'SELECT factor, last_throttle, throttles FROM breaker WHERE id = 1').fetchone()
+        now = time.time()
+        return {
+            'rate_factor': round(self._factor(factor, last_throttle, now), 3),
+            'throttles': throttles,
+            'seconds_since_throttle': round(now - last_throttle, 1) if last_throttle else None,
+            'shedding_scans': bool(last_throttle) and now - last_throttle < self.shed_scan_seconds,
+            'workers': self.workers,
+            'limits': {name: {'rate': rate, 'burst': burst} for name, (rate, burst) in self.limits.items()}
+        }
+
+    def instrument_session(self, session):
+        """Register a botocore handler that reports every throttled DynamoDB attempt"""
+        def on_response(parsed_response, **kwargs):
+            if parsed_response and parsed_response.get('Error', {}).get('Code') in THROTTLING_CODES:
+                try:
+                    self.record_throttle()
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not record throttle: {e}")
+        session.events.register('response-received.dynamodb', on_response)
+
+class NullAdmissionController:
+    """Admits everything; used when rate limiting is disabled"""
+
+    def reset(self):
+        pass
+
+    def acquire(self, route_class, cost=1.0):
+        return ALLOW
+
+    def record_throttle(self):
+        pass
+
+    def retry_after(self):
+        return 1
+
+    def stats(self):
+        return {'enabled': False}
+
+    def instrument_session(self, session):
+        pass
+
+def create_admission_controller(enabled, limits, path=None, shed_scan_seconds=30, recovery_seconds=60, workers=1):
+    """Build the configured controller, admitting everything if the store is unusable"""
+    if not enabled:
+        return NullAdmissionController()
+    try:
+        return AdmissionController(limits, path, shed_scan_seconds, recovery_seconds, workers)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not open admission store, rate limiting disabled: {e}")
+        return NullAdmissionController()
@@ -0,0 +1,197 @@
+"""
+Time-series analytics for GET /api/admin/analytics
+
+Reads are served from the daily rollups the store keeps alongside every
+write (see rollup_deltas in storage.py), so a report costs one batch read
+of at most a year of day items, whatever the number of requests.
+
+rebuild_rollups() recomputes the rollups from a snapshot: a parallel scan of
+the store plus the cold archive, folded into per-day arrays with NumPy so
+hundreds of thousands of requests take seconds. Use it after first deploying
+the rollups and to repair drift, like POST /api/admin/stats/recount.
+"""
+
+import time
+import logging
+from itertools import chain
+from datetime import datetime, timedelta
+from storage import (OPEN_STATUSES, CLOSED_STATUSES, PRIORITY_COUNTERS, TTR_BUCKET_HOURS,
+                     rollup_day_range)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = list(PRIORITY_COUNTERS.values())
+SNAPSHOT_FIELDS = ['created_at', 'updated_at', 'resolved_at', 'status', 'priority']
+# The backlog is read from this many days of rollups; older open requests
+# are counted from the stats counters
+BACKLOG_HORIZON_DAYS = 365
+BACKLOG_BUCKETS = (('0-1d', 1), ('1-7d', 7), ('7-30d', 30), ('30-90d', 90), ('90-365d', BACKLOG_HORIZON_DAYS))
+
+def utc_today():
+    return datetime.utcnow().strftime('%Y-%m-%d')
+
+def days_before(day, days):
+    return (datetime.strptime(day, '%Y-%m-%d') - timedelta(days=days)).strftime('%Y-%m-%d')
+
+def ttr_percentile(histogram, fraction):
+    """
+    Upper bound of a time-to-resolve percentile in hours: the upper edge of
+    the bucket holding it, or the lower edge of the open-ended last bucket
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+    target = fraction * total
+    seen = 0
+    for i, count in enumerate(histogram):
+        seen += count
+        if count and seen >= target:
+            return float(TTR_BUCKET_HOURS[min(i, len(TTR_BUCKET_HOURS) - 1)])
+    return None
+
+def summarize(rollups, first_day, last_day, today, open_total):
+    """
+    Build the analytics report from {day: {name: value}} rollups covering at
+    least first_day..last_day and the backlog horizon before today.
+    open_total is the number of open requests from the stats counters.
+    """
+    daily = []
+    ttr = {p: {'count': 0, 'sum': 0, 'histogram': [0] * (len(TTR_BUCKET_HOURS) + 1)} for p in PRIORITIES}
+    for day in rollup_day_range(first_day, last_day):
+        counters = rollups.get(day, {})
+        created = {p: counters.get(f'created_{p}', 0) for p in PRIORITIES}
+        resolved = {p: counters.get(f'resolved_{p}', 0) for p in PRIORITIES}
+        daily.append({
+            'date': day,
+            'created': sum(created.values()),
+            'resolved': sum(resolved.values()),
+            'created_by_priority': created,
+            'resolved_by_priority': resolved
+        })
+        for p in PRIORITIES:
+            ttr[p]['count'] += resolved[p]
+            ttr[p]['sum'] += counters.get(f'ttr_sum_{p}', 0)
+            for i in range(len(ttr[p]['histogram'])):
+                ttr[p]['histogram'][i] += counters.get(f'ttr_{p}_{i}', 0)
+
+    def ttr_summary(count, seconds, histogram):
+        return {
+            'count': count,
+            'mean_hours': round(seconds / count / 3600, 1) if count else None,
+            'p90_hours': ttr_percentile(histogram, 0.9)
+        }
+
+    time_to_resolve = {p: ttr_summary(v['count'], v['sum'], v['histogram']) for p, v in ttr.items()}
+    time_to_resolve['all'] = ttr_summary(sum(v['count'] for v in ttr.values()),
+                                         sum(v['sum'] for v in ttr.values()),
+                                         [sum(column) for column in zip(*(v['histogram'] for v in ttr.values()))])
+
+    backlog = dict.fromkeys([label for label, _ in BACKLOG_BUCKETS], 0)
+    today_date = datetime.strptime(today, '%Y-%m-%d')
+    for day, counters in rollups.items():
+        age = (today_date - datetime.strptime(day, '%Y-%m-%d')).days
+        if age < 0 or age >= BACKLOG_HORIZON_DAYS:
+            continue
+        label = next(label for label, limit in BACKLOG_BUCKETS if age < limit)
+        backlog[label] += sum(counters.get(f'open_{p}', 0) for p in PRIORITIES)
+    backlog[f'{BACKLOG_HORIZON_DAYS}d+'] = max(0, open_total - sum(backlog.values()))
+
+    return {
+        'from': first_day,
+        'to': last_day,
+        'daily': daily,
+        'time_to_resolve': time_to_resolve,
+        # A list, since the JSON provider sorts object keys
+        'backlog_age': [{'age': label, 'count': count} for label, count in backlog.items()],
+        'ttr_buckets_hours': list(TTR_BUCKET_HOURS)
+    }
+
+def build_rollups(pages):
+    """
+    Compute {day: {name: value}} rollups from pages of requests projected to
+    SNAPSHOT_FIELDS. Returns (rollups, request_count).
+    """
+    if np is None:
+        raise RuntimeError('NumPy is required to rebuild the analytics rollups')
+
+    # One pass in Python to pull out the columns; everything after is vectorized
+    created, resolved, statuses, priorities = [], [], [], []
+    status_codes = {status: 1 for status in OPEN_STATUSES}
+    status_codes.update({status: 2 for status in CLOSED_STATUSES})
+    priority_codes = {name: i for i, name in enumerate(PRIORITY_COUNTERS)}
+    for page in pages:
+        for item in page:
+            if item.get('priority') not in priority_codes or not item.get('created_at'):
+                continue
+            created.append(item['created_at'][:19])
+            # Requests resolved before resolved_at was recorded fall back to updated_at
+            resolved.append((item.get('resolved_at') or item.get('updated_at') or item['created_at'])[:19])
+            statuses.append(status_codes.get(item.get('status'), 0))
+            priorities.append(priority_codes[item['priority']])
+    if not created:
+        return {}, 0
+
+    created_at = np.array(created, dtype='datetime64[s]')
+    resolved_at = np.array(resolved, dtype='datetime64[s]')
+    status = np.array(statuses, dtype=np.int8)
+    priority = np.array(priorities, dtype=np.int64)
+
+    created_day = created_at.astype('datetime64[D]')
+    resolved_day = resolved_at.astype('datetime64[D]')
+    first = min(created_day.min(), resolved_day.min())
+    n_days = int((max(created_day.max(), resolved_day.max()) - first).astype(int)) + 1
+    n_priorities = len(PRIORITIES)
+    n_buckets = len(TTR_BUCKET_HOURS) + 1
+
+    def per_day(day_index, mask, weights=None):
+        """Sum (or count) rows under mask into a (day, priority) grid"""
+        keys = day_index[mask] * n_priorities + priority[mask]
+        grid = np.bincount(keys, weights=None if weights is None else weights[mask],
+                           minlength=n_days * n_priorities)
+        return grid.reshape(n_days, n_priorities)
+
+    created_index = (created_day - first).astype(np.int64)
+    everything = np.ones(len(status), dtype=bool)
+    open_mask = status == 1
+    closed_mask = status == 2
+    grids = {'created': per_day(created_index, everything), 'open': per_day(created_index, open_mask)}
+
+    resolved_index = (resolved_day - first).astype(np.int64)
+    seconds = np.maximum((resolved_at - created_at).astype(np.int64), 0)
+    grids['resolved'] = per_day(resolved_index, closed_mask)
+    grids['ttr_sum'] = per_day(resolved_index, closed_mask, seconds.astype(np.float64))
+    bucket = np.searchsorted(np.array(TTR_BUCKET_HOURS, dtype=np.float64) * 3600, seconds, side='right')
+    histogram = np.bincount(
+        ((resolved_index * n_priorities + priority) * n_buckets + bucket)[closed_mask],
+        minlength=n_days * n_priorities * n_buckets
+    ).reshape(n_days, n_priorities, n_buckets)
+
+    rollups = {}
+    for name, grid in grids.items():
+        for day_offset, p in zip(*np.nonzero(grid)):
+            rollups.setdefault(int(day_offset), {})[f'{name}_{PRIORITIES[p]}'] = int(round(grid[day_offset, p]))
+    for day_offset, p, i in zip(*np.nonzero(histogram)):
+        rollups.setdefault(int(day_offset), {})[f'ttr_{PRIORITIES[p]}_{i}'] = int(histogram[day_offset, p, i])
+
+    days = np.datetime_as_string(first + np.arange(n_days), unit='D')
+    return {str(days[offset]): counters for offset, counters in rollups.items()}, len(status)
+
+def rebuild_rollups(store, archive):
+    """Replace the rollups with ones computed from a snapshot of store and archive"""
+    started = time.monotonic()
+    pages = chain(store.iter_pages(SNAPSHOT_FIELDS), archive.iter_pages(SNAPSHOT_FIELDS))
+    rollups, count = build_rollups(pages)
+    first_day = min(rollups) if rollups else utc_today()
+    store.replace_rollups(rollups, first_day, max(utc_today(), *rollups) if rollups else first_day)
+    result = {
+        'requests': count,
+        'days': len(rollups),
+        'seconds': round(time.monotonic() - started, 2)
+    }
+    logger.info(f"Rebuilt analytics rollups: {result}")
+    return result
@@ -7,15 +7,40 @@ import os
 import json
 import logging
 import hashlib
-from datetime import datetime
+import io
+import csv
+import base64
+import itertools
+import binascii
+from datetime import datetime, timedelta
 from uuid import uuid4
 from functools import wraps
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import (Flask, Response, render_template, request, jsonify, session, redirect, url_for, make_response,
+                   stream_with_context)
 from flask_cors import CORS
-from flask_session import Session
-import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
+from aws_clients import AWSClientProvider
+from session_store import DynamoDBSessionInterface
+import metrics
+from request_cache import create_cache
+from storage import (
+    create_store, chunked, RequestNotFound, RequestExists, VersionConflict, TransitionConflict,
+    RECORD_TYPE, TOMBSTONE_RECORD_TYPE
+)
+from search_index import SearchIndexManager, STORED_FIELDS
+from health_probe import HealthProbe
+from json_provider import FastJSONProvider
+from compression import Compressor
+from admission import create_admission_controller, is_throttling_error, parse_limit
+from write_behind import create_write_behind
+from archive import create_archive
+from change_events import create_change_event_log, RESYNC
+from assets import create_asset_pipeline
+from idempotency import (create_idempotency_store, is_valid_key, fingerprint, scoped_key, request_id_for_key,
+                         MAX_KEY_LENGTH)
+from analytics import summarize, rebuild_rollups, utc_today, days_before, BACKLOG_HORIZON_DAYS
 
 # Load environment variables
 load_dotenv()
@@ -24,14 +49,36 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app, supports_credentials=True)
 
+# Prometheus metrics at /metrics (see metrics.py)
+metrics.init_app(app)
+
+# orjson-backed serialization that renders DynamoDB Decimal/set values
+# natively (see json_provider.py), and negotiated gzip/brotli compression of
+# larger responses (see compression.py)
+app.json = FastJSONProvider(app, backend=os.getenv('JSON_BACKEND', 'auto'))
+Compressor(
+    min_size=int(os.getenv('COMPRESS_MIN_BYTES', '1024')),
+    gzip_level=int(os.getenv('COMPRESS_GZIP_LEVEL', '6')),
+    brotli_quality=int(os.getenv('COMPRESS_BROTLI_QUALITY', '4')),
+    cache_entries=int(os.getenv('COMPRESS_CACHE_ENTRIES', '256'))
+).init_app(app)
+
+# Minified, fingerprinted and precompressed static files under static/dist,
+# served with immutable caching, plus cached page rendering (see assets.py)
+assets = create_asset_pipeline(
+    enabled=os.getenv('ASSETS_ENABLED', 'true').lower() == 'true',
+    static_folder=app.static_folder,
+    minify=os.getenv('ASSETS_MINIFY', 'true').lower() == 'true'
+)
+assets.init_app(app)
+
 # Configure session
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_PERMANENT'] = False
-app.config['SESSION_USE_SIGNER'] = True
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-Session(app)
+# Sessions end when the browser closes, and at the latest after this lifetime
+SESSION_LIFETIME_SECONDS = int(os.getenv('SESSION_LIFETIME_SECONDS', '28800'))
+app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(seconds=SESSION_LIFETIME_SECONDS)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -49,63 +96,428 @@ IAM_SESSION_DURATION = int(os.getenv('IAM_SESSION_DURATION', '3600'))
 ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
 ADMIN_PASSWORD_HASH = os.getenv('ADMIN_PASSWORD_HASH', hashlib.sha256('admin123'.encode()).hexdigest())
 
-# Initialize AWS clients with IAM support
-try:
-    # Try to use IAM role if available, otherwise use access keys
-    if IAM_ROLE_ARN:
-        sts_client = boto3.client('sts', region_name=AWS_REGION)
-        assumed_role = sts_client.assume_role(
-            RoleArn=IAM_ROLE_ARN,
-            RoleSessionName='maintenance-system-session',
-            DurationSeconds=IAM_SESSION_DURATION
-        )
-        credentials = assumed_role['Credentials']
-        dynamodb = boto3.resource(
-            'dynamodb',
-            region_name=AWS_REGION,
-            aws_access_key_id=credentials['AccessKeyId'],
-            aws_secret_access_key=credentials['SecretAccessKey'],
-            aws_session_token=credentials['SessionToken']
-        )
-        iam_client = boto3.client(
-            'iam',
-            region_name=AWS_REGION,
-            aws_access_key_id=credentials['AccessKeyId'],
-            aws_secret_access_key=credentials['SecretAccessKey'],
-            aws_session_token=credentials['SessionToken']
-        )
-        logger.info("Using IAM role for AWS access")
-    else:
-        dynamodb = boto3.resource(
-            'dynamodb',
-            region_name=AWS_REGION,
-            aws_access_key_id=AWS_ACCESS_KEY,
-            aws_secret_access_key=AWS_SECRET_KEY
-        )
-        iam_client = boto3.client(
-            'iam',
-            region_name=AWS_REGION,
-            aws_access_key_id=AWS_ACCESS_KEY,
-            aws_secret_access_key=AWS_SECRET_KEY
-        )
-        logger.info("Using access keys for AWS access")
-except Exception as e:
-    logger.warning(f"Could not initialize IAM role, using access keys: {e}")
-    dynamodb = boto3.resource(
-        'dynamodb',
-        region_name=AWS_REGION,
-        aws_access_key_id=AWS_ACCESS_KEY,
-        aws_secret_access_key=AWS_SECRET_KEY
-    )
-    iam_client = boto3.client(
-        'iam',
-        region_name=AWS_REGION,
-        aws_access_key_id=AWS_ACCESS_KEY,
-        aws_secret_access_key=AWS_SECRET_KEY
-    )
+# Token buckets per route class, adapted to DynamoDB throttling (see
+# admission.py). Limits are host-wide 'requests per second:burst', split
+# evenly across the RATE_LIMIT_WORKERS processes.
+admission = create_admission_controller(
+    enabled=os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true',
+    limits={
+        'read': parse_limit(os.getenv('RATE_LIMIT_READ', '500:1000')),
+        'write': parse_limit(os.getenv('RATE_LIMIT_WRITE', '100:200')),
+        'bulk': parse_limit(os.getenv('RATE_LIMIT_BULK', '2:10')),
+        'scan': parse_limit(os.getenv('RATE_LIMIT_SCAN', '0.2:2'))
+    },
+    path=os.getenv('RATE_LIMIT_PATH') or None,
+    shed_scan_seconds=int(os.getenv('THROTTLE_SHED_SCAN_SECONDS', '30')),
+    recovery_seconds=int(os.getenv('THROTTLE_RECOVERY_SECONDS', '60')),
+    workers=int(os.getenv('RATE_LIMIT_WORKERS', '1'))
+)
+
+# Shared botocore settings: a connection pool sized for concurrent workers
+# (see gunicorn.conf.py), TCP keep-alive, bounded timeouts so a slow call
+# cannot hold a worker for the full gunicorn timeout, and adaptive retries
+# that back off client-side when DynamoDB throttles
+AWS_CLIENT_CONFIG = Config(
+    region_name=AWS_REGION,
+    max_pool_connections=int(os.getenv('BOTO_MAX_POOL_CONNECTIONS', '50')),
+    tcp_keepalive=True,
+    connect_timeout=float(os.getenv('BOTO_CONNECT_TIMEOUT', '2')),
+    read_timeout=float(os.getenv('BOTO_READ_TIMEOUT', '10')),
+    retries={
+        'mode': 'adaptive',
+        'max_attempts': int(os.getenv('BOTO_MAX_ATTEMPTS', '5'))
+    }
+)
+
+# AWS clients are created lazily on first use and role credentials refresh
+# themselves before expiry (see aws_clients.py), so importing the app makes
+# no network calls and long-lived workers keep valid credentials
+aws = AWSClientProvider(
+    region=AWS_REGION,
+    access_key=AWS_ACCESS_KEY,
+    secret_key=AWS_SECRET_KEY,
+    role_arn=IAM_ROLE_ARN,
+    session_duration=IAM_SESSION_DURATION,
+    config=AWS_CLIENT_CONFIG,
+    session_hooks=[metrics.instrument_session, admission.instrument_session]
+)
+dynamodb = aws.lazy_resource('dynamodb')
+iam_client = aws.lazy_client('iam')
+sts_client = aws.lazy_client('sts')
 
 TABLE_NAME = 'maintenance_requests'
-table = dynamodb.Table(TABLE_NAME)
+table = aws.lazy_table(TABLE_NAME)
+
+# Admin sessions are either stateless signed cookies (Flask's default, the
+# default here) or ids pointing into a shared DynamoDB table with TTL expiry
+# and an in-process read cache (see session_store.py). Neither touches the
+# local disk, and both work across hosts without sticky sessions.
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'cookie').lower()
+if SESSION_BACKEND == 'dynamodb':
+    app.session_interface = DynamoDBSessionInterface(
+        aws.lazy_table(os.getenv('SESSION_TABLE_NAME', 'maintenance_sessions')),
+        lifetime_seconds=SESSION_LIFETIME_SECONDS,
+        cache_seconds=int(os.getenv('SESSION_CACHE_SECONDS', '30'))
+    )
+
+# Deletions leave a tombstone in the updated_at index so delta clients
+# (?since=) learn about them; DynamoDB TTL purges them after the retention.
+TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', '7'))
+MAX_DELTA_ITEMS = int(os.getenv('MAX_DELTA_ITEMS', '1000'))
+# The change index is eventually consistent and hosts' clocks drift, so a
+# write can show up with an updated_at just behind a watermark already
+# handed out. The last page of a delta never advances the watermark past
+# now minus this overlap; the overlapping changes are sent again and
+# clients skip versions they already hold.
+CHANGES_OVERLAP_SECONDS = int(os.getenv('CHANGES_OVERLAP_SECONDS', '5'))
+
+# Every route reads and writes through the storage backend (see storage.py).
+# DynamoDB is the default; sqlite runs the app without AWS for local
+# profiling and scripts/benchmark.py.
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'dynamodb').lower()
+store = create_store(
+    STORAGE_BACKEND,
+    dynamodb=dynamodb,
+    table=table,
+    table_name=TABLE_NAME,
+    path=os.getenv('SQLITE_PATH'),
+    tombstone_retention_days=TOMBSTONE_RETENTION_DAYS,
+    recount_segments=int(os.getenv('RECOUNT_SEGMENTS', '8'))
+)
+
+# Cold store for requests closed long ago (see archive.py and
+# scripts/archive_requests.py); unset keeps everything in the hot store
+archive = create_archive(os.getenv('ARCHIVE_DIR'))
+
+VALID_STATUSES = ['Pending', 'In Progress', 'Resolved', 'Closed']
+VALID_PRIORITIES = ['Low', 'Medium', 'High', 'Critical']
+
+# Size limits for the bulk endpoints
+MAX_BATCH_CREATE = int(os.getenv('MAX_BATCH_CREATE', '500'))
+MAX_BULK_UPDATE = int(os.getenv('MAX_BULK_UPDATE', '500'))
+# TransactWriteItems accepts 100 actions; one is reserved for the stats item
+BULK_TRANSACTION_SIZE = 99
+
+# Attributes that may be exported, in CSV column order
+EXPORT_FIELDS = ['id', 'title', 'description', 'status', 'priority',
+                 'created_by', 'created_at', 'updated_at', 'version']
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', '500'))
+
+# Full-text search (see search_index.py)
+SEARCH_INDEX_ENABLED = os.getenv('SEARCH_INDEX_ENABLED', 'true').lower() == 'true'
+SEARCH_SYNC_SECONDS = int(os.getenv('SEARCH_SYNC_SECONDS', '5'))
+# One worker per host scans; the others load its snapshot
+SEARCH_SNAPSHOT_PATH = os.getenv('SEARCH_SNAPSHOT_PATH') or None
+SEARCH_SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv('SEARCH_SNAPSHOT_MAX_AGE_SECONDS', '3600'))
+MAX_SEARCH_RESULTS = 100
+
+# Pagination limits for GET /api/requests
+DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '200'))
+
+# Reporting window for GET /api/admin/analytics, in days
+DEFAULT_ANALYTICS_DAYS = 30
+MAX_ANALYTICS_DAYS = BACKLOG_HORIZON_DAYS
+
+# Host-wide read-through cache for items and list pages (see request_cache.py)
+cache = create_cache(
+    enabled=os.getenv('CACHE_ENABLED', 'true').lower() == 'true',
+    path=os.getenv('CACHE_PATH') or None,
+    max_entries=int(os.getenv('CACHE_MAX_ENTRIES', '10000')),
+    ttl_seconds=int(os.getenv('CACHE_TTL_SECONDS', '30'))
+)
+
+# Host-wide change event log behind GET /api/requests/stream (see change_events.py)
+CHANGE_STREAM_RETRY_MS = 3000
+change_events = create_change_event_log(
+    enabled=os.getenv('CHANGE_STREAM_ENABLED', 'true').lower() == 'true',
+    path=os.getenv('CHANGE_EVENTS_PATH') or None,
+    retention_seconds=int(os.getenv('CHANGE_EVENTS_RETENTION_SECONDS', '3600')),
+    heartbeat_seconds=int(os.getenv('CHANGE_STREAM_HEARTBEAT_SECONDS', '15'))
+)
+
+def item_cache_key(request_id):
+    return f'item:{request_id}'
+
+def list_cache_key(limit, cursor, status, priority):
+    # List pages are namespaced by a generation counter so that any write
+    # invalidates every cached page at once
+    return f"list:{cache.generation()}:{status or ''}:{priority or ''}:{limit}:{cursor or ''}"
+
+def after_write(items=(), deleted_ids=()):
+    """Propagate committed writes to the read-side structures and change streams"""
+    # Bumped before the item keys are dropped, so a reader that loaded an
+    # item before this write cannot cache it again afterwards (see get_request)
+    cache.bump_generation()
+    for item in items:
+        cache.delete(item_cache_key(item['id']))
+        if SEARCH_INDEX_ENABLED:
+            search_manager.apply(item=item)
+    for request_id in deleted_ids:
+        cache.delete(item_cache_key(request_id))
+        if SEARCH_INDEX_ENABLED:
+            search_manager.apply(deleted_id=request_id)
+
+    events = [('created' if int(item.get('version', 1)) == 1 else 'updated', app.json.dumps(item))
+              for item in items]
+    events += [('deleted', app.json.dumps({'id': request_id})) for request_id in deleted_ids]
+    try:
+        change_events.publish(events)
+    except Exception as e:
+        # Streams fall back to the delta feed; the write itself has succeeded
+        logger.error(f"Error publishing change events: {e}")
+
+def encode_cursor(last_evaluated_key):
+    """Encode a DynamoDB LastEvaluatedKey as an opaque URL-safe cursor"""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, separators=(',', ':'), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, raising ValueError if invalid"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(key, dict) or not all(isinstance(v, str) for v in key.values()):
+        raise ValueError('Invalid cursor')
+    return key
+
+def is_reserved_id(request_id):
+    """Internal items (stats, tombstones) use ids that uuid4 never produces"""
+    return request_id.startswith('__')
+
+def parse_if_match(header_value):
+    """Parse an If-Match header carrying a request version, e.g. "3" or 3"""
+    if not header_value or header_value.strip() == '*':
+        return None
+    value = header_value.strip()
+    if value.startswith('W/'):
+        value = value[2:]
+    value = value.strip('"')
+    if not value.isdigit():
+        raise ValueError('If-Match must be a request version number')
+    return int(value)
+
+def build_new_request(data):
+    """
+    Validate a create payload and build the item to store.
+    Returns (item, None) on success or (None, error message).
+    """
+    if not isinstance(data, dict) or not data.get('title') or not data.get('description'):
+        return None, 'Title and description are required'
+    
+    title = data.get('title', '').strip()
+    description = data.get('description', '').strip()
+    priority = data.get('priority', 'Medium')
+    created_by = data.get('created_by', 'User').strip()
+    
+    # Validate input lengths
+    if len(title) > 255 or len(title) < 3:
+        return None, 'Title must be between 3 and 255 characters'
+    if len(description) < 10:
+        return None, 'Description must be at least 10 characters'
+    
+    # Validate priority
+    if priority not in VALID_PRIORITIES:
+        return None, f'Invalid priority. Must be one of: {", ".join(VALID_PRIORITIES)}'
+    
+    timestamp = datetime.utcnow().isoformat() + 'Z'
+    return {
+        'id': str(uuid4()),
+        'record_type': RECORD_TYPE,
+        'title': title,
+        'description': description,
+        'priority': priority,
+        'status': 'Pending',
+        'created_by': created_by,
+        'created_at': timestamp,
+        'updated_at': timestamp,
+        'version': 1
+    }, None
+
+def validate_update_fields(data, allowed=('title', 'description', 'status', 'priority')):
+    """
+    Validate the updatable fields present in data.
+    Returns (fields, None) on success or (None, error message).
+    """
+    if not isinstance(data, dict):
+        return None, 'No fields to update'
+    fields = {}
+    
+    # Title
+    if 'title' in allowed and 'title' in data:
+        title = data['title'].strip()
+        if len(title) < 3 or len(title) > 255:
+            return None, 'Title must be between 3 and 255 characters'
+        fields['title'] = title
+    
+    # Description
+    if 'description' in allowed and 'description' in data:
+        description = data['description'].strip()
+        if len(description) < 10:
+            return None, 'Description must be at least 10 characters'
+        fields['description'] = description
+    
+    # Status
+    if 'status' in allowed and 'status' in data:
+        status = data['status'].strip()
+        if status not in VALID_STATUSES:
+            return None, f'Invalid status. Must be one of: {", ".join(VALID_STATUSES)}'
+        fields['status'] = status
+    
+    # Priority
+    if 'priority' in allowed and 'priority' in data:
+        priority = data['priority'].strip()
+        if priority not in VALID_PRIORITIES:
+            return None, f'Invalid priority. Must be one of: {", ".join(VALID_PRIORITIES)}'
+        fields['priority'] = priority
+    
+    if not fields:
+        return None, 'No fields to update'
+    return fields, None
+
+def parse_export_bound(value, end_of_day=False):
+    """Validate a from/to export bound and return it in created_at format"""
+    try:
+        datetime.fromisoformat(value.rstrip('Z'))
+    except ValueError as e:
+        raise ValueError(f'Invalid date: {value}') from e
+    if len(value) == 10:
+        return value + ('T23:59:59.999999Z' if end_of_day else 'T00:00:00Z')
+    return value
+
+def generate_ndjson(pages):
+    for page in pages:
+        yield ''.join(app.json.dumps(item) + '\n' for item in page)
+
+def generate_csv(pages, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    for page in pages:
+        writer.writerows(page)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def conditional_json(payload=None, status=200, body=None):
+    """
+    JSON response with a strong ETag; answers 304 when the client's
+    If-None-Match already matches. no-cache makes browsers revalidate.
+    Pass body instead of payload when the JSON text is already rendered
+    (e.g. from the cache) to skip serialization.
+    """
+    if body is None:
+        body = app.json.dumps(payload)
+    response = app.response_class(body, status=status, mimetype=app.json.mimetype)
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def settled_watermark():
+    """
+    The newest watermark a client may sync from now: writes stamped within
+    the overlap window may still be committing on other hosts
+    """
+    return (datetime.utcnow() - timedelta(seconds=CHANGES_OVERLAP_SECONDS)).isoformat(
+        timespec='microseconds') + 'Z'
+
+def get_changes_since(since, limit=MAX_DELTA_ITEMS):
+    """
+    Build a delta response: requests changed and ids deleted after since.
+    The watermark only advances to a complete updated_at value so that items
+    sharing a timestamp are never split across two responses, even when
+    there are more of them than limit. Pages with more to come continue
+    exactly where they stop, so paging always makes progress; the last page
+    holds the watermark back by the overlap window.
+    """
+    fetch = limit + 1
+    while True:
+        requests_changed = store.changes(RECORD_TYPE, since, fetch)
+        tombstones = store.changes(TOMBSTONE_RECORD_TYPE, since, fetch)
+        changes = sorted(requests_changed + tombstones, key=lambda item: item['updated_at'])
+        has_more = len(changes) > limit
+        if not has_more:
+            break
+        boundary = changes[limit]['updated_at']
+        kept = [item for item in changes[:limit] if item['updated_at'] < boundary]
+        if kept:
+            changes = kept
+            break
+        # A bulk write gave more than limit items one updated_at; send that whole group
+        group = [item for item in changes if item['updated_at'] == boundary]
+        if all(len(found) < fetch or found[-1]['updated_at'] > boundary
+               for found in (requests_changed, tombstones)):
+            has_more = len(group) < len(changes)
+            changes = group
+            break
+        fetch *= 2
+    
+    items = [item for item in changes if item['record_type'] == RECORD_TYPE]
+    deleted = [item['request_id'] for item in changes if item['record_type'] == TOMBSTONE_RECORD_TYPE]
+    watermark = changes[-1]['updated_at'] if changes else since
+    if not has_more:
+        watermark = min(watermark, max(since, settled_watermark()))
+    return {
+        'items': items,
+        'deleted': deleted,
+        'watermark': watermark,
+        'has_more': has_more
+    }
+
+def load_search_documents():
+    """Stream every request with the attributes the search index stores"""
+    for page in store.iter_pages(list(STORED_FIELDS)):
+        yield from page
+
+search_manager = SearchIndexManager(load_search_documents, get_changes_since, SEARCH_SYNC_SECONDS,
+                                    SEARCH_SNAPSHOT_PATH, SEARCH_SNAPSHOT_MAX_AGE_SECONDS)
+
+# Readiness is answered from a background probe of the storage backend, so
+# frequent load balancer and deploy-hook polling costs no database calls
+HEALTH_PROBE_SECONDS = int(os.getenv('HEALTH_PROBE_SECONDS', '15'))
+HEALTH_STARTUP_WAIT_SECONDS = 3
+health_probe = HealthProbe(store.ping, HEALTH_PROBE_SECONDS)
+
+# Optional write-behind mode for POST /api/requests: new requests go to a
+# local append-only log, are acknowledged with 202 and reach the store in
+# background batches (see write_behind.py)
+write_behind = create_write_behind(
+    os.getenv('WRITE_BEHIND_ENABLED', 'false').lower() == 'true',
+    store,
+    path=os.getenv('WRITE_BEHIND_PATH') or None,
+    flush_interval=float(os.getenv('WRITE_BEHIND_FLUSH_SECONDS', '1')),
+    batch_size=int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '100')),
+    lease_seconds=int(os.getenv('WRITE_BEHIND_LEASE_SECONDS', '60')),
+    on_flush=lambda items: after_write(items=items)
+)
+
+# Idempotency-Key support for POST /api/requests (see idempotency.py)
+idempotency = create_idempotency_store(
+    enabled=os.getenv('IDEMPOTENCY_ENABLED', 'true').lower() == 'true',
+    path=os.getenv('IDEMPOTENCY_PATH') or None,
+    ttl_seconds=int(os.getenv('IDEMPOTENCY_TTL_SECONDS', '86400')),
+    max_entries=int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', '100000'))
+)
+# Long-lived random id for an anonymous browser, set by the index page, that
+# scopes its Idempotency-Keys; it lives outside the session so visitors
+# cost no session storage
+CLIENT_ID_COOKIE = 'client_id'
+CLIENT_ID_MAX_AGE = 365 * 86400
+
+def idempotency_scope():
+    """Whose namespace an Idempotency-Key belongs to: the admin, the browser, or the address"""
+    if session.get('admin_logged_in'):
+        return f"admin:{session.get('admin_username')}"
+    client_id = request.cookies.get(CLIENT_ID_COOKIE)
+    if client_id and is_valid_key(client_id):
+        return f'client:{client_id}'
+    return f"addr:{request.headers.get('X-Real-IP') or request.remote_addr}"
 
 # Authentication decorator
 def admin_required(f):
@@ -116,12 +528,52 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def rate_limited(route_class):
+    """Admit the request through route_class's token bucket or answer 429/503"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            decision = admission.acquire(route_class)
+            if not decision.allowed:
+                if decision.reason == 'shed':
+                    # Scans wait out DynamoDB throttling so reads and writes get the capacity
+                    response = jsonify({'error': 'Temporarily unavailable while the database is throttling'})
+                    response.status_code = 503
+                else:
+                    response = jsonify({'error': 'Rate limit exceeded'})
+                    response.status_code = 429
+                response.headers['Retry-After'] = str(decision.retry_after)
+                return response
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def throttled_response():
+    """503 for a request whose DynamoDB calls were still throttled after retries"""
+    response = jsonify({'error': 'Database is busy, please retry'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(admission.retry_after())
+    return response
+
+@app.before_request
+def start_background_workers():
+    """Start per-process background threads on the first request (fork-safe)"""
+    health_probe.start()
+    write_behind.start()
+    if SEARCH_INDEX_ENABLED:
+        search_manager.start()
+
 # Routes
 
 @app.route('/')
 def index():
     """Serve the main page"""
-    return render_template('index.html')
+    response = make_response(assets.render('index.html'))
+    if not request.cookies.get(CLIENT_ID_COOKIE):
+        response.set_cookie(CLIENT_ID_COOKIE, uuid4().hex, max_age=CLIENT_ID_MAX_AGE,
+                            httponly=True, samesite='Lax',
+                            secure=app.config.get('SESSION_COOKIE_SECURE', False))
+    return response
 
 @app.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
@@ -150,7 +602,7 @@ def admin_login():
     if session.get('admin_logged_in'):
         return redirect(url_for('admin'))
     
-    return render_template('admin_login.html')
+    return assets.render('admin_login.html')
 
 @app.route('/admin/logout', methods=['POST'])
 def admin_logout():
@@ -163,22 +615,68 @@ def admin():
     """Serve the admin dashboard page - requires authentication"""
     if not session.get('admin_logged_in'):
         return redirect(url_for('admin_login'))
-    return render_template('admin.html')
+    return assets.render('admin.html')
 
 @app.route('/api/requests', methods=['GET'])
+@rate_limited('read')
 def get_requests():
-    """Retrieve all maintenance requests from DynamoDB"""
+    """Retrieve a page of maintenance requests, newest first"""
     try:
-        logger.info("[v0] Fetching all requests from DynamoDB")
-        response = table.scan()
-        requests_data = response.get('Items', [])
-        
-        # Sort by created_at descending
-        requests_data.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        
-        logger.info(f"[v0] Retrieved {len(requests_data)} requests")
-        return jsonify(requests_data), 200
+        status = request.args.get('status', '').strip()
+        priority = request.args.get('priority', '').strip()
+        cursor = request.args.get('cursor', '').strip()
+        since = request.args.get('since', '').strip()
+
+        if since:
+            try:
+                since_time = datetime.fromisoformat(since.rstrip('Z'))
+            except ValueError:
+                return jsonify({'error': 'since must be an ISO 8601 updated_at watermark'}), 400
+            # Tombstones older than the retention are gone, so the client must reload
+            if since_time < datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+                return conditional_json({'full_resync': True})
+            logger.info(f"[v0] Fetching request changes since {since}")
+            return conditional_json(get_changes_since(since))
+
+        if status and status not in VALID_STATUSES:
+            return jsonify({'error': f'Invalid status. Must be one of: {", ".join(VALID_STATUSES)}'}), 400
+        if priority and priority not in VALID_PRIORITIES:
+            return jsonify({'error': f'Invalid priority. Must be one of: {", ".join(VALID_PRIORITIES)}'}), 400
+
+        try:
+            limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+
+        try:
+            start_key = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+        # Pages are cached as rendered JSON so a hit needs no serialization
+        cache_key = list_cache_key(limit, cursor, status, priority)
+        body = cache.get_raw(cache_key)
+        if body is None:
+            logger.info(f"[v0] Fetching requests page (limit={limit}, status={status or '*'}, priority={priority or '*'})")
+            # Taken before the read, so a write that commits meanwhile is
+            # still after it; clients start their ?since= sync from here
+            settled = settled_watermark()
+            requests_data, last_key = store.list_page(limit, start_key, status or None, priority or None)
+            page = {
+                'items': requests_data,
+                'count': len(requests_data),
+                'next_cursor': encode_cursor(last_key),
+                'watermark': min(settled, max((item['updated_at'] for item in requests_data), default=settled))
+            }
+            body = app.json.dumps(page)
+            cache.set_raw(cache_key, body)
+            logger.info(f"[v0] Retrieved {len(requests_data)} requests")
+        return conditional_json(body=body)
     except ClientError as e:
+        if is_throttling_error(e):
+            return throttled_response()
         logger.error(f"DynamoDB error fetching requests: {e}")
         return jsonify({'error': 'Failed to fetch requests'}), 500
     except Exception as e:
@@ -186,71 +684,383 @@ def get_requests():
         return jsonify({'error': 'Failed to fetch requests'}), 500
 
 @app.route('/api/requests', methods=['POST'])
+@rate_limited('write')
 def create_request():
     """Create a new maintenance request in DynamoDB"""
     try:
         data = request.get_json()
         
         # Input validation
-        if not data.get('title') or not data.get('description'):
-            return jsonify({'error': 'Title and description are required'}), 400
+        new_request, error = build_new_request(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is None:
+            return store_new_request(new_request)
+        if not is_valid_key(idempotency_key):
+            return jsonify({'error': f'Idempotency-Key must be 1 to {MAX_KEY_LENGTH} printable characters'}), 400
+
+        idempotency_key = scoped_key(idempotency_scope(), idempotency_key)
+        request_fingerprint = fingerprint(data)
+        recorded = idempotency.begin(idempotency_key, request_fingerprint)
+        if recorded is not None:
+            return replay_idempotent(recorded, request_fingerprint)
+        # Retries map to the same id wherever they land, so the store
+        # catches those this host has not seen
+        new_request['id'] = request_id_for_key(idempotency_key, request_fingerprint)
+        try:
+            response = store_new_request(new_request, keyed=True)
+        except BaseException:
+            idempotency.release(idempotency_key)
+            raise
+        if response.status_code < 300:
+            idempotency.complete(idempotency_key, response.status_code, response.get_data(as_text=True),
+                                 response.headers.get('Location'))
+        else:
+            idempotency.release(idempotency_key)
+        return response
+    except ClientError as e:
+        if is_throttling_error(e):
+            return throttled_response()
+        logger.error(f"DynamoDB error creating request: {e}")
+        return jsonify({'error': 'Failed to create request'}), 500
+    except Exception as e:
+        logger.error(f"Error creating request: {e}")
+        return jsonify({'error': 'Failed to create request'}), 500
+
+def store_new_request(new_request, keyed=False):
+    """
+    Write (or queue) a validated new request and build the 201/202 response.
+    A keyed request's id comes from its Idempotency-Key, so it may already
+    have been stored, or stored and deleted, by an earlier attempt.
+    """
+    request_id = new_request['id']
+    location = url_for('get_request', request_id=request_id)
+    if keyed:
+        # Neither the write-behind log nor the conditional put can see these
+        existing, deleted = store.lookup(request_id)
+        if deleted:
+            response = jsonify({'error': 'The request created with this Idempotency-Key was deleted'})
+            response.status_code = 410
+            return response
+        if existing is not None:
+            return replay_existing(existing, 201, location)
+
+    if write_behind.enabled:
+        # Acknowledged once it is durable in the local log; the flusher stores it
+        try:
+            write_behind.append(new_request)
+        except RequestExists:
+            return replay_existing(write_behind.get(request_id) or store.get(request_id), 202, location)
+        logger.info(f"[v0] Accepted maintenance request ID: {request_id}")
+        response = jsonify(new_request)
+        response.status_code = 202
+        response.headers['Location'] = location
+        return response
+
+    # Store the item and count it in the same write
+    try:
+        store.create(new_request)
+    except RequestExists:
+        return replay_existing(store.get(request_id), 201, location)
+
+    after_write(items=[new_request])
+    logger.info(f"[v0] Created maintenance request ID: {request_id}")
+
+    response = jsonify(new_request)
+    response.status_code = 201
+    response.headers['Location'] = location
+    return response
+
+def replay_existing(existing, status, location):
+    """
+    Answer a create whose idempotency-derived id was already written. The id
+    covers the payload, so the stored request is the one this call created,
+    whatever has been edited since.
+    """
+    if existing is None:
+        # Gone between the failed write and the read, e.g. mid-flush
+        response = jsonify({'error': 'A request with this Idempotency-Key is still being processed'})
+        response.status_code = 409
+        response.headers['Retry-After'] = '1'
+        return response
+    logger.info(f"[v0] Replayed create of maintenance request ID: {existing['id']}")
+    response = jsonify(existing)
+    response.status_code = status
+    response.headers['Location'] = location
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def replay_idempotent(recorded, request_fingerprint):
+    """Answer a retry from the response recorded for its Idempotency-Key"""
+    if recorded.fingerprint != request_fingerprint:
+        return jsonify({'error': 'Idempotency-Key was already used for a different request'}), 422
+    if recorded.status is None:
+        response = jsonify({'error': 'A request with this Idempotency-Key is still being processed'})
+        response.status_code = 409
+        response.headers['Retry-After'] = '1'
+        return response
+    response = app.response_class(recorded.body, status=recorded.status, mimetype=app.json.mimetype)
+    if recorded.location:
+        response.headers['Location'] = recorded.location
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+@app.route('/api/requests/batch', methods=['POST'])
+@admin_required
+@rate_limited('bulk')
+def batch_create_requests():
+    """Create many maintenance requests in one call using batched writes"""
+    try:
+        data = request.get_json()
+        payloads = data.get('requests') if isinstance(data, dict) else None
+        if not isinstance(payloads, list) or not payloads:
+            return jsonify({'error': 'requests must be a non-empty list'}), 400
+        if len(payloads) > MAX_BATCH_CREATE:
+            return jsonify({'error': f'At most {MAX_BATCH_CREATE} requests per batch'}), 400
         
-        title = data.get('title', '').strip()
-        description = data.get('description', '').strip()
-        priority = data.get('priority', 'Medium')
-        created_by = data.get('created_by', 'User').strip()
+        # Validate everything up front so a batch is all-or-nothing on input errors
+        new_requests = []
+        errors = []
+        for index, payload in enumerate(payloads):
+            new_request, error = build_new_request(payload)
+            if error:
+                errors.append({'index': index, 'error': error})
+            else:
+                new_requests.append(new_request)
+        if errors:
+            return jsonify({'error': 'Validation failed', 'details': errors}), 400
         
-        # Validate input lengths
-        if len(title) > 255 or len(title) < 3:
-            return jsonify({'error': 'Title must be between 3 and 255 characters'}), 400
-        if len(description) < 10:
-            return jsonify({'error': 'Description must be at least 10 characters'}), 400
+        logger.info(f"[v0] Batch creating {len(new_requests)} requests")
         
-        # Validate priority
-        valid_priorities = ['Low', 'Medium', 'High', 'Critical']
-        if priority not in valid_priorities:
-            return jsonify({'error': f'Invalid priority. Must be one of: {", ".join(valid_priorities)}'}), 400
+        store.create_many(new_requests)
         
-        # Create new request
-        request_id = str(uuid4())
-        timestamp = datetime.utcnow().isoformat() + 'Z'
+        after_write(items=new_requests)
+        logger.info(f"[v0] Batch created {len(new_requests)} requests")
+        return jsonify({'items': new_requests, 'count': len(new_requests)}), 201
+    except ClientError as e:
+        if is_throttling_error(e):
+            return throttled_response()
+        logger.error(f"DynamoDB error batch creating requests: {e}")
+        return jsonify({'error': 'Failed to create requests'}), 500
+    except Exception as e:
+        logger.error(f"Error batch creating requests: {e}")
+        return jsonify({'error': 'Failed to create requests'}), 500
+
+@app.route('/api/requests/bulk', methods=['PATCH'])
+@admin_required
+@rate_limited('bulk')
+def bulk_update_requests():
+    """Apply a status and/or priority change to many requests"""
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({'error': 'ids and a status or priority are required'}), 400
         
-        new_request = {
-            'id': request_id,
-            'title': title,
-            'description': description,
-            'priority': priority,
-            'status': 'Pending',
-            'created_by': created_by,
-            'created_at': timestamp,
-            'updated_at': timestamp
-        }
+        request_ids = data.get('ids')
+        if not isinstance(request_ids, list) or not request_ids or \
+                not all(isinstance(rid, str) for rid in request_ids):
+            return jsonify({'error': 'ids must be a non-empty list of request ids'}), 400
+        request_ids = list(dict.fromkeys(rid for rid in request_ids if not is_reserved_id(rid)))
+        if len(request_ids) > MAX_BULK_UPDATE:
+            return jsonify({'error': f'At most {MAX_BULK_UPDATE} ids per bulk update'}), 400
+        
+        fields, error = validate_update_fields(data, allowed=('status', 'priority'))
+        if error:
+            return jsonify({'error': error}), 400
         
-        # Put item in DynamoDB
-        table.put_item(Item=new_request)
+        logger.info(f"[v0] Bulk updating {len(request_ids)} requests: {fields}")
         
-        logger.info(f"[v0] Created maintenance request ID: {request_id}")
+        old_items = store.batch_get(request_ids)
+        not_found = [rid for rid in request_ids if rid not in old_items]
+        updated = []
+        conflicts = []
+        found = [old_items[rid] for rid in request_ids if rid in old_items]
+        for group in chunked(found, BULK_TRANSACTION_SIZE):
+            group_ids = [item['id'] for item in group]
+            try:
+                new_items = store.bulk_transition(group, fields)
+                updated.extend(group_ids)
+            except TransitionConflict:
+                conflicts.extend(group_ids)
+                # Another writer touched this group; drop any stale cached copies
+                for rid in group_ids:
+                    cache.delete(item_cache_key(rid))
+                continue
+            after_write(items=new_items)
         
-        return jsonify(new_request), 201
+        logger.info(f"[v0] Bulk updated {len(updated)} requests ({len(conflicts)} conflicts, {len(not_found)} not found)")
+        return jsonify({
+            'updated': updated,
+            'not_found': not_found,
+            'conflicts': conflicts
+        }), 200
     except ClientError as e:
-        logger.error(f"DynamoDB error creating request: {e}")
-        return jsonify({'error': 'Failed to create request'}), 500
+        if is_throttling_error(e):
+            return throttled_response()
+        logger.error(f"DynamoDB error bulk updating requests: {e}")
+        return jsonify({'error': 'Failed to update requests'}), 500
     except Exception as e:
-        logger.error(f"Error creating request: {e}")
-        return jsonify({'error': 'Failed to create request'}), 500
+        logger.error(f"Error bulk updating requests: {e}")
+        return jsonify({'error': 'Failed to update requests'}), 500
+
+@app.route('/api/requests/export', methods=['GET'])
+@admin_required
+@rate_limited('scan')
+def export_requests():
+    """Stream all maintenance requests as NDJSON or CSV"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+    
+    fields_param = request.args.get('fields', '').strip()
+    fields = [f.strip() for f in fields_param.split(',') if f.strip()] if fields_param else list(EXPORT_FIELDS)
+    unknown = [f for f in fields if f not in EXPORT_FIELDS]
+    if unknown:
+        return jsonify({'error': f'Unknown fields: {", ".join(unknown)}. Allowed: {", ".join(EXPORT_FIELDS)}'}), 400
+    
+    try:
+        created_from = parse_export_bound(request.args['from']) if request.args.get('from') else None
+        created_to = parse_export_bound(request.args['to'], end_of_day=True) if request.args.get('to') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+    
+    logger.info(f"[v0] Exporting requests as {export_format} (from={created_from}, to={created_to}, archived={include_archived})")
+    pages = store.iter_pages(fields, created_from, created_to, EXPORT_PAGE_SIZE)
+    if include_archived:
+        pages = itertools.chain(pages, archive.iter_pages(fields, created_from, created_to, EXPORT_PAGE_SIZE))
+    if export_format == 'csv':
+        body, mimetype = generate_csv(pages, fields), 'text/csv'
+    else:
+        body, mimetype = generate_ndjson(pages), 'application/x-ndjson'
+    
+    def stream():
+        # Headers are already sent once streaming starts, so failures can
+        # only be logged and surfaced as a truncated download
+        try:
+            yield from body
+        except Exception as e:
+            logger.error(f"Error streaming export: {e}")
+            raise
+    
+    filename = f"maintenance-requests-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{export_format}"
+    return Response(
+        stream_with_context(stream()),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            'X-Accel-Buffering': 'no',
+            'Cache-Control': 'no-store'
+        }
+    )
+
+@app.route('/api/requests/search', methods=['GET'])
+@rate_limited('read')
+def search_requests():
+    """Full-text search over request titles and descriptions"""
+    try:
+        query = request.args.get('q', '').strip()
+        status = request.args.get('status', '').strip()
+        priority = request.args.get('priority', '').strip()
+        
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+        if status and status not in VALID_STATUSES:
+            return jsonify({'error': f'Invalid status. Must be one of: {", ".join(VALID_STATUSES)}'}), 400
+        if priority and priority not in VALID_PRIORITIES:
+            return jsonify({'error': f'Invalid priority. Must be one of: {", ".join(VALID_PRIORITIES)}'}), 400
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        if limit < 1 or limit > MAX_SEARCH_RESULTS:
+            return jsonify({'error': f'limit must be between 1 and {MAX_SEARCH_RESULTS}'}), 400
+        
+        if not SEARCH_INDEX_ENABLED:
+            return jsonify({'error': 'Search is disabled'}), 404
+        if not search_manager.ready:
+            response = jsonify({'error': 'Search index is warming up, please retry'})
+            response.headers['Retry-After'] = '2'
+            return response, 503
+        
+        items, total = search_manager.search(query, status or None, priority or None, limit)
+        return jsonify({'items': items, 'count': len(items), 'total': total}), 200
+    except Exception as e:
+        logger.error(f"Error searching requests: {e}")
+        return jsonify({'error': 'Failed to search requests'}), 500
+
+@app.route('/api/requests/stream', methods=['GET'])
+@rate_limited('read')
+def stream_requests():
+    """Server-Sent Events: created, updated and deleted requests as they happen"""
+    if not change_events.enabled:
+        return jsonify({'error': 'Change streaming is disabled'}), 503
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID must be an integer'}), 400
+    
+    subscription = change_events.subscribe(last_event_id)
+    
+    def generate():
+        try:
+            yield f'retry: {CHANGE_STREAM_RETRY_MS}\n\n'
+            for event in subscription:
+                if event is None:
+                    # Keeps proxies from closing an idle connection
+                    yield ': heartbeat\n\n'
+                    continue
+                seq, event_type, data = event
+                if event_type == RESYNC:
+                    yield f'event: {RESYNC}\ndata: {{}}\n\n'
+                else:
+                    yield f'id: {seq}\nevent: {event_type}\ndata: {data}\n\n'
+        finally:
+            subscription.close()
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
 
 @app.route('/api/requests/<request_id>', methods=['GET'])
+@rate_limited('read')
 def get_request(request_id):
     """Retrieve a specific maintenance request from DynamoDB"""
     try:
-        logger.info(f"[v0] Fetching request ID: {request_id}")
-        response = table.get_item(Key={'id': request_id})
-        
-        if 'Item' not in response:
-            return jsonify({'error': 'Request not found'}), 404
+        body = cache.get_raw(item_cache_key(request_id))
+        if body is None:
+            generation = cache.generation()
+            logger.info(f"[v0] Fetching request ID: {request_id}")
+            if is_reserved_id(request_id):
+                return jsonify({'error': 'Request not found'}), 404
+            item = store.get(request_id)
+            if item is None:
+                # Accepted in write-behind mode but not flushed yet; not cached
+                pending = write_behind.get(request_id)
+                if pending is not None:
+                    return conditional_json(pending)
+                # Archived requests no longer change, so they are cached like hot ones
+                item = archive.get(request_id)
+                if item is None:
+                    return jsonify({'error': 'Request not found'}), 404
+            body = app.json.dumps(item)
+            # Skipped if a write landed since the read; its invalidation may already have run
+            cache.set_raw(item_cache_key(request_id), body, generation=generation)
         
-        return jsonify(response['Item']), 200
+        return conditional_json(body=body)
     except ClientError as e:
+        if is_throttling_error(e):
+            return throttled_response()
         logger.error(f"DynamoDB error fetching request: {e}")
         return jsonify({'error': 'Failed to fetch request'}), 500
     except Exception as e:
@@ -258,83 +1068,43 @@ def get_request(request_id):
         return jsonify({'error': 'Failed to fetch request'}), 500
 
 @app.route('/api/requests/<request_id>', methods=['PUT'])
+@rate_limited('write')
 def update_request(request_id):
     """Update a maintenance request in DynamoDB"""
     try:
         data = request.get_json()
         
         logger.info(f"[v0] Updating request ID: {request_id}")
-        
-        # Check if request exists
-        response = table.get_item(Key={'id': request_id})
-        if 'Item' not in response:
+        if is_reserved_id(request_id):
             return jsonify({'error': 'Request not found'}), 404
+
+        try:
+            expected_version = parse_if_match(request.headers.get('If-Match'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Build update expression
-        update_expressions = []
-        expression_values = {}
-        expression_names = {}
-
-        # Title
-        if 'title' in data:
-            title = data['title'].strip()
-            if len(title) < 3 or len(title) > 255:
-                return jsonify({'error': 'Title must be between 3 and 255 characters'}), 400
-            update_expressions.append('#title = :title')
-            expression_names['#title'] = 'title'
-            expression_values[':title'] = title
-        
-        # Description
-        if 'description' in data:
-            description = data['description'].strip()
-            if len(description) < 10:
-                return jsonify({'error': 'Description must be at least 10 characters'}), 400
-            update_expressions.append('#description = :description')
-            expression_names['#description'] = 'description'
-            expression_values[':description'] = description
-        
-        # Status
-        if 'status' in data:
-            status = data['status'].strip()
-            valid_statuses = ['Pending', 'In Progress', 'Resolved', 'Closed']
-            if status not in valid_statuses:
-                return jsonify({'error': f'Invalid status. Must be one of: {", ".join(valid_statuses)}'}), 400
-            update_expressions.append('#status = :status')
-            expression_names['#status'] = 'status'
-            expression_values[':status'] = status
-        
-        # Priority
-        if 'priority' in data:
-            priority = data['priority'].strip()
-            valid_priorities = ['Low', 'Medium', 'High', 'Critical']
-            if priority not in valid_priorities:
-                return jsonify({'error': f'Invalid priority. Must be one of: {", ".join(valid_priorities)}'}), 400
-            update_expressions.append('#priority = :priority')
-            expression_names['#priority'] = 'priority'
-            expression_values[':priority'] = priority
-        
-        if not update_expressions:
-            return jsonify({'error': 'No fields to update'}), 400
-        
-        # Add updated_at timestamp
-        update_expressions.append('#updated_at = :updated_at')
-        expression_names['#updated_at'] = 'updated_at'
-        expression_values[':updated_at'] = datetime.utcnow().isoformat() + 'Z'
+        # Validate the updatable fields
+        fields, error = validate_update_fields(data)
+        if error:
+            return jsonify({'error': error}), 400
         
-        # Final update expression
-        update_expression = "SET " + ", ".join(update_expressions)
+        # A request still in the write-behind log must reach the store first
+        write_behind.flush(request_id)
         
-        # Update item
-        table.update_item(
-            Key={'id': request_id},
-            UpdateExpression=update_expression,
-            ExpressionAttributeNames=expression_names,
-            ExpressionAttributeValues=expression_values
-        )
+        # The existence (and optional version) check is part of the write itself
+        try:
+            _, updated_item = store.update(request_id, fields, expected_version)
+        except VersionConflict:
+            return jsonify({'error': 'Request has been modified, reload and retry'}), 412
+        except RequestNotFound:
+            return jsonify({'error': 'Request not found'}), 404
         
+        after_write(items=[updated_item])
         logger.info(f"[v0] Updated request ID: {request_id}")
-        return jsonify({'message': 'Request updated successfully'}), 200
+        return jsonify(updated_item), 200
     except ClientError as e:
+        if is_throttling_error(e):
+            return throttled_response()
         logger.error(f"DynamoDB error updating request: {e}")
         return jsonify({'error': 'Failed to update request'}), 500
     except Exception as e:
@@ -343,22 +1113,29 @@ def update_request(request_id):
 
 
 @app.route('/api/requests/<request_id>', methods=['DELETE'])
+@rate_limited('write')
 def delete_request(request_id):
     """Delete a maintenance request from DynamoDB"""
     try:
         logger.info(f"[v0] Deleting request ID: {request_id}")
-        
-        # Check if request exists
-        response = table.get_item(Key={'id': request_id})
-        if 'Item' not in response:
+        if is_reserved_id(request_id):
             return jsonify({'error': 'Request not found'}), 404
         
-        # Delete the item
-        table.delete_item(Key={'id': request_id})
+        # As for updates, a pending write-behind entry is stored first
+        write_behind.flush(request_id)
+        
+        # Delete only if present; the store records a tombstone for delta clients
+        try:
+            store.delete(request_id)
+        except RequestNotFound:
+            return jsonify({'error': 'Request not found'}), 404
         
+        after_write(deleted_ids=[request_id])
         logger.info(f"[v0] Deleted request ID: {request_id}")
         return jsonify({'message': 'Request deleted successfully'}), 200
     except ClientError as e:
+        if is_throttling_error(e):
+            return throttled_response()
         logger.error(f"DynamoDB error deleting request: {e}")
         return jsonify({'error': 'Failed to delete request'}), 500
     except Exception as e:
@@ -367,60 +1144,143 @@ def delete_request(request_id):
 
 @app.route('/api/admin/stats', methods=['GET'])
 @admin_required
+@rate_limited('read')
 def get_stats():
     """Retrieve statistics about all maintenance requests"""
     try:
         logger.info("[v0] Fetching admin statistics")
-        response = table.scan()
-        requests_data = response.get('Items', [])
+        stats = store.get_stats()
+        if stats is None:
+            # First use on an existing table: build the counters once
+            stats = store.recount_stats()
+        if archive.enabled:
+            # The counters cover the hot store only
+            stats = dict(stats, archived=archive.count())
         
-        # Calculate statistics
-        total = len(requests_data)
-        pending = len([r for r in requests_data if r.get('status') == 'Pending'])
-        in_progress = len([r for r in requests_data if r.get('status') == 'In Progress'])
-        resolved = len([r for r in requests_data if r.get('status') == 'Resolved'])
-        closed = len([r for r in requests_data if r.get('status') == 'Closed'])
-        
-        # Count by priority
-        critical = len([r for r in requests_data if r.get('priority') == 'Critical'])
-        high = len([r for r in requests_data if r.get('priority') == 'High'])
-        medium = len([r for r in requests_data if r.get('priority') == 'Medium'])
-        low = len([r for r in requests_data if r.get('priority') == 'Low'])
-        
-        stats = {
-            'total': total,
-            'pending': pending,
-            'in_progress': in_progress,
-            'resolved': resolved,
-            'closed': closed,
-            'critical': critical,
-            'high': high,
-            'medium': medium,
-            'low': low
-        }
-        
-        logger.info(f"[v0] Statistics calculated: {stats}")
+        logger.info(f"[v0] Statistics loaded: {stats}")
         return jsonify(stats), 200
+    except ClientError as e:
+        if is_throttling_error(e):
+            return throttled_response()
+        logger.error(f"DynamoDB error fetching statistics: {e}")
+        return jsonify({'error': 'Failed to fetch statistics'}), 500
     except Exception as e:
         logger.error(f"Error fetching statistics: {e}")
         return jsonify({'error': 'Failed to fetch statistics'}), 500
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    """Health check endpoint for monitoring"""
+@app.route('/api/admin/stats/recount', methods=['POST'])
+@admin_required
+@rate_limited('scan')
+def recount_stats_endpoint():
+    """Rebuild the statistics counters from a parallel scan to repair drift"""
     try:
-        logger.info("[v0] Health check endpoint called")
-        # Test DynamoDB connection
-        table.table_status
-        return jsonify({
-            'status': 'healthy',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'database': 'DynamoDB',
-            'region': AWS_REGION
-        }), 200
+        logger.info("[v0] Recounting admin statistics")
+        stats = store.recount_stats()
+        logger.info(f"[v0] Statistics recounted: {stats}")
+        return jsonify(stats), 200
+    except ClientError as e:
+        if is_throttling_error(e):
+            return throttled_response()
+        logger.error(f"DynamoDB error recounting statistics: {e}")
+        return jsonify({'error': 'Failed to recount statistics'}), 500
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
+        logger.error(f"Error recounting statistics: {e}")
+        return jsonify({'error': 'Failed to recount statistics'}), 500
+
+@app.route('/api/admin/analytics', methods=['GET'])
+@admin_required
+@rate_limited('read')
+def get_analytics():
+    """Daily volumes, time-to-resolve and backlog age from the daily rollups"""
+    try:
+        try:
+            days = int(request.args.get('days', DEFAULT_ANALYTICS_DAYS))
+        except ValueError:
+            return jsonify({'error': 'days must be an integer'}), 400
+        if days < 1 or days > MAX_ANALYTICS_DAYS:
+            return jsonify({'error': f'days must be between 1 and {MAX_ANALYTICS_DAYS}'}), 400
+
+        today = utc_today()
+        cache_key = f'analytics:{cache.generation()}:{today}:{days}'
+        body = cache.get_raw(cache_key)
+        if body is None:
+            logger.info(f"[v0] Building analytics for the last {days} days")
+            # One read covers both the reporting window and the backlog horizon
+            rollups = store.get_rollups(days_before(today, BACKLOG_HORIZON_DAYS - 1), today)
+            stats = store.get_stats() or store.recount_stats()
+            report = summarize(rollups, days_before(today, days - 1), today, today,
+                               open_total=stats['pending'] + stats['in_progress'])
+            body = app.json.dumps(report)
+            cache.set_raw(cache_key, body)
+        return conditional_json(body=body)
+    except ClientError as e:
+        if is_throttling_error(e):
+            return throttled_response()
+        logger.error(f"DynamoDB error fetching analytics: {e}")
+        return jsonify({'error': 'Failed to fetch analytics'}), 500
+    except Exception as e:
+        logger.error(f"Error fetching analytics: {e}")
+        return jsonify({'error': 'Failed to fetch analytics'}), 500
+
+@app.route('/api/admin/analytics/rebuild', methods=['POST'])
+@admin_required
+@rate_limited('scan')
+def rebuild_analytics_endpoint():
+    """Recompute the daily rollups from a snapshot of the store and the archive"""
+    try:
+        logger.info("[v0] Rebuilding analytics rollups")
+        result = rebuild_rollups(store, archive)
+        cache.bump_generation()
+        return jsonify(result), 200
+    except ClientError as e:
+        if is_throttling_error(e):
+            return throttled_response()
+        logger.error(f"DynamoDB error rebuilding analytics: {e}")
+        return jsonify({'error': 'Failed to rebuild analytics'}), 500
+    except Exception as e:
+        logger.error(f"Error rebuilding analytics: {e}")
+        return jsonify({'error': 'Failed to rebuild analytics'}), 500
+
+@app.route('/api/admin/cache', methods=['GET'])
+@admin_required
+def get_cache_stats():
+    """Report read cache hit, miss and eviction counters"""
+    try:
+        return jsonify(cache.stats()), 200
+    except Exception as e:
+        logger.error(f"Error fetching cache statistics: {e}")
+        return jsonify({'error': 'Failed to fetch cache statistics'}), 500
+
+@app.route('/api/admin/admission', methods=['GET'])
+@admin_required
+def get_admission_stats():
+    """Report rate limits and the current throttling backoff"""
+    try:
+        return jsonify(admission.stats()), 200
+    except Exception as e:
+        logger.error(f"Error fetching admission statistics: {e}")
+        return jsonify({'error': 'Failed to fetch admission statistics'}), 500
+
+@app.route('/api/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness: the worker is serving requests. Does no I/O."""
+    return jsonify({'status': 'alive'}), 200
+
+@app.route('/api/health/ready', methods=['GET'])
+@app.route('/api/health', methods=['GET'])
+def readiness_check():
+    """Readiness: the result of the last background storage probe"""
+    ready, details = health_probe.status(wait_seconds=HEALTH_STARTUP_WAIT_SECONDS)
+    details.update({
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'database': store.name,
+        'region': AWS_REGION
+    })
+    if write_behind.enabled:
+        details['pending_writes'] = write_behind.pending_count()
+    response = jsonify(details)
+    response.headers['Cache-Control'] = 'no-store'
+    return response, 200 if ready else 503
 
 @app.route('/api/iam/verify', methods=['GET'])
 @admin_required
@@ -440,7 +1300,6 @@ def verify_iam():
         except ClientError as e:
             # Try to get role instead
             try:
-                sts_client = boto3.client('sts', region_name=AWS_REGION)
                 identity = sts_client.get_caller_identity()
                 return jsonify({
                     'status': 'success',
@@ -484,7 +1343,6 @@ def get_iam_permissions():
                 })
         except ClientError:
             # If user doesn't exist, try role
-            sts_client = boto3.client('sts', region_name=AWS_REGION)
             identity = sts_client.get_caller_identity()
             arn = identity.get('Arn', '')
             
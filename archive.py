@@ -0,0 +1,215 @@
+"""
+Cold storage for closed maintenance requests
+
+archive_closed() moves requests that have been Closed or Resolved for more
+than a number of days out of the request store into gzip-compressed NDJSON
+files, partitioned by the date they were closed:
+
+    <ARCHIVE_DIR>/closed_date=2024-03-01/requests-<timestamp>-<suffix>.ndjson.gz
+
+A SQLite id index in the same directory maps each archived id to its file
+and created_at, so GET /api/requests/<id> can fall back to the archive and
+exports with include_archived only open the files in their date range.
+
+Each request is written to the archive before it is deleted from the store,
+and the delete is guarded on the version that was archived, so a request
+reopened in the meantime stays hot and its archived copy is dropped from
+the index. The delete leaves the usual tombstone, so delta clients and the
+search index forget archived requests like deleted ones.
+"""
+
+import os
+import gzip
+import json
+import sqlite3
+import logging
+import threading
+from uuid import uuid4
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from storage import RequestNotFound, VersionConflict, utc_timestamp
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = ('Closed', 'Resolved')
+INDEX_FILENAME = 'index.sqlite3'
+
+class _Encoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return int(o) if o == o.to_integral_value() else float(o)
+        if isinstance(o, (set, frozenset)):
+            return sorted(o)
+        return super().default(o)
+
+class RequestArchive:
+    """Date-partitioned gzip NDJSON files plus an id index"""
+
+    enabled = True
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS archived ('
+            ' id TEXT PRIMARY KEY, file TEXT NOT NULL, created_at TEXT, archived_at TEXT NOT NULL)'
+        )
+        self._connect().execute('CREATE INDEX IF NOT EXISTS archived_created ON archived (created_at)')
+
+    def reset(self):
+        """Forget connections inherited across fork; they reopen on next use"""
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.directory, INDEX_FILENAME), timeout=10,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def write_partition(self, closed_date, items):
+        """Write items to a new file in closed_date's partition and index them. Returns the file."""
+        partition = f'closed_date={closed_date}'
+        os.makedirs(os.path.join(self.directory, partition), exist_ok=True)
+        name = f"requests-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid4().hex[:8]}.ndjson.gz"
+        relative = os.path.join(partition, name)
+        path = os.path.join(self.directory, relative)
+        # Written under a temporary name and fsynced, so the index never
+        # points at a partial file
+        with open(path + '.tmp', 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as out:
+                for item in items:
+                    out.write(json.dumps(item, cls=_Encoder, separators=(',', ':')).encode() + b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(path + '.tmp', path)
+
+        archived_at = utc_timestamp()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany('INSERT OR REPLACE INTO archived (id, file, created_at, archived_at) VALUES (?, ?, ?, ?)',
+                         [(item['id'], relative, item.get('created_at'), archived_at) for item in items])
+        conn.execute('COMMIT')
+        return relative
+
+    def forget(self, request_ids):
+        """Drop index entries for requests that stayed in the store"""
+        self._connect().executemany('DELETE FROM archived WHERE id = ?', [(rid,) for rid in request_ids])
+
+    def _read(self, relative):
+        with gzip.open(os.path.join(self.directory, relative), 'rb') as lines:
+            for line in lines:
+                yield line
+
+    def get(self, request_id):
+        """The archived request with request_id, or None"""
+        row = self._connect().execute('SELECT file FROM archived WHERE id = ?', (request_id,)).fetchone()
+        if row is None:
+            return None
+        marker = f'"id":"{request_id}"'.encode()
+        for line in self._read(row[0]):
+            # Cheap substring test before decoding each line
+            if marker in line:
+                item = json.loads(line)
+                if item.get('id') == request_id:
+                    return item
+        logger.warning(f"Archived request {request_id} missing from {row[0]}")
+        return None
+
+    def count(self):
+        return self._connect().execute('SELECT COUNT(*) FROM archived').fetchone()[0]
+
+    def iter_pages(self, fields, created_from=None, created_to=None, page_size=500):
+        """Yield pages of archived requests projected to fields, optionally bounded on created_at"""
+        rows = self._connect().execute(
+            'SELECT file, id FROM archived WHERE created_at BETWEEN ? AND ? ORDER BY file',
+            (created_from or '', created_to or '~')
+        ).fetchall()
+        ids_by_file = defaultdict(set)
+        for relative, request_id in rows:
+            ids_by_file[relative].add(request_id)
+
+        page = []
+        for relative, ids in ids_by_file.items():
+            for line in self._read(relative):
+                item = json.loads(line)
+                # A request archived twice (after an interrupted run) is only
+                # exported from the file the index points at
+                if item['id'] not in ids:
+                    continue
+                page.append({field: item[field] for field in fields if field in item})
+                if len(page) >= page_size:
+                    yield page
+                    page = []
+        if page:
+            yield page
+
+class NullArchive:
+    """No cold store configured"""
+
+    enabled = False
+
+    def reset(self):
+        pass
+
+    def get(self, request_id):
+        return None
+
+    def count(self):
+        return 0
+
+    def iter_pages(self, fields, created_from=None, created_to=None, page_size=500):
+        return iter(())
+
+def create_archive(directory):
+    """Build the archive for ARCHIVE_DIR, or a no-op one when it is unset"""
+    if not directory:
+        return NullArchive()
+    return RequestArchive(directory)
+
+def closed_at(item):
+    """
+    When a closed request was closed. Later edits move updated_at, so it is
+    only the fallback for requests closed before resolved_at was recorded.
+    """
+    return item.get('resolved_at') or item['updated_at']
+
+def archive_closed(store, archive, older_than_days, statuses=ARCHIVABLE_STATUSES, page_size=500):
+    """
+    Move requests in statuses that were closed more than older_than_days ago
+    from store into archive. Returns (archived_ids, counts).
+    """
+    cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).isoformat() + 'Z'
+    archived_ids = []
+    counts = {'archived': 0, 'reopened': 0, 'already_gone': 0}
+    for page in store.iter_closed(statuses, cutoff, page_size):
+        by_date = defaultdict(list)
+        for item in page:
+            by_date[closed_at(item)[:10]].append(item)
+        for closed_date, items in sorted(by_date.items()):
+            archive.write_partition(closed_date, items)
+
+        stale = []
+        for item in page:
+            version = int(item['version']) if 'version' in item else None
+            try:
+                store.delete(item['id'], expected_version=version, archived=True)
+            except VersionConflict:
+                counts['reopened'] += 1
+                stale.append(item['id'])
+                continue
+            except RequestNotFound:
+                # Deleted by a user while being archived
+                counts['already_gone'] += 1
+                stale.append(item['id'])
+                continue
+            archived_ids.append(item['id'])
+            counts['archived'] += 1
+        if stale:
+            archive.forget(stale)
+    logger.info(f"Archived {counts['archived']} requests closed before {cutoff}")
+    return archived_ids, counts
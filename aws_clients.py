@@ -0,0 +1,157 @@
+"""
+Lazy, self-refreshing AWS client provider
+
+Nothing touches the network at import time: the boto3 session, clients and
+resources are built on first use and then shared by every thread of the
+process. When IAM_ROLE_ARN is set the assumed-role credentials are wrapped
+in botocore RefreshableCredentials, so botocore re-assumes the role before
+they expire instead of failing once IAM_SESSION_DURATION has elapsed.
+"""
+
+import logging
+import threading
+import boto3
+from botocore.credentials import RefreshableCredentials
+from botocore.session import get_session
+
+logger = logging.getLogger(__name__)
+
+class AWSClientProvider:
+    """Creates and caches boto3 clients/resources on first use"""
+
+    def __init__(self, region, access_key=None, secret_key=None, role_arn='',
+                 session_duration=3600, config=None, role_session_name='maintenance-system-session',
+                 session_hooks=()):
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.role_arn = role_arn
+        self.session_duration = session_duration
+        self.config = config
+        self.role_session_name = role_session_name
+        # Callables applied to each new boto3 session, e.g. to register event handlers
+        self.session_hooks = list(session_hooks)
+        self._lock = threading.RLock()
+        self._session = None
+        self._clients = {}
+        self._resources = {}
+        self._tables = {}
+
+    def _base_session(self):
+        """Session using the configured access keys, or the default credential chain"""
+        return boto3.Session(
+            region_name=self.region,
+            aws_access_key_id=self.access_key,
+            aws_secret_access_key=self.secret_key
+        )
+
+    def _assume_role(self):
+        """Fetch fresh role credentials in the format RefreshableCredentials expects"""
+        sts_client = self._base_session().client('sts', config=self.config)
+        credentials = sts_client.assume_role(
+            RoleArn=self.role_arn,
+            RoleSessionName=self.role_session_name,
+            DurationSeconds=self.session_duration
+        )['Credentials']
+        logger.info(f"Assumed IAM role, credentials expire at {credentials['Expiration'].isoformat()}")
+        return {
+            'access_key': credentials['AccessKeyId'],
+            'secret_key': credentials['SecretAccessKey'],
+            'token': credentials['SessionToken'],
+            'expiry_time': credentials['Expiration'].isoformat()
+        }
+
+    def _build_session(self):
+        if self.role_arn:
+            try:
+                refreshable = RefreshableCredentials.create_from_metadata(
+                    metadata=self._assume_role(),
+                    refresh_using=self._assume_role,
+                    method='sts-assume-role'
+                )
+                botocore_session = get_session()
+                botocore_session._credentials = refreshable
+                botocore_session.set_config_variable('region', self.region)
+                logger.info("Using IAM role for AWS access")
+                return boto3.Session(botocore_session=botocore_session)
+            except Exception as e:
+                logger.warning(f"Could not initialize IAM role, using access keys: {e}")
+        else:
+            logger.info("Using access keys for AWS access")
+        return self._base_session()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = self._build_session()
+                    for hook in self.session_hooks:
+                        hook(session)
+                    self._session = session
+        return self._session
+
+    def client(self, service_name):
+        """Shared low-level client for service_name"""
+        client = self._clients.get(service_name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(service_name)
+                if client is None:
+                    client = self.session.client(service_name, config=self.config)
+                    self._clients[service_name] = client
+        return client
+
+    def resource(self, service_name):
+        """Shared resource for service_name"""
+        resource = self._resources.get(service_name)
+        if resource is None:
+            with self._lock:
+                resource = self._resources.get(service_name)
+                if resource is None:
+                    resource = self.session.resource(service_name, config=self.config)
+                    self._resources[service_name] = resource
+        return resource
+
+    def table(self, table_name):
+        """Shared DynamoDB Table resource"""
+        table = self._tables.get(table_name)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(table_name)
+                if table is None:
+                    table = self.resource('dynamodb').Table(table_name)
+                    self._tables[table_name] = table
+        return table
+
+    def reset(self):
+        """
+        Forget every session and client. Called after fork so a worker never
+        reuses connection pools created in the gunicorn master (preload_app).
+        """
+        with self._lock:
+            self._session = None
+            self._clients = {}
+            self._resources = {}
+            self._tables = {}
+
+    def lazy_client(self, service_name):
+        return LazyProxy(lambda: self.client(service_name))
+
+    def lazy_resource(self, service_name):
+        return LazyProxy(lambda: self.resource(service_name))
+
+    def lazy_table(self, table_name):
+        return LazyProxy(lambda: self.table(table_name))
+
+class LazyProxy:
+    """Stands in for a client/resource and resolves it on first attribute access"""
+
+    def __init__(self, factory):
+        object.__setattr__(self, '_factory', factory)
+
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
+
+    def __repr__(self):
+        return f'<LazyProxy for {self._factory()!r}>'
@@ -0,0 +1,235 @@
+"""
+Change events for GET /api/requests/stream (Server-Sent Events)
+
+Write handlers publish one event per created, updated or deleted request
+to a log kept in a SQLite database on a tmpfs path, shared by every gunicorn
+worker on the host. Each worker runs one thread that tails the log and
+hands new events to the streams it is serving, so the number of open
+dashboards costs in-memory queue operations, not database reads.
+
+The log sequence number is the SSE event id. A reconnecting EventSource
+sends it back as Last-Event-ID and the missed events are replayed from the
+log. If they have already been pruned, the client is told to resync with
+the ?since= delta feed instead.
+"""
+
+import os
+import time
+import queue
+import sqlite3
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Special event asking the client to reload through the delta feed
+RESYNC = 'resync'
+
+def _default_path():
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'maintenance-change-events.sqlite3')
+
+class Subscription:
+    """Events for one stream: a replay from the log followed by live events"""
+
+    def __init__(self, log, start_seq, heartbeat_seconds, max_queue):
+        self._log = log
+        self._queue = queue.Queue()
+        self.max_queue = max_queue
+        self.last_seq = start_seq
+        self.heartbeat_seconds = heartbeat_seconds
+        self.closed = False
+
+    def deliver(self, events):
+        """Called by the tailing thread; a client too slow to keep up is told to resync"""
+        if self._queue.qsize() + len(events) > self.max_queue:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._queue.put((None, RESYNC, None))
+            return
+        for event in events:
+            self._queue.put(event)
+
+    def replay(self, events):
+        for event in events:
+            self._queue.put(event)
+
+    def __iter__(self):
+        """Yield (seq, type, data) tuples, or None when a heartbeat is due"""
+        while not self.closed:
+            try:
+                event = self._queue.get(timeout=self.heartbeat_seconds)
+            except queue.Empty:
+                yield None
+                continue
+            seq = event[0]
+            if seq is not None:
+                # The replay and the live feed can overlap by a few events
+                if seq <= self.last_seq:
+                    continue
+                self.last_seq = seq
+            yield event
+
+    def close(self):
+        self.closed = True
+        self._log.unsubscribe(self)
+
+class ChangeEventLog:
+    """Host-wide append-only event log with per-worker fan-out"""
+
+    enabled = True
+
+    def __init__(self, path=None, retention_seconds=3600, max_events=10000,
+                 poll_interval=0.5, heartbeat_seconds=15, max_queue=1000):
+        self.path = path or _default_path()
+        self.retention_seconds = retention_seconds
+        self.max_events = max_events
+        self.poll_interval = poll_interval
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_queue = max_queue
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._cursor = None
+        self._started = False
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS events ('
+            ' seq INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT NOT NULL,'
+            ' data TEXT NOT NULL, created_at REAL NOT NULL)'
+        )
+
+    def reset(self):
+        """Forget connections, streams and the tailing thread inherited across fork"""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._cursor = None
+        self._started = False
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def publish(self, events):
+        """Append (type, data) pairs, data being the JSON payload text"""
+        if not events:
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('INSERT INTO events (type, data, created_at) VALUES (?, ?, ?)',
+                             [(event_type, data, now) for event_type, data in events])
+            seq = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+            # Prune now and then rather than on every write
+            if seq % 100 < len(events):
+                conn.execute('DELETE FROM events WHERE seq <= ? OR created_at < ?',
+                             (seq - self.max_events, now - self.retention_seconds))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _after(self, seq, limit=500):
+        return self._connect().execute(
+            'SELECT seq, type, data FROM events WHERE seq > ? ORDER BY seq LIMIT ?', (seq, limit)
+        ).fetchall()
+
+    def _latest_seq(self):
+        return self._connect().execute('SELECT COALESCE(MAX(seq), 0) FROM events').fetchone()[0]
+
+    def subscribe(self, last_event_id=None):
+        """
+        Open a subscription. With last_event_id, events after it are replayed
+        first, or a resync is requested if they are no longer in the log.
+        """
+        self._start()
+        # The replay is queued before the subscription is registered, so live
+        # events can only follow it
+        with self._lock:
+            cursor = self._cursor
+            subscription = Subscription(self, cursor, self.heartbeat_seconds, self.max_queue)
+            if last_event_id is not None and last_event_id != cursor:
+                subscription.replay(self._replay(last_event_id, cursor))
+                subscription.last_seq = min(last_event_id, cursor)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def _replay(self, last_event_id, cursor):
+        """Events after last_event_id up to cursor, or a resync if some are gone"""
+        resync = [(None, RESYNC, None)]
+        # An id ahead of the log means the log was recreated (e.g. after a reboot)
+        if last_event_id > cursor:
+            return resync
+        oldest = self._connect().execute('SELECT MIN(seq) FROM events').fetchone()[0]
+        if oldest is None or oldest > last_event_id + 1:
+            return resync
+        rows = [row for row in self._after(last_event_id, limit=self.max_queue) if row[0] <= cursor]
+        if not rows or rows[-1][0] < cursor:
+            # More missed events than one queue holds
+            return resync
+        return rows
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _start(self):
+        """Start this worker's tailing thread on first use"""
+        with self._lock:
+            if self._started:
+                return
+            self._cursor = self._latest_seq()
+            self._started = True
+        thread = threading.Thread(target=self._run, name='change-events', daemon=True)
+        thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                with self._lock:
+                    if not self._subscribers:
+                        # Nobody is listening; skip ahead instead of reading
+                        self._cursor = self._latest_seq()
+                        continue
+                rows = self._after(self._cursor)
+                if not rows:
+                    continue
+                with self._lock:
+                    self._cursor = rows[-1][0]
+                    subscribers = list(self._subscribers)
+                for subscription in subscribers:
+                    subscription.deliver(rows)
+            except Exception as e:
+                logger.error(f"Error reading change events: {e}")
+
+class NullChangeEventLog:
+    """Change streaming disabled"""
+
+    enabled = False
+
+    def reset(self):
+        pass
+
+    def publish(self, events):
+        pass
+
+def create_change_event_log(enabled, **options):
+    """Build the configured event log, disabling streaming if the store is unusable"""
+    if not enabled:
+        return NullChangeEventLog()
+    try:
+        return ChangeEventLog(**options)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not open change event log, streaming disabled: {e}")
+        return NullChangeEventLog()
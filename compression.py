@@ -0,0 +1,91 @@
+"""
+Negotiated response compression
+
+Compresses buffered text/JSON responses above COMPRESS_MIN_BYTES with
+brotli (when the brotli package is installed and the client accepts it) or
+gzip. Responses that carry an ETag are content-addressed, so their
+compressed bodies are kept in a small per-process LRU keyed by ETag and
+encoding: a cached list page that is served repeatedly is compressed once.
+"""
+
+import gzip
+import threading
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset([
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'text/html', 'text/css', 'text/plain', 'text/csv',
+])
+
+class Compressor:
+    """after_request hook that applies Content-Encoding to eligible responses"""
+
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=4, cache_entries=256):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()  # (etag, encoding) -> compressed body
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.after_request(self.compress)
+
+    def _choose_encoding(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted.quality('br') > 0:
+            return 'br'
+        if accepted.quality('gzip') > 0:
+            return 'gzip'
+        return None
+
+    def _encode(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level)
+
+    def _cached_encode(self, etag, data, encoding):
+        if not etag or not self.cache_entries:
+            return self._encode(data, encoding)
+        key = (etag, encoding)
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+                return body
+        body = self._encode(data, encoding)
+        with self._lock:
+            self._cache[key] = body
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return body
+
+    def compress(self, response):
+        if response.status_code != 200 or response.direct_passthrough or response.is_streamed \
+                or 'Content-Encoding' in response.headers \
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        if (response.content_length or 0) < self.min_size:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self._choose_encoding()
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        body = self._cached_encode(etag, response.get_data(), encoding)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            # The compressed bytes differ from the identity representation, so
+            # the validator becomes weak; If-None-Match uses weak comparison
+            # and keeps answering 304
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,100 @@
+"""
+Gunicorn configuration for the Maintenance Request Management System
+
+Select a serving profile with GUNICORN_PROFILE:
+  sync    - 4 blocking workers, one request each (previous behaviour)
+  gthread - worker threads; each worker serves GUNICORN_THREADS requests
+  gevent  - cooperative workers; blocking boto3 I/O yields to other
+            requests, so each worker holds GUNICORN_WORKER_CONNECTIONS
+            requests in flight (default high-concurrency profile)
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import multiprocessing
+
+profile = os.getenv('GUNICORN_PROFILE', 'gevent')
+
+if profile == 'gevent':
+    # Patch before anything imports ssl/socket (matters with preload_app)
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+if profile == 'gevent':
+    worker_class = 'gevent'
+    workers = int(os.getenv('GUNICORN_WORKERS', str(multiprocessing.cpu_count())))
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '250'))
+    # A cooperative worker only needs a long timeout if a single request
+    # blocks the loop; keep it short so stuck workers are recycled
+    timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+    concurrency = worker_connections
+elif profile == 'gthread':
+    worker_class = 'gthread'
+    workers = int(os.getenv('GUNICORN_WORKERS', str(multiprocessing.cpu_count())))
+    threads = int(os.getenv('GUNICORN_THREADS', '32'))
+    concurrency = threads
+else:
+    worker_class = 'sync'
+    workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+    concurrency = 1
+
+# Size the per-process botocore connection pool to the requests a worker can
+# have in flight, so concurrent DynamoDB calls do not queue for a connection
+os.environ.setdefault('BOTO_MAX_POOL_CONNECTIONS', str(max(concurrency, 10)))
+# Each worker keeps a 1/workers share of the host-wide rate limits
+os.environ.setdefault('RATE_LIMIT_WORKERS', str(workers))
+
+# Workers write Prometheus samples to memory-mapped files in this directory
+# and /metrics merges them (see metrics.py). It must be set before the app
+# imports prometheus_client and be emptied on every start, otherwise samples
+# from a previous run are merged in.
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'maintenance-metrics')
+)
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir, exist_ok=True)
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '10000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '1000'))
+
+# Load the app once in the master so workers fork with it already imported;
+# AWS clients are lazy, so nothing network-bound is created before fork
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+def post_fork(server, worker):
+    """Drop AWS clients and store, cache, admission, write-behind, archive, change event and idempotency connections inherited from the master"""
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        app_module.aws.reset()
+        app_module.store.reset()
+        app_module.cache.reset()
+        app_module.admission.reset()
+        app_module.write_behind.reset()
+        app_module.archive.reset()
+        app_module.change_events.reset()
+        app_module.idempotency.reset()
+
+def worker_exit(server, worker):
+    """Flush this worker's share of the write-behind log on a graceful exit"""
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        try:
+            app_module.write_behind.flush_all()
+        except Exception as e:
+            server.log.warning(f"Write-behind flush on exit failed, entries replay later: {e}")
+
+def child_exit(server, worker):
+    """Fold an exited worker's live gauges out of the merged metrics"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,94 @@
+"""
+Background readiness probe
+
+A daemon thread runs a dependency check every interval and keeps the last
+result, so readiness endpoints answer from memory no matter how often load
+balancers and deploy hooks poll them.
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+class HealthProbe:
+    """Periodically calls check() and records its outcome and latency"""
+
+    def __init__(self, check, interval_seconds=15, max_staleness_seconds=None):
+        self._check = check
+        self.interval_seconds = interval_seconds
+        # A result older than this means the probe thread itself is stuck
+        self.max_staleness_seconds = max_staleness_seconds or interval_seconds * 3
+        self._lock = threading.Lock()
+        self._first_result = threading.Event()
+        self._started = False
+        self._last_checked = None
+        self._last_success = None
+        self._latency = None
+        self._error = None
+
+    def start(self):
+        """Start the probe thread once per process"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        thread = threading.Thread(target=self._run, name='health-probe', daemon=True)
+        thread.start()
+
+    def probe(self):
+        """Run the check once and record the result"""
+        started = time.perf_counter()
+        error = None
+        try:
+            self._check()
+        except Exception as e:
+            error = str(e)
+        latency = time.perf_counter() - started
+        now = time.time()
+        with self._lock:
+            self._last_checked = now
+            self._latency = latency
+            self._error = error
+            if error is None:
+                self._last_success = now
+        if error is not None:
+            logger.warning(f"Readiness probe failed after {latency * 1000:.1f}ms: {error}")
+        self._first_result.set()
+
+    def _run(self):
+        while True:
+            self.probe()
+            time.sleep(self.interval_seconds)
+
+    def status(self, wait_seconds=0):
+        """
+        Return (ready, details) from the last probe. wait_seconds lets the
+        first caller after startup wait for the initial result.
+        """
+        if wait_seconds:
+            self._first_result.wait(wait_seconds)
+        with self._lock:
+            last_checked = self._last_checked
+            last_success = self._last_success
+            latency = self._latency
+            error = self._error
+        now = time.time()
+        staleness = now - last_success if last_success is not None else None
+        ready = error is None and staleness is not None and staleness <= self.max_staleness_seconds
+        details = {
+            'status': 'ready' if ready else 'not_ready',
+            'checked_at': datetime.utcfromtimestamp(last_checked).isoformat() + 'Z' if last_checked else None,
+            'probe_latency_ms': round(latency * 1000, 2) if latency is not None else None,
+            'staleness_seconds': round(staleness, 2) if staleness is not None else None,
+            'interval_seconds': self.interval_seconds
+        }
+        if error is not None:
+            details['error'] = error
+        elif last_checked is None:
+            details['error'] = 'No probe has completed yet'
+        elif not ready:
+            details['error'] = 'Last successful probe is too old'
+        return ready, details
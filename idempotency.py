@@ -0,0 +1,164 @@
+"""
+Idempotency keys for POST /api/requests
+
+A client that sends an Idempotency-Key header may retry the same create
+safely. Keys are scoped to the caller (scoped_key), so one client cannot
+replay or block another's. The first call records the key, a fingerprint
+of the payload and the response in a SQLite database on a tmpfs path
+shared by every worker on the host; a retry within IDEMPOTENCY_TTL_SECONDS
+replays that response without touching the store. The table is bounded by
+IDEMPOTENCY_MAX_ENTRIES, oldest first, and pruned every PRUNE_EVERY claims.
+
+The scoped key and the payload fingerprint also determine the request id
+(request_id_for_key), so a retry that lands on another host, or after the
+entry was evicted, finds the request it created instead of a second one.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+# Expired and surplus keys are pruned once per this many new claims
+PRUNE_EVERY = 100
+# Namespace for the request ids derived from idempotency keys
+REQUEST_ID_NAMESPACE = uuid.UUID('6f1f3c1e-52c5-4d0a-9d1b-3b8f0c6a2e41')
+
+# status is None while the first call is still being processed
+Recorded = namedtuple('Recorded', 'fingerprint status body location')
+
+def _default_path():
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'maintenance-idempotency.sqlite3')
+
+def is_valid_key(key):
+    return 0 < len(key) <= MAX_KEY_LENGTH and key.isprintable()
+
+def fingerprint(payload):
+    """Stable hash of a JSON payload, to detect a key reused for a different request"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+def scoped_key(scope, key):
+    """Key as stored: the client's key within the caller's scope (user, session or address)"""
+    return f'{scope}\n{key}'
+
+def request_id_for_key(key, request_fingerprint):
+    """
+    Request id for a scoped key and payload. A stored request with this id
+    was created by the same caller, key and payload, so it can be replayed
+    without comparing fields that may have been edited since.
+    """
+    return str(uuid.uuid5(REQUEST_ID_NAMESPACE, f'{key}\n{request_fingerprint}'))
+
+class IdempotencyStore:
+    """Host-wide bounded TTL store of idempotency keys and their responses"""
+
+    enabled = True
+
+    def __init__(self, path=None, ttl_seconds=86400, max_entries=100000, lock_seconds=30):
+        self.path = path or _default_path()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock_seconds = lock_seconds
+        self._local = threading.local()
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS keys ('
+            ' key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, status INTEGER, body TEXT,'
+            ' location TEXT, expires_at REAL NOT NULL, created_at REAL NOT NULL)'
+        )
+        self._connect().execute('CREATE INDEX IF NOT EXISTS keys_created ON keys (created_at)')
+
+    def reset(self):
+        """Forget connections inherited across fork; they reopen on next use"""
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def begin(self, key, request_fingerprint):
+        """
+        Claim key for a new call and return None, or return the Recorded
+        entry of an earlier call with the same key
+        """
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM keys WHERE key = ? AND expires_at < ?', (key, now))
+            row = conn.execute('SELECT fingerprint, status, body, location FROM keys WHERE key = ?',
+                               (key,)).fetchone()
+            claim = None
+            if row is None:
+                # An unfinished claim lapses after lock_seconds, e.g. if the worker died
+                claim = conn.execute('INSERT INTO keys (key, fingerprint, expires_at, created_at) VALUES (?, ?, ?, ?)',
+                                     (key, request_fingerprint, now + self.lock_seconds, now)).lastrowid
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if claim is not None and claim % PRUNE_EVERY == 0:
+            self.prune()
+        return Recorded(*row) if row else None
+
+    def complete(self, key, status, body, location=None):
+        """Record the response to replay for key"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute('UPDATE keys SET status = ?, body = ?, location = ?, expires_at = ? WHERE key = ?',
+                     (status, body, location, now + self.ttl_seconds, key))
+
+    def prune(self):
+        """Drop expired keys, then the oldest beyond max_entries"""
+        conn = self._connect()
+        conn.execute('DELETE FROM keys WHERE expires_at < ?', (time.time(),))
+        conn.execute('DELETE FROM keys WHERE key IN (SELECT key FROM keys ORDER BY created_at DESC '
+                     'LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+    def release(self, key):
+        """Drop an unfinished claim so the client can retry after a failure"""
+        self._connect().execute('DELETE FROM keys WHERE key = ? AND status IS NULL', (key,))
+
+class NullIdempotencyStore:
+    """No local dedupe; keys still map to deterministic request ids"""
+
+    enabled = False
+
+    def reset(self):
+        pass
+
+    def begin(self, key, request_fingerprint):
+        return None
+
+    def complete(self, key, status, body, location=None):
+        pass
+
+    def release(self, key):
+        pass
+
+    def prune(self):
+        pass
+
+def create_idempotency_store(enabled, **options):
+    """Build the configured store, falling back to the null store if it cannot be opened"""
+    if not enabled:
+        return NullIdempotencyStore()
+    try:
+        return IdempotencyStore(**options)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not open idempotency store, local dedupe disabled: {e}")
+        return NullIdempotencyStore()
@@ -0,0 +1,70 @@
+"""
+Fast JSON provider for Flask
+
+Serializes with orjson when it is installed (several times faster than the
+standard library for large list pages) and falls back to json otherwise.
+Both backends render DynamoDB types natively: Decimal as an int or float
+rather than Flask's default string, and sets as sorted lists. Keys are
+sorted so identical data always produces identical bytes and ETags.
+
+Select the backend with JSON_BACKEND=auto|orjson|stdlib.
+"""
+
+import json
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dynamodb_default(o):
+    """Serialization hook for DynamoDB numbers and sets"""
+    if isinstance(o, Decimal):
+        return int(o) if o == o.to_integral_value() else float(o)
+    if isinstance(o, (set, frozenset)):
+        return sorted(o)
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with an orjson fast path and DynamoDB type support"""
+
+    sort_keys = True
+
+    def __init__(self, app, backend='auto'):
+        super().__init__(app)
+        if backend not in ('auto', 'orjson', 'stdlib'):
+            raise ValueError(f'Unknown JSON backend: {backend}')
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError('JSON_BACKEND=orjson but orjson is not installed')
+        self.backend = 'orjson' if backend != 'stdlib' and orjson is not None else 'stdlib'
+
+    def dumps_bytes(self, obj):
+        """Compact UTF-8 JSON, the form sent in responses"""
+        if self.backend == 'orjson':
+            return orjson.dumps(obj, default=dynamodb_default,
+                                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(obj, default=dynamodb_default, sort_keys=self.sort_keys,
+                          ensure_ascii=False, separators=(',', ':')).encode()
+
+    def dumps(self, obj, **kwargs):
+        # Formatting options such as indent need the standard library
+        if kwargs:
+            kwargs.setdefault('default', dynamodb_default)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self._app.debug and self.compact is None:
+            body = self.dumps(obj, indent=2) + '\n'
+        else:
+            body = self.dumps_bytes(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
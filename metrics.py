@@ -0,0 +1,146 @@
+"""
+Prometheus instrumentation for the Flask routes and DynamoDB calls
+
+Route metrics come from Flask request hooks; DynamoDB metrics come from
+botocore events registered on the boto3 session, so every client and
+resource the app creates is measured, including parallel scan threads.
+
+Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) makes
+each worker write its samples to shared memory-mapped files, and /metrics
+merges them, so the values are totals for the whole host whichever worker
+answers the scrape.
+"""
+
+import os
+import threading
+from time import perf_counter
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess
+)
+from admission import THROTTLING_CODES
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+DYNAMODB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Not worth measuring and would otherwise dominate the request counters
+EXCLUDED_PATHS = frozenset(['/metrics'])
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests by route and status code',
+    ['method', 'route', 'status']
+)
+HTTP_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to produce the response, by route',
+    ['method', 'route'], buckets=LATENCY_BUCKETS
+)
+HTTP_DYNAMODB_TIME = Histogram(
+    'http_request_dynamodb_seconds', 'Time a request spent waiting on DynamoDB calls, by route',
+    ['method', 'route'], buckets=LATENCY_BUCKETS
+)
+HTTP_IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'Requests currently being handled',
+    ['method', 'route'], multiprocess_mode='livesum'
+)
+DYNAMODB_LATENCY = Histogram(
+    'dynamodb_operation_duration_seconds', 'DynamoDB call latency including retries',
+    ['operation', 'outcome'], buckets=DYNAMODB_BUCKETS
+)
+DYNAMODB_CAPACITY = Counter(
+    'dynamodb_consumed_capacity_units_total', 'Capacity units reported by ReturnConsumedCapacity',
+    ['operation', 'table']
+)
+DYNAMODB_THROTTLES = Counter(
+    'dynamodb_throttled_requests_total', 'DynamoDB attempts rejected by throttling (before retries)',
+    ['operation']
+)
+
+_request_local = threading.local()
+
+def _route_label():
+    # The URL rule keeps cardinality bounded (ids are not labels)
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+def _before_request():
+    if request.path in EXCLUDED_PATHS:
+        return
+    g.metrics_route = (request.method, _route_label())
+    g.metrics_started = perf_counter()
+    _request_local.dynamodb_seconds = 0.0
+    HTTP_IN_PROGRESS.labels(*g.metrics_route).inc()
+
+def _after_request(response):
+    labels = g.get('metrics_route')
+    if labels is not None:
+        HTTP_LATENCY.labels(*labels).observe(perf_counter() - g.metrics_started)
+        HTTP_DYNAMODB_TIME.labels(*labels).observe(getattr(_request_local, 'dynamodb_seconds', 0.0))
+        HTTP_REQUESTS.labels(labels[0], labels[1], str(response.status_code)).inc()
+    return response
+
+def _teardown_request(exc):
+    # Runs even when the view raised; after_request has already counted the 500
+    labels = g.pop('metrics_route', None)
+    if labels is not None:
+        HTTP_IN_PROGRESS.labels(*labels).dec()
+
+def metrics_view():
+    """Prometheus text exposition of this process or, under gunicorn, all workers"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+def init_app(app):
+    """Register the request hooks and the /metrics endpoint"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+# DynamoDB instrumentation (botocore event handlers)
+
+def _request_capacity(params, model, context, **kwargs):
+    """Ask DynamoDB to report consumed capacity on every call that supports it"""
+    context['metrics_started'] = perf_counter()
+    context['metrics_operation'] = model.name
+    if model.input_shape is not None and 'ReturnConsumedCapacity' in model.input_shape.members:
+        params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+def _observe_call(model, context, outcome):
+    started = context.get('metrics_started')
+    if started is None:
+        return
+    elapsed = perf_counter() - started
+    DYNAMODB_LATENCY.labels(model.name, outcome).observe(elapsed)
+    if hasattr(_request_local, 'dynamodb_seconds'):
+        _request_local.dynamodb_seconds += elapsed
+
+def _record_response(http_response, parsed, model, context, **kwargs):
+    _observe_call(model, context, 'error' if http_response.status_code >= 300 else 'success')
+    consumed = parsed.get('ConsumedCapacity')
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    for entry in consumed or []:
+        DYNAMODB_CAPACITY.labels(model.name, entry.get('TableName', '')).inc(entry.get('CapacityUnits', 0))
+
+def _record_exception(exception, context, **kwargs):
+    # after-call-error (connection failures) does not pass the model
+    started = context.get('metrics_started')
+    if started is not None:
+        DYNAMODB_LATENCY.labels(context.get('metrics_operation', 'unknown'), 'exception').observe(
+            perf_counter() - started)
+
+def _record_attempt(parsed_response, context, **kwargs):
+    """Called once per HTTP attempt, so throttles absorbed by retries are counted too"""
+    if parsed_response and parsed_response.get('Error', {}).get('Code') in THROTTLING_CODES:
+        DYNAMODB_THROTTLES.labels(context.get('metrics_operation', 'unknown')).inc()
+
+def instrument_session(session):
+    """Register the DynamoDB handlers on a boto3 session; clients created from it inherit them"""
+    events = session.events
+    events.register('provide-client-params.dynamodb', _request_capacity)
+    events.register('after-call.dynamodb', _record_response)
+    events.register('after-call-error.dynamodb', _record_exception)
+    events.register('response-received.dynamodb', _record_attempt)
@@ -0,0 +1,239 @@
+"""
+Host-wide read-through cache for maintenance requests
+
+Entries live in a SQLite database on a tmpfs path (/dev/shm by default), so
+all gunicorn workers on the host share one bounded LRU + TTL store and an
+invalidation made by one worker is immediately visible to the others.
+
+A hit is a single read: recency is only rewritten once an entry's
+last_access is older than TOUCH_FRACTION of the TTL, and the hit and miss
+counters are kept per worker and added to the shared ones every
+COUNTER_FLUSH_SECONDS.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+# A hit refreshes last_access only if it is older than this fraction of the TTL
+TOUCH_FRACTION = 0.25
+# How often a worker adds its hit and miss counts to the shared counters
+COUNTER_FLUSH_SECONDS = 5.0
+
+def _default_path():
+    """Prefer shared memory; fall back to the temp directory"""
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'maintenance-request-cache.sqlite3')
+
+class _Encoder(json.JSONEncoder):
+    """Serialize DynamoDB Decimal values as plain numbers"""
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return int(o) if o == o.to_integral_value() else float(o)
+        if isinstance(o, (set, frozenset)):
+            return sorted(o)
+        return super().default(o)
+
+class SharedLRUCache:
+    """Bounded LRU cache with per-entry TTL, shared by every process on the host"""
+
+    COUNTERS = ('hits', 'misses', 'evictions')
+
+    def __init__(self, path=None, max_entries=10000, ttl_seconds=30):
+        self.path = path or _default_path()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._pending_lock = threading.Lock()
+        self._pending = dict.fromkeys(('hits', 'misses'), 0)
+        self._flushed_at = time.monotonic()
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' key TEXT PRIMARY KEY, value TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL, last_access REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)')
+        conn.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+        for name in self.COUNTERS + ('generation',):
+            conn.execute('INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)', (name,))
+
+    def reset(self):
+        """Forget connections and pending counts inherited across fork"""
+        self._local = threading.local()
+        self._pending_lock = threading.Lock()
+        self._pending = dict.fromkeys(('hits', 'misses'), 0)
+        self._flushed_at = time.monotonic()
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, conn, name, amount=1):
+        conn.execute('UPDATE counters SET value = value + ? WHERE name = ?', (amount, name))
+
+    def _count(self, name):
+        """Count a hit or miss locally, flushing to the shared counters now and then"""
+        now = time.monotonic()
+        with self._pending_lock:
+            self._pending[name] += 1
+            if now - self._flushed_at < COUNTER_FLUSH_SECONDS:
+                return
+        self.flush_counters()
+
+    def flush_counters(self):
+        """Add this worker's pending hit and miss counts to the shared counters"""
+        with self._pending_lock:
+            pending = self._pending
+            self._pending = dict.fromkeys(pending, 0)
+            self._flushed_at = time.monotonic()
+        conn = self._connect()
+        for name, amount in pending.items():
+            if amount:
+                self._bump(conn, name, amount)
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry"""
+        raw = self.get_raw(key)
+        return None if raw is None else json.loads(raw)
+
+    def get_raw(self, key):
+        """Return the stored JSON text for key without decoding it"""
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute('SELECT value, expires_at, last_access FROM entries WHERE key = ?',
+                           (key,)).fetchone()
+        if row is None or row[1] <= now:
+            if row is not None:
+                conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self._count('misses')
+            return None
+        if now - row[2] > self.ttl_seconds * TOUCH_FRACTION:
+            conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, key))
+        self._count('hits')
+        return row[0]
+
+    def set(self, key, value, ttl_seconds=None):
+        """Store value under key and evict least recently used entries over capacity"""
+        self.set_raw(key, json.dumps(value, cls=_Encoder, separators=(',', ':')), ttl_seconds)
+
+    def set_raw(self, key, payload, ttl_seconds=None, generation=None):
+        """
+        Store already serialized JSON text under key. With generation, the
+        value read when the payload was loaded, nothing is stored if the
+        generation has been bumped since: the payload may predate a write
+        whose invalidation already ran.
+        """
+        conn = self._connect()
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if generation is not None and self.generation() != generation:
+                conn.execute('ROLLBACK')
+                return
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)',
+                (key, payload, now + ttl, now)
+            )
+            overflow = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    'DELETE FROM entries WHERE key IN '
+                    '(SELECT key FROM entries ORDER BY last_access LIMIT ?)',
+                    (overflow,)
+                )
+                self._bump(conn, 'evictions', overflow)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def delete(self, key):
+        """Invalidate a single entry"""
+        self._connect().execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def generation(self, name='generation'):
+        """Current value of a generation counter, used to namespace derived keys"""
+        row = self._connect().execute('SELECT value FROM counters WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_generation(self, name='generation'):
+        """Invalidate every key built from the current generation in O(1)"""
+        conn = self._connect()
+        conn.execute('INSERT OR IGNORE INTO counters (name, value) VALUES (?, 0)', (name,))
+        self._bump(conn, name)
+
+    def clear(self):
+        """Drop all entries"""
+        self._connect().execute('DELETE FROM entries')
+
+    def stats(self):
+        """Hit, miss and eviction counters plus current size"""
+        self.flush_counters()
+        conn = self._connect()
+        stats = {name: value for name, value in conn.execute('SELECT name, value FROM counters')
+                 if name in self.COUNTERS}
+        stats['entries'] = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+class NullCache:
+    """Drop-in replacement used when caching is disabled"""
+
+    def get(self, key):
+        return None
+
+    def get_raw(self, key):
+        return None
+
+    def set(self, key, value, ttl_seconds=None):
+        pass
+
+    def set_raw(self, key, payload, ttl_seconds=None, generation=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def generation(self, name='generation'):
+        return 0
+
+    def bump_generation(self, name='generation'):
+        pass
+
+    def clear(self):
+        pass
+
+    def reset(self):
+        pass
+
+    def stats(self):
+        return {'enabled': False}
+
+def create_cache(enabled=True, path=None, max_entries=10000, ttl_seconds=30):
+    """Build the configured cache, falling back to no caching if the store is unusable"""
+    if not enabled:
+        return NullCache()
+    try:
+        return SharedLRUCache(path, max_entries, ttl_seconds)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not open shared cache, caching disabled: {e}")
+        return NullCache()
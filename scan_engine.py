@@ -0,0 +1,137 @@
+"""
+Parallel segmented scan engine for full-table DynamoDB operations
+
+Runs a DynamoDB parallel scan (Segment/TotalSegments) on a thread pool and
+streams the results back through a bounded queue, so callers iterate pages
+or items as they arrive while memory stays proportional to the queue size,
+not the table size.
+"""
+
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEGMENTS = int(os.getenv('SCAN_SEGMENTS', '8'))
+# Pages buffered between the scanning threads and the consumer
+DEFAULT_QUEUE_PAGES = int(os.getenv('SCAN_QUEUE_PAGES', '16'))
+
+_SEGMENT_DONE = object()
+
+class ScanCancelled(Exception):
+    """Raised inside a segment worker when the consumer stopped iterating"""
+
+class ParallelScanner:
+    """
+    Reusable parallel scan over a table.
+
+    Each segment pages through its own LastEvaluatedKey chain independently;
+    projection and filter expressions are pushed down to DynamoDB so only the
+    attributes a caller needs travel over the network.
+    """
+
+    def __init__(self, table, total_segments=DEFAULT_SEGMENTS, max_queue_pages=DEFAULT_QUEUE_PAGES):
+        if total_segments < 1:
+            raise ValueError('total_segments must be at least 1')
+        self.table = table
+        self.total_segments = total_segments
+        self.max_queue_pages = max_queue_pages
+
+    def _scan_kwargs(self, projection, filter_expression, expression_names,
+                     expression_values, page_size):
+        scan_kwargs = {}
+        if projection:
+            if isinstance(projection, (list, tuple)):
+                # Alias every attribute so reserved words (status, name, ...) work
+                names = {f'#p{i}': attribute for i, attribute in enumerate(projection)}
+                scan_kwargs['ProjectionExpression'] = ', '.join(names)
+                expression_names = dict(expression_names or {}, **names)
+            else:
+                scan_kwargs['ProjectionExpression'] = projection
+        if filter_expression is not None:
+            scan_kwargs['FilterExpression'] = filter_expression
+        if expression_names:
+            scan_kwargs['ExpressionAttributeNames'] = expression_names
+        if expression_values:
+            scan_kwargs['ExpressionAttributeValues'] = expression_values
+        if page_size:
+            scan_kwargs['Limit'] = page_size
+        return scan_kwargs
+
+    def _scan_segment(self, segment, scan_kwargs, results, stop):
+        """Page through one segment, handing each page to the consumer"""
+        scan_kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=self.total_segments)
+        try:
+            while not stop.is_set():
+                response = self.table.scan(**scan_kwargs)
+                self._put(results, stop, response.get('Items', []))
+                last_key = response.get('LastEvaluatedKey')
+                if not last_key:
+                    break
+                scan_kwargs['ExclusiveStartKey'] = last_key
+        except ScanCancelled:
+            return
+        except Exception as e:
+            logger.error(f"Scan segment {segment}/{self.total_segments} failed: {e}")
+            self._put(results, stop, e, force=True)
+            return
+        self._put(results, stop, _SEGMENT_DONE, force=True)
+
+    @staticmethod
+    def _put(results, stop, value, force=False):
+        """Blocking put that gives up once the consumer has gone away"""
+        while True:
+            if stop.is_set() and not force:
+                raise ScanCancelled()
+            try:
+                results.put(value, timeout=0.1)
+                return
+            except queue.Full:
+                if stop.is_set():
+                    raise ScanCancelled()
+
+    def iter_pages(self, projection=None, filter_expression=None, expression_names=None,
+                   expression_values=None, page_size=None):
+        """
+        Yield lists of items as segments return them. Page order across
+        segments is not defined. Closing the generator early cancels the scan.
+        """
+        scan_kwargs = self._scan_kwargs(projection, filter_expression, expression_names,
+                                        expression_values, page_size)
+        results = queue.Queue(maxsize=self.max_queue_pages)
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.total_segments,
+                                      thread_name_prefix='parallel-scan')
+        for segment in range(self.total_segments):
+            executor.submit(self._scan_segment, segment, scan_kwargs, results, stop)
+        remaining = self.total_segments
+        try:
+            while remaining:
+                value = results.get()
+                if value is _SEGMENT_DONE:
+                    remaining -= 1
+                elif isinstance(value, Exception):
+                    raise value
+                elif value:
+                    yield value
+        finally:
+            stop.set()
+            # Unblock any worker waiting on a full queue before joining
+            while True:
+                try:
+                    results.get_nowait()
+                except queue.Empty:
+                    break
+            executor.shutdown(wait=True)
+
+    def iter_items(self, **kwargs):
+        """Yield individual items; accepts the same arguments as iter_pages"""
+        for page in self.iter_pages(**kwargs):
+            yield from page
+
+def parallel_scan(table, total_segments=DEFAULT_SEGMENTS, **kwargs):
+    """Convenience wrapper: stream every item of table using a parallel scan"""
+    return ParallelScanner(table, total_segments).iter_items(**kwargs)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Move requests that were closed long ago from the request store into the
+cold archive (ARCHIVE_DIR, see archive.py).
+
+Uses the same configuration as the app (.env, STORAGE_BACKEND, AWS
+credentials) and invalidates the host's read cache afterwards. Run it from
+cron on one host, e.g. nightly:
+
+    ARCHIVE_DIR=/var/lib/maintenance/archive python scripts/archive_requests.py --older-than-days 90
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--older-than-days', type=int, default=int(os.getenv('ARCHIVE_AFTER_DAYS', '90')),
+                        help='archive requests closed more than this many days ago (default: ARCHIVE_AFTER_DAYS or 90)')
+    parser.add_argument('--statuses', default='Closed,Resolved', help='comma-separated statuses to archive')
+    parser.add_argument('--page-size', type=int, default=500, help='requests per archive file write')
+    args = parser.parse_args()
+
+    # The job needs neither the search index nor its initial full load
+    os.environ['SEARCH_INDEX_ENABLED'] = 'false'
+    sys.path.insert(0, ROOT)
+    import app as app_module
+    from archive import archive_closed
+
+    logging.getLogger().setLevel(logging.INFO)
+    if not app_module.archive.enabled:
+        raise SystemExit('ARCHIVE_DIR is not set')
+
+    statuses = tuple(s.strip() for s in args.statuses.split(',') if s.strip())
+    unknown = [s for s in statuses if s not in app_module.VALID_STATUSES]
+    if unknown:
+        raise SystemExit(f"Unknown statuses: {', '.join(unknown)}")
+
+    archived_ids, counts = archive_closed(app_module.store, app_module.archive, args.older_than_days,
+                                          statuses=statuses, page_size=args.page_size)
+    if archived_ids:
+        app_module.after_write(deleted_ids=archived_ids)
+    print(f"Archived {counts['archived']} requests into {app_module.archive.directory} "
+          f"({counts['reopened']} reopened, {counts['already_gone']} deleted meanwhile); "
+          f"{app_module.archive.count()} archived in total")
+
+if __name__ == "__main__":
+    main()
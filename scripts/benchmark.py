@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Benchmark the request hot paths: list, get, create, update and delete on
+/api/requests plus /api/admin/stats.
+
+By default the app is imported in-process with the SQLite storage backend
+(STORAGE_BACKEND=sqlite) and driven through the Flask test client, so no AWS
+table or server is needed. With --url the same scenarios are sent over HTTP
+to a running deployment (e.g. gunicorn with the DynamoDB backend).
+
+Examples:
+    python scripts/benchmark.py --sizes 1000,100000 --concurrency 1,8,32
+    python scripts/benchmark.py --save baseline.json
+    python scripts/benchmark.py --baseline baseline.json --max-regression 0.2
+    python scripts/benchmark.py --url http://localhost:5000 --admin-password ...
+
+Reports throughput and p50/p95/p99 latency per scenario, dataset size and
+concurrency level; --baseline exits non-zero if any result regressed.
+"""
+
+import os
+import sys
+import json
+import random
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+import itertools
+import http.client
+from datetime import datetime, timedelta
+from time import perf_counter
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ['list', 'get', 'create', 'update', 'delete', 'stats']
+STATUSES = ['Pending', 'In Progress', 'Resolved', 'Closed']
+PRIORITIES = ['Low', 'Medium', 'High', 'Critical']
+WORDS = ['leak', 'pipe', 'door', 'window', 'heater', 'light', 'socket', 'elevator',
+         'roof', 'lock', 'ceiling', 'floor', 'vent', 'boiler', 'sink', 'stairs']
+SEED_CHUNK = 10000
+BATCH_ENDPOINT_SIZE = 500
+
+def synthetic_payload(rng):
+    words = rng.sample(WORDS, 3)
+    return {
+        'title': f"{words[0].title()} {words[1]} issue",
+        'description': f"The {words[0]} near the {words[1]} and {words[2]} needs attention.",
+        'priority': rng.choice(PRIORITIES),
+        'created_by': 'benchmark'
+    }
+
+def synthetic_item(rng, now):
+    """A stored request, as build_new_request would produce, spread over the last year"""
+    timestamp = (now - timedelta(seconds=rng.randrange(365 * 86400))).isoformat() + 'Z'
+    return dict(
+        synthetic_payload(rng),
+        id=str(uuid4()),
+        record_type='request',
+        status=rng.choice(STATUSES),
+        created_at=timestamp,
+        updated_at=timestamp,
+        version=1
+    )
+
+# Transports
+
+class FlaskTransport:
+    """Calls the app in-process through the Flask test client"""
+
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+class HTTPTransport:
+    """One keep-alive connection per worker thread, carrying the session cookie"""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.netloc, timeout=30)
+        self.prefix = parts.path.rstrip('/')
+        self.cookie = None
+
+    def request(self, method, path, body=None):
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        try:
+            self.connection.request(method, self.prefix + path, payload, headers)
+            response = self.connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            # Server closed the keep-alive connection; retry once on a new one
+            self.connection.close()
+            self.connection.request(method, self.prefix + path, payload, headers)
+            response = self.connection.getresponse()
+        data = response.read()
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.cookie = cookie.split(';', 1)[0]
+        return response.status, data
+
+def login(transport, username, password):
+    status, _ = transport.request('POST', '/admin/login', {'username': username, 'password': password})
+    if status != 200:
+        raise SystemExit(f"Admin login failed with HTTP {status}")
+
+# Targets: how the benchmark reaches the app and seeds data
+
+class InProcessTarget:
+    """Imports app.py with the SQLite backend; each dataset size gets a fresh store"""
+
+    def __init__(self, args):
+        self.username = 'benchmark'
+        self.password = uuid4().hex
+        cache_dir = tempfile.mkdtemp(prefix='benchmark-')
+        os.environ.setdefault('STORAGE_BACKEND', 'sqlite')
+        os.environ.setdefault('SEARCH_INDEX_ENABLED', 'false')
+        # Measure the handlers, not the admission limits
+        os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+        os.environ['CACHE_ENABLED'] = 'true' if args.cache else 'false'
+        os.environ['CACHE_PATH'] = os.path.join(cache_dir, 'cache.sqlite3')
+        os.environ['ADMIN_USERNAME'] = self.username
+        os.environ['ADMIN_PASSWORD_HASH'] = hashlib.sha256(self.password.encode()).hexdigest()
+        sys.path.insert(0, ROOT)
+        import app as app_module
+        import storage
+        logging.getLogger().setLevel(args.log_level)
+        self.app_module = app_module
+        self.storage = storage
+        self.sqlite_path = args.sqlite_path
+
+    def describe(self):
+        return f"in-process, {self.app_module.store.name} backend"
+
+    def transport(self):
+        transport = FlaskTransport(self.app_module.app)
+        login(transport, self.username, self.password)
+        return transport
+
+    def prepare(self, size, rng):
+        """Replace the store with an empty one and load size requests into it"""
+        if self.app_module.STORAGE_BACKEND == 'sqlite':
+            path = self.sqlite_path or ':memory:'
+            if path != ':memory:' and os.path.exists(path):
+                os.remove(path)
+            self.app_module.store = self.storage.SQLiteRequestStore(path)
+        self.app_module.cache.clear()
+        return self.seed(size, rng)
+
+    def seed(self, count, rng):
+        now = datetime.utcnow()
+        ids = []
+        for start in range(0, count, SEED_CHUNK):
+            items = [synthetic_item(rng, now) for _ in range(min(SEED_CHUNK, count - start))]
+            self.app_module.store.create_many(items)
+            ids.extend(item['id'] for item in items)
+        self.app_module.cache.bump_generation()
+        return ids
+
+class HTTPTarget:
+    """A running server; seeds through the admin batch endpoint"""
+
+    def __init__(self, args):
+        self.base_url = args.url
+        self.username = args.admin_username
+        self.password = args.admin_password
+        self.no_seed = args.no_seed
+        if not self.password:
+            raise SystemExit("--admin-password (or BENCHMARK_ADMIN_PASSWORD) is required with --url")
+
+    def describe(self):
+        return f"HTTP {self.base_url}"
+
+    def transport(self):
+        transport = HTTPTransport(self.base_url)
+        login(transport, self.username, self.password)
+        return transport
+
+    def prepare(self, size, rng):
+        if self.no_seed:
+            return self.existing_ids(size)
+        return self.seed(size, rng)
+
+    def seed(self, count, rng):
+        transport = self.transport()
+        ids = []
+        for start in range(0, count, BATCH_ENDPOINT_SIZE):
+            batch = [synthetic_payload(rng) for _ in range(min(BATCH_ENDPOINT_SIZE, count - start))]
+            status, data = transport.request('POST', '/api/requests/batch', {'requests': batch})
+            if status != 201:
+                raise SystemExit(f"Seeding failed with HTTP {status}: {data[:200]}")
+            ids.extend(item['id'] for item in json.loads(data)['items'])
+        return ids
+
+    def existing_ids(self, limit):
+        """Collect ids of requests already in the table by paging the list endpoint"""
+        transport = self.transport()
+        ids = []
+        cursor = ''
+        while len(ids) < limit:
+            status, data = transport.request('GET', f'/api/requests?limit=200&cursor={cursor}')
+            if status != 200:
+                raise SystemExit(f"Listing failed with HTTP {status}")
+            page = json.loads(data)
+            ids.extend(item['id'] for item in page['items'])
+            cursor = page.get('next_cursor')
+            if not cursor:
+                break
+        if not ids:
+            raise SystemExit("No existing requests found; run without --no-seed")
+        return ids[:limit]
+
+# Scenarios
+
+def build_operations(ids, deletable):
+    """Map scenario name -> function(rng) returning (method, path, body) or None when exhausted"""
+    lock = threading.Lock()
+
+    def list_requests(rng):
+        choice = rng.random()
+        if choice < 0.5:
+            return 'GET', '/api/requests?limit=50', None
+        if choice < 0.75:
+            return 'GET', f'/api/requests?limit=50&status={rng.choice(STATUSES).replace(" ", "+")}', None
+        return 'GET', f'/api/requests?limit=50&priority={rng.choice(PRIORITIES)}', None
+
+    def get_request(rng):
+        return 'GET', f'/api/requests/{rng.choice(ids)}', None
+
+    def create_request(rng):
+        return 'POST', '/api/requests', synthetic_payload(rng)
+
+    def update_request(rng):
+        return 'PUT', f'/api/requests/{rng.choice(ids)}', {'status': rng.choice(STATUSES)}
+
+    def delete_request(rng):
+        with lock:
+            if not deletable:
+                return None
+            request_id = deletable.pop()
+        return 'DELETE', f'/api/requests/{request_id}', None
+
+    def get_stats(rng):
+        return 'GET', '/api/admin/stats', None
+
+    return {
+        'list': list_requests,
+        'get': get_request,
+        'create': create_request,
+        'update': update_request,
+        'delete': delete_request,
+        'stats': get_stats,
+    }
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+def run_scenario(operation, transports, total_requests, seed):
+    """Issue total_requests calls spread over one thread per transport"""
+    counter = itertools.count()
+    latencies = [[] for _ in transports]
+    errors = [0] * len(transports)
+    start_barrier = threading.Barrier(len(transports) + 1)
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        transport = transports[index]
+        start_barrier.wait()
+        while next(counter) < total_requests:
+            call = operation(rng)
+            if call is None:
+                break
+            started = perf_counter()
+            status, _ = transport.request(*call)
+            latencies[index].append(perf_counter() - started)
+            if status >= 400:
+                errors[index] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(len(transports))]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    started = perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - started
+
+    samples = sorted(itertools.chain.from_iterable(latencies))
+    return {
+        'requests': len(samples),
+        'errors': sum(errors),
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(samples, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+    }
+
+def result_key(result):
+    return f"{result['scenario']}/{result['size']}/{result['concurrency']}"
+
+def compare(results, baseline_path, max_regression):
+    """Print results that are slower than the baseline by more than max_regression"""
+    with open(baseline_path) as f:
+        baseline = {result_key(result): result for result in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if not previous:
+            continue
+        if previous['throughput'] and result['throughput'] < previous['throughput'] * (1 - max_regression):
+            regressions.append(f"{result_key(result)} throughput {previous['throughput']} -> {result['throughput']} req/s")
+        if previous['p95_ms'] and result['p95_ms'] > previous['p95_ms'] * (1 + max_regression):
+            regressions.append(f"{result_key(result)} p95 {previous['p95_ms']} -> {result['p95_ms']} ms")
+    return regressions
+
+def parse_int_list(value):
+    return [int(part) for part in value.split(',') if part.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=parse_int_list, default=[1000],
+                        help='comma-separated dataset sizes, e.g. 1000,100000,1000000')
+    parser.add_argument('--concurrency', type=parse_int_list, default=[1, 8, 32],
+                        help='comma-separated numbers of concurrent clients')
+    parser.add_argument('--requests', type=int, default=2000, help='requests per scenario run')
+    parser.add_argument('--warmup', type=int, default=100, help='unmeasured requests per scenario run')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-cache', dest='cache', action='store_false',
+                        help='in-process only: disable the shared read cache')
+    parser.add_argument('--sqlite-path', default=os.getenv('SQLITE_PATH'),
+                        help='in-process only: SQLite file instead of :memory:')
+    parser.add_argument('--log-level', default='WARNING', help='in-process only: app log level')
+    parser.add_argument('--url', help='benchmark a running server instead of the in-process app')
+    parser.add_argument('--admin-username', default=os.getenv('BENCHMARK_ADMIN_USERNAME', 'admin'))
+    parser.add_argument('--admin-password', default=os.getenv('BENCHMARK_ADMIN_PASSWORD'))
+    parser.add_argument('--no-seed', action='store_true',
+                        help='with --url: use existing requests instead of creating the dataset')
+    parser.add_argument('--save', help='write results as JSON to this path')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='allowed fractional drop in throughput or rise in p95 (default 0.2)')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    target = HTTPTarget(args) if args.url else InProcessTarget(args)
+    rng = random.Random(args.seed)
+
+    print("=" * 78)
+    print(f"Benchmark: {target.describe()}")
+    print("=" * 78)
+    print(f"{'scenario':<8} {'size':>9} {'conc':>5} {'requests':>9} {'errors':>7} "
+          f"{'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+
+    results = []
+    for size in args.sizes:
+        started = perf_counter()
+        ids = target.prepare(size, rng)
+        print(f"-- dataset of {size} requests ready in {perf_counter() - started:.1f}s")
+        for concurrency in args.concurrency:
+            transports = [target.transport() for _ in range(concurrency)]
+            deletable = []
+            for scenario in scenarios:
+                if scenario == 'delete':
+                    # Delete fresh requests so the dataset size stays constant
+                    deletable.extend(target.seed(args.warmup + args.requests, rng))
+                operations = build_operations(ids, deletable)
+                if args.warmup:
+                    run_scenario(operations[scenario], transports, args.warmup, args.seed)
+                result = run_scenario(operations[scenario], transports, args.requests, args.seed)
+                result.update(scenario=scenario, size=size, concurrency=concurrency)
+                results.append(result)
+                print(f"{scenario:<8} {size:>9} {concurrency:>5} {result['requests']:>9} {result['errors']:>7} "
+                      f"{result['throughput']:>9} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'target': target.describe(), 'created_at': datetime.utcnow().isoformat() + 'Z',
+                       'results': results}, f, indent=2)
+        print(f"Results saved to {args.save}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.max_regression)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("No regressions against baseline")
+
+if __name__ == "__main__":
+    main()
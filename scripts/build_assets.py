@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Build the fingerprinted, precompressed static assets into static/dist
+(see assets.py) ahead of deployment, so the app and nginx find them ready.
+
+    python scripts/build_assets.py
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--no-minify', action='store_true', help='fingerprint and compress without minifying')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from assets import AssetPipeline
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    manifest = AssetPipeline(os.path.join(ROOT, 'static'), minify=not args.no_minify).build()
+    print(f"Built {len(manifest)} assets into static/dist")
+
+if __name__ == "__main__":
+    main()
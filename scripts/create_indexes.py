@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Create the secondary indexes used by GET /api/requests and backfill
+record_type on items created before the indexes existed
+"""
+
+import os
+import sys
+import time
+import boto3
+from boto3.dynamodb.conditions import Attr
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AWS_REGION = os.getenv('AWS_REGION', 'eu-north-1')
+TABLE_NAME = 'maintenance_requests'
+RECORD_TYPE = 'request'
+
+# (index name, partition key attribute, sort key attribute)
+#
+# Throughput ceiling: every request item has record_type 'request', so the
+# two record_type indexes each hold all requests in a single partition, and
+# status/priority have only four values each. One partition accepts about
+# 1,000 write units and 3,000 read units per second. Every create, update
+# and delete writes one entry (per KB) to both record_type indexes, so the
+# table as a whole tops out near 1,000 request writes per second. A
+# throttled index write throttles the base table write, and split-for-heat
+# cannot help because created_at/updated_at always grow at the tail. The
+# per-host RATE_LIMIT_WRITE default (100/s) keeps a few hosts well below
+# that. Beyond it, the partition key has to be sharded (request#0..N) and
+# list_page, changes and iter_pages changed to merge the shards.
+INDEXES = [
+    ('record_type-created_at-index', 'record_type', 'created_at'),
+    ('status-created_at-index', 'status', 'created_at'),
+    ('priority-created_at-index', 'priority', 'created_at'),
+    ('record_type-updated_at-index', 'record_type', 'updated_at'),
+]
+# Tombstones written on delete expire through DynamoDB TTL
+TTL_ATTRIBUTE = 'expires_at'
+
+def wait_for_indexes(table):
+    """Block until the table and all of its indexes are ACTIVE"""
+    while True:
+        table.reload()
+        pending = [
+            gsi['IndexName'] for gsi in (table.global_secondary_indexes or [])
+            if gsi['IndexStatus'] != 'ACTIVE'
+        ]
+        if table.table_status == 'ACTIVE' and not pending:
+            return
+        print(f"   Waiting for: {', '.join(pending) or 'table'}")
+        time.sleep(10)
+
+def create_indexes(client, table):
+    """Create any missing index; DynamoDB allows one index creation at a time"""
+    existing = {gsi['IndexName'] for gsi in (table.global_secondary_indexes or [])}
+    for index_name, hash_key, range_key in INDEXES:
+        if index_name in existing:
+            print(f"   {index_name} already exists")
+            continue
+        print(f"   Creating {index_name}...")
+        update = {
+            'TableName': TABLE_NAME,
+            'AttributeDefinitions': [
+                {'AttributeName': hash_key, 'AttributeType': 'S'},
+                {'AttributeName': range_key, 'AttributeType': 'S'},
+            ],
+            'GlobalSecondaryIndexUpdates': [{
+                'Create': {
+                    'IndexName': index_name,
+                    'KeySchema': [
+                        {'AttributeName': hash_key, 'KeyType': 'HASH'},
+                        {'AttributeName': range_key, 'KeyType': 'RANGE'},
+                    ],
+                    'Projection': {'ProjectionType': 'ALL'},
+                }
+            }],
+        }
+        if table.billing_mode_summary is None or \
+                table.billing_mode_summary.get('BillingMode') == 'PROVISIONED':
+            update['GlobalSecondaryIndexUpdates'][0]['Create']['ProvisionedThroughput'] = {
+                'ReadCapacityUnits': table.provisioned_throughput['ReadCapacityUnits'],
+                'WriteCapacityUnits': table.provisioned_throughput['WriteCapacityUnits'],
+            }
+        client.update_table(**update)
+        wait_for_indexes(table)
+
+def enable_ttl(client):
+    """Turn on TTL expiry for tombstones if it is not already enabled"""
+    description = client.describe_time_to_live(TableName=TABLE_NAME)['TimeToLiveDescription']
+    if description.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+        print(f"   TTL already enabled on {description.get('AttributeName')}")
+        return
+    client.update_time_to_live(
+        TableName=TABLE_NAME,
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': TTL_ATTRIBUTE},
+    )
+    print(f"   Enabled TTL on {TTL_ATTRIBUTE}")
+
+def backfill_record_type(table):
+    """Tag existing request items so they appear in the unfiltered list index"""
+    updated = 0
+    scan_kwargs = {
+        'ProjectionExpression': 'id',
+        'FilterExpression': Attr('record_type').not_exists() & Attr('title').exists(),
+    }
+    while True:
+        response = table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            table.update_item(
+                Key={'id': item['id']},
+                UpdateExpression='SET record_type = :record_type',
+                ExpressionAttributeValues={':record_type': RECORD_TYPE},
+            )
+            updated += 1
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return updated
+
+def main():
+    print("=" * 50)
+    print(f"Index setup for {TABLE_NAME} ({AWS_REGION})")
+    print("=" * 50)
+
+    dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
+    table = dynamodb.Table(TABLE_NAME)
+
+    print("1. Creating secondary indexes:")
+    create_indexes(dynamodb.meta.client, table)
+
+    print("2. Enabling TTL:")
+    enable_ttl(dynamodb.meta.client)
+
+    if '--skip-backfill' not in sys.argv:
+        print("3. Backfilling record_type on existing items...")
+        print(f"   Updated {backfill_record_type(table)} items")
+
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Create the DynamoDB table used by SESSION_BACKEND=dynamodb and enable TTL
+so expired sessions are deleted automatically
+"""
+
+import os
+import boto3
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AWS_REGION = os.getenv('AWS_REGION', 'eu-north-1')
+SESSION_TABLE_NAME = os.getenv('SESSION_TABLE_NAME', 'maintenance_sessions')
+TTL_ATTRIBUTE = 'expires_at'
+
+def create_table(client):
+    """Create the on-demand sessions table unless it already exists"""
+    existing = client.list_tables()['TableNames']
+    if SESSION_TABLE_NAME in existing:
+        print(f"   {SESSION_TABLE_NAME} already exists")
+        return
+    client.create_table(
+        TableName=SESSION_TABLE_NAME,
+        AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
+        KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    print(f"   Creating {SESSION_TABLE_NAME}...")
+    client.get_waiter('table_exists').wait(TableName=SESSION_TABLE_NAME)
+    print(f"   {SESSION_TABLE_NAME} is ACTIVE")
+
+def enable_ttl(client):
+    """Turn on TTL expiry for sessions if it is not already enabled"""
+    description = client.describe_time_to_live(TableName=SESSION_TABLE_NAME)['TimeToLiveDescription']
+    if description.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+        print(f"   TTL already enabled on {description.get('AttributeName')}")
+        return
+    client.update_time_to_live(
+        TableName=SESSION_TABLE_NAME,
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': TTL_ATTRIBUTE},
+    )
+    print(f"   Enabled TTL on {TTL_ATTRIBUTE}")
+
+def main():
+    print("=" * 50)
+    print(f"Session table setup for {SESSION_TABLE_NAME} ({AWS_REGION})")
+    print("=" * 50)
+
+    client = boto3.client('dynamodb', region_name=AWS_REGION)
+
+    print("1. Creating table:")
+    create_table(client)
+
+    print("2. Enabling TTL:")
+    enable_ttl(client)
+
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -63,7 +63,8 @@ source venv/bin/activate
 pip install --upgrade pip
 pip install -r requirements.txt
 
-# Start application with Gunicorn in background
-nohup gunicorn --workers 4 --bind 0.0.0.0:5000 --timeout 120 app:app > app.log 2>&1 &
+# Start application with Gunicorn in background; the serving profile
+# (gevent/gthread/sync) is selected by GUNICORN_PROFILE in gunicorn.conf.py
+nohup gunicorn -c gunicorn.conf.py app:app > app.log 2>&1 &
 
 echo "[v0] Application started successfully on port 5000"
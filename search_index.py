@@ -0,0 +1,354 @@
+"""
+In-memory inverted index for full-text search over maintenance requests
+
+Indexes title and description with simple tokenization, matches query terms
+as prefixes against a sorted vocabulary, and ranks documents with a
+BM25-style score where title matches weigh more than description matches.
+Each worker holds its own index: writes made by this worker are applied
+directly, and a background thread pulls the change feed so writes made by
+other workers show up within SEARCH_SYNC_SECONDS.
+
+Only one worker per host scans the table. It writes what it scanned to a
+snapshot file (on /dev/shm by default) under an exclusive lock; the other
+workers, and workers recycled later, load that snapshot and catch up from
+its watermark through the change feed. A snapshot older than
+SEARCH_SNAPSHOT_MAX_AGE_SECONDS is rebuilt by whichever worker next needs it.
+"""
+
+import os
+import re
+import json
+import gzip
+import math
+import time
+import bisect
+import logging
+import tempfile
+import threading
+from collections import Counter
+from decimal import Decimal
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset(['a', 'an', 'and', 'the', 'of', 'in', 'on', 'is', 'to', 'for', 'it', 'at', 'be', 'or'])
+TITLE_WEIGHT = 3.0
+# BM25 term-frequency saturation
+TF_SATURATION = 1.2
+# Score multiplier for a prefix (rather than exact) match
+PREFIX_PENALTY = 0.7
+# Upper bound on vocabulary expansion for a single prefix
+MAX_PREFIX_EXPANSION = 200
+# Attributes kept with each document so results need no database read
+STORED_FIELDS = ('id', 'title', 'description', 'status', 'priority',
+                 'created_by', 'created_at', 'updated_at', 'version')
+
+# How often a worker waiting on another's build checks for the snapshot
+SNAPSHOT_POLL_SECONDS = 1.0
+
+def _default_snapshot_path():
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'maintenance-search-snapshot.jsonl.gz')
+
+def _json_default(o):
+    if isinstance(o, Decimal):
+        return int(o) if o == o.to_integral_value() else float(o)
+    raise TypeError(f'{type(o).__name__} is not JSON serializable')
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens, without stop words"""
+    return [token for token in TOKEN_PATTERN.findall((text or '').lower()) if token not in STOP_WORDS]
+
+class SearchIndex:
+    """Thread-safe inverted index keyed by request id"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = {}      # token -> {doc_id: weighted term frequency}
+        self._vocabulary = []    # sorted tokens, for prefix lookups
+        self._docs = {}          # doc_id -> stored item
+        self._doc_tokens = {}    # doc_id -> {token: weighted term frequency}
+
+    def __len__(self):
+        return len(self._docs)
+
+    @staticmethod
+    def _weighted_terms(item):
+        terms = Counter()
+        for token in tokenize(item.get('title')):
+            terms[token] += TITLE_WEIGHT
+        for token in tokenize(item.get('description')):
+            terms[token] += 1.0
+        return terms
+
+    def add(self, item):
+        """Index an item, replacing any previous version with the same id"""
+        doc_id = item['id']
+        terms = self._weighted_terms(item)
+        stored = {field: item[field] for field in STORED_FIELDS if field in item}
+        with self._lock:
+            self._remove_locked(doc_id)
+            for token, weight in terms.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    bisect.insort(self._vocabulary, token)
+                postings[doc_id] = weight
+            self._docs[doc_id] = stored
+            self._doc_tokens[doc_id] = terms
+
+    def remove(self, doc_id):
+        """Drop an item from the index if present"""
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id):
+        terms = self._doc_tokens.pop(doc_id, None)
+        self._docs.pop(doc_id, None)
+        if not terms:
+            return
+        for token in terms:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                index = bisect.bisect_left(self._vocabulary, token)
+                if index < len(self._vocabulary) and self._vocabulary[index] == token:
+                    del self._vocabulary[index]
+
+    def _expand(self, term):
+        """Vocabulary tokens that start with term, exact match first"""
+        start = bisect.bisect_left(self._vocabulary, term)
+        matches = []
+        for token in self._vocabulary[start:start + MAX_PREFIX_EXPANSION]:
+            if not token.startswith(term):
+                break
+            matches.append(token)
+        return matches
+
+    def search(self, query, status=None, priority=None, limit=20):
+        """
+        Return (matches, total) where matches are the top stored items for
+        query, every query term required (as a word or word prefix).
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return [], 0
+        with self._lock:
+            doc_count = len(self._docs) or 1
+            expansions = []
+            for term in terms:
+                tokens = self._expand(term)
+                if not tokens:
+                    return [], 0
+                weights = []
+                for token in tokens:
+                    postings = self._postings[token]
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    boost = 1.0 if token == term else PREFIX_PENALTY
+                    weights.append((postings, boost * idf))
+                expansions.append((sum(len(postings) for postings, _ in weights), weights))
+            # Start from the most selective term and only probe surviving candidates
+            expansions.sort(key=lambda entry: entry[0])
+            
+            scores = {}
+            for postings, term_weight in expansions[0][1]:
+                for doc_id, weight in postings.items():
+                    score = term_weight * weight * (TF_SATURATION + 1) / (weight + TF_SATURATION)
+                    if score > scores.get(doc_id, 0.0):
+                        scores[doc_id] = score
+            for _, weights in expansions[1:]:
+                next_scores = {}
+                for doc_id, total in scores.items():
+                    best = 0.0
+                    for postings, term_weight in weights:
+                        weight = postings.get(doc_id)
+                        if weight:
+                            best = max(best, term_weight * weight * (TF_SATURATION + 1) / (weight + TF_SATURATION))
+                    if best:
+                        next_scores[doc_id] = total + best
+                scores = next_scores
+                if not scores:
+                    return [], 0
+            
+            ranked = []
+            for doc_id, score in scores.items():
+                doc = self._docs[doc_id]
+                if status and doc.get('status') != status:
+                    continue
+                if priority and doc.get('priority') != priority:
+                    continue
+                ranked.append((score, doc.get('created_at', ''), doc))
+        ranked.sort(key=lambda entry: (entry[0], entry[1]), reverse=True)
+        return [doc for _, _, doc in ranked[:limit]], len(ranked)
+
+class SearchIndexManager:
+    """
+    Builds a SearchIndex in the background and keeps it current.
+
+    loader() yields every request item (a parallel scan); change_feed(since)
+    returns a delta dict with items, deleted, watermark and has_more.
+    """
+
+    def __init__(self, loader, change_feed, sync_seconds=5, snapshot_path=None, snapshot_max_age=3600):
+        self.index = SearchIndex()
+        self._loader = loader
+        self._change_feed = change_feed
+        self._sync_seconds = sync_seconds
+        self.snapshot_path = snapshot_path or _default_snapshot_path()
+        self.snapshot_max_age = snapshot_max_age
+        self._watermark = None
+        self._ready = threading.Event()
+        self._started = False
+        self._start_lock = threading.Lock()
+        # Local writes made while a build runs, replayed onto the new index
+        self._pending = None
+        self._pending_lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def start(self):
+        """Start the build and sync thread once per process"""
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+        thread = threading.Thread(target=self._run, name='search-index', daemon=True)
+        thread.start()
+
+    def _snapshot_is_fresh(self):
+        try:
+            return time.time() - os.path.getmtime(self.snapshot_path) < self.snapshot_max_age
+        except OSError:
+            return False
+
+    def _load_snapshot(self, index):
+        """Fill index from the snapshot file; returns its watermark"""
+        with gzip.open(self.snapshot_path, 'rt', encoding='utf-8') as f:
+            watermark = json.loads(f.readline())['watermark']
+            for line in f:
+                index.add(json.loads(line))
+        return watermark
+
+    def _scan(self, index):
+        """Scan the table into index and the snapshot file; returns the watermark"""
+        # Changes made while the scan runs are replayed by the next sync
+        watermark = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(time.time() - 1)) + '.000000Z'
+        tmp = f'{self.snapshot_path}.{os.getpid()}.tmp'
+        try:
+            with gzip.open(tmp, 'wt', encoding='utf-8', compresslevel=1) as f:
+                f.write(json.dumps({'watermark': watermark}) + '\n')
+                for item in self._loader():
+                    index.add(item)
+                    stored = {field: item[field] for field in STORED_FIELDS if field in item}
+                    f.write(json.dumps(stored, default=_json_default) + '\n')
+            os.replace(tmp, self.snapshot_path)
+        except OSError as e:
+            logger.warning(f"Could not write search snapshot: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return watermark
+
+    def _fill(self, index):
+        """
+        Fill index from a fresh snapshot, or scan if this worker wins the
+        host's build lock; otherwise wait for the worker that did.
+        Returns (watermark, source).
+        """
+        if fcntl is None:
+            return self._scan(index), 'scan'
+        with open(self.snapshot_path + '.lock', 'a') as lock_file:
+            while True:
+                if self._snapshot_is_fresh():
+                    return self._load_snapshot(index), 'snapshot'
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    time.sleep(SNAPSHOT_POLL_SECONDS)
+                    continue
+                try:
+                    # Another worker may have finished between the check and the lock
+                    if self._snapshot_is_fresh():
+                        return self._load_snapshot(index), 'snapshot'
+                    return self._scan(index), 'scan'
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _build(self):
+        """Fill a fresh index and swap it in, so searches never see a partial build"""
+        started = time.perf_counter()
+        with self._pending_lock:
+            self._pending = []
+        index = SearchIndex()
+        try:
+            watermark, source = self._fill(index)
+        except Exception:
+            with self._pending_lock:
+                self._pending = None
+            raise
+        with self._pending_lock:
+            # Writes this worker made during the build went to the old index
+            for item, deleted_id in self._pending:
+                self._apply_to(index, item, deleted_id)
+            self._pending = None
+            self.index = index
+        self._watermark = watermark
+        self._ready.set()
+        logger.info(f"Search index built from {source} with {len(index)} requests "
+                    f"in {time.perf_counter() - started:.2f}s")
+
+    def _sync(self):
+        while True:
+            delta = self._change_feed(self._watermark)
+            if delta.get('full_resync'):
+                self._build()
+                return
+            for item in delta.get('items', []):
+                self.index.add(item)
+            for doc_id in delta.get('deleted', []):
+                self.index.remove(doc_id)
+            self._watermark = delta.get('watermark', self._watermark)
+            if not delta.get('has_more'):
+                return
+
+    def _run(self):
+        while not self._ready.is_set():
+            try:
+                self._build()
+            except Exception as e:
+                logger.error(f"Search index build failed, retrying: {e}")
+                time.sleep(self._sync_seconds)
+        while True:
+            time.sleep(self._sync_seconds)
+            try:
+                self._sync()
+            except Exception as e:
+                logger.warning(f"Search index sync failed: {e}")
+
+    @staticmethod
+    def _apply_to(index, item, deleted_id):
+        if item is not None:
+            index.add(item)
+        if deleted_id is not None:
+            index.remove(deleted_id)
+
+    def apply(self, item=None, deleted_id=None):
+        """Apply a local write immediately, ahead of the next background sync"""
+        with self._pending_lock:
+            if self._pending is not None:
+                self._pending.append((item, deleted_id))
+            self._apply_to(self.index, item, deleted_id)
+
+    def search(self, *args, **kwargs):
+        return self.index.search(*args, **kwargs)
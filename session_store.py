@@ -0,0 +1,175 @@
+"""
+DynamoDB-backed Flask sessions with an in-process read cache
+
+The cookie carries only a signed random session id. Session data lives in
+a DynamoDB table keyed by a hash of that id, with an expires_at attribute
+that DynamoDB TTL uses to delete expired sessions in the background. Reads
+are served from a per-process LRU cache for SESSION_CACHE_SECONDS, so an
+authenticated request normally costs no network call; the table is only
+written when a session changes (login/logout) or passes half its lifetime.
+
+Because of the cache, a logout made through one worker can take up to
+SESSION_CACHE_SECONDS to reach the other workers.
+"""
+
+import json
+import time
+import hashlib
+import secrets
+import logging
+import threading
+from collections import OrderedDict
+from flask.sessions import SessionInterface, SecureCookieSession
+from itsdangerous import BadSignature, Signer, want_bytes
+
+logger = logging.getLogger(__name__)
+
+class DynamoDBSession(SecureCookieSession):
+    """Session dict that remembers its id and when its stored copy expires"""
+
+    def __init__(self, initial=None, sid=None, expires_at=0):
+        super().__init__(initial)
+        self.sid = sid
+        self.expires_at = expires_at
+
+class DynamoDBSessionInterface(SessionInterface):
+    """Flask session interface storing session data in a DynamoDB table"""
+
+    salt = 'dynamodb-session'
+
+    def __init__(self, table, lifetime_seconds=28800, cache_seconds=30, cache_max_entries=10000):
+        self.table = table
+        self.lifetime_seconds = lifetime_seconds
+        self.cache_seconds = cache_seconds
+        self.cache_max_entries = cache_max_entries
+        self._cache = OrderedDict()  # key -> (data, expires_at, cached_until)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(sid):
+        # Only a hash of the id is stored, so the table does not hold usable tokens
+        return 'session#' + hashlib.sha256(sid.encode()).hexdigest()
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt=self.salt, key_derivation='hmac')
+
+    # Read cache
+
+    def _cache_get(self, key, now):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= now or entry[1] <= now:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry
+
+    def _cache_set(self, key, data, expires_at, now):
+        with self._lock:
+            self._cache[key] = (data, expires_at, now + self.cache_seconds)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+
+    def _cache_delete(self, key):
+        with self._lock:
+            self._cache.pop(key, None)
+
+    # Storage
+
+    def _load(self, sid):
+        """Return (data, expires_at) for a live session, or (None, 0)"""
+        key = self._key(sid)
+        now = time.time()
+        entry = self._cache_get(key, now)
+        if entry is not None:
+            return entry[0], entry[1]
+        item = self.table.get_item(Key={'id': key}).get('Item')
+        # TTL deletion can lag expiry, so check it here as well
+        if item is None or int(item.get('expires_at', 0)) <= now:
+            return None, 0
+        data = json.loads(item['data'])
+        expires_at = int(item['expires_at'])
+        self._cache_set(key, data, expires_at, now)
+        return data, expires_at
+
+    def _store(self, sid, data):
+        key = self._key(sid)
+        now = time.time()
+        expires_at = int(now) + self.lifetime_seconds
+        self.table.put_item(Item={
+            'id': key,
+            'data': json.dumps(data, separators=(',', ':')),
+            'expires_at': expires_at
+        })
+        self._cache_set(key, data, expires_at, now)
+        return expires_at
+
+    def _delete(self, sid):
+        key = self._key(sid)
+        self._cache_delete(key)
+        self.table.delete_item(Key={'id': key})
+
+    # Flask SessionInterface
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if not cookie or not app.secret_key:
+            return DynamoDBSession()
+        try:
+            sid = self._signer(app).unsign(want_bytes(cookie)).decode()
+        except BadSignature:
+            return DynamoDBSession()
+        try:
+            data, expires_at = self._load(sid)
+        except Exception as e:
+            # Treat an unreachable store as logged out rather than failing every request
+            logger.error(f"Could not load session: {e}")
+            return DynamoDBSession()
+        if data is None:
+            return DynamoDBSession()
+        return DynamoDBSession(data, sid=sid, expires_at=expires_at)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified:
+                if session.sid:
+                    self._delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        refresh_due = session.expires_at - time.time() < self.lifetime_seconds / 2
+        if not session.modified and not refresh_due:
+            return
+
+        sid = session.sid
+        if session.modified:
+            # Issue a new id whenever the contents change (e.g. on login) so a
+            # session id planted before authentication is never promoted
+            if sid:
+                self._delete(sid)
+            sid = secrets.token_urlsafe(32)
+        expires_at = self._store(sid, dict(session))
+
+        expires = None
+        if session.permanent:
+            expires = expires_at
+        response.set_cookie(
+            name,
+            self._signer(app).sign(want_bytes(sid)).decode(),
+            expires=expires,
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
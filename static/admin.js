@@ -4,7 +4,16 @@
  */
 
 const API_BASE_URL = "/api"
+// The change stream only carries this host's writes, so a slow delta sync
+// keeps running underneath it to pick up the other hosts'
+const LIVE_SYNC_MS = 30000
 let allRequests = []
+let nextCursor = null
+let watermark = null
+let searchTimer = null
+let statsTimer = null
+// True while the change stream is connected and keeps the dashboard current
+let liveUpdates = false
 
 // DOM Elements
 const totalRequestsEl = document.getElementById("totalRequests")
@@ -29,14 +38,17 @@ const editForm = document.getElementById("editForm")
 const editMessage = document.getElementById("editMessage")
 const closeBtn = document.querySelector(".close")
 const cancelBtn = document.getElementById("cancelBtn")
+const adminLoadMoreBtn = document.getElementById("adminLoadMoreBtn")
 
 // Event Listeners
 document.addEventListener("DOMContentLoaded", () => {
-  loadAdminData()
-  adminRefreshBtn.addEventListener("click", loadAdminData)
+  loadAdminData().then(connectChangeStream)
+  setInterval(backgroundSync, LIVE_SYNC_MS)
+  adminRefreshBtn.addEventListener("click", refreshAdminData)
   adminSearchInput.addEventListener("input", filterAdminRequests)
-  adminStatusFilter.addEventListener("change", filterAdminRequests)
-  adminPriorityFilter.addEventListener("change", filterAdminRequests)
+  adminStatusFilter.addEventListener("change", loadRequests)
+  adminPriorityFilter.addEventListener("change", loadRequests)
+  adminLoadMoreBtn.addEventListener("click", loadMoreRequests)
   editForm.addEventListener("submit", handleUpdateRequest)
   closeBtn.addEventListener("click", closeModal)
   cancelBtn.addEventListener("click", closeModal)
@@ -57,6 +69,18 @@ async function loadAdminData() {
   }
 }
 
+/**
+ * Refresh statistics and merge request changes since the last sync
+ */
+async function refreshAdminData() {
+  try {
+    await loadStatistics()
+    await syncRequests()
+  } catch (error) {
+    console.error("Error refreshing admin data:", error)
+  }
+}
+
 /**
  * Load statistics from API
  */
@@ -89,23 +113,168 @@ async function loadStatistics() {
 }
 
 /**
- * Load all requests
+ * Fetch one page of requests using the server-side filters
+ */
+async function fetchRequestsPage(cursor) {
+  const params = new URLSearchParams()
+  if (adminStatusFilter.value) params.set("status", adminStatusFilter.value)
+  if (adminPriorityFilter.value) params.set("priority", adminPriorityFilter.value)
+  if (cursor) params.set("cursor", cursor)
+
+  const response = await fetch(`${API_BASE_URL}/requests?${params}`)
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`)
+  }
+
+  const page = await response.json()
+  nextCursor = page.next_cursor
+  adminLoadMoreBtn.style.display = nextCursor ? "" : "none"
+  return page
+}
+
+/**
+ * Load the first page of requests
  */
 async function loadRequests() {
   try {
-    const response = await fetch(`${API_BASE_URL}/requests`)
+    const page = await fetchRequestsPage(null)
+    allRequests = page.items
+    // The server holds this back by its overlap window, like delta watermarks
+    watermark = page.watermark
+    filterAdminRequests()
+  } catch (error) {
+    console.error("Error loading requests:", error)
+  }
+}
 
-    if (!response.ok) {
-      throw new Error(`HTTP error! status: ${response.status}`)
+/**
+ * Append the next page of requests
+ */
+async function loadMoreRequests() {
+  if (!nextCursor) return
+  try {
+    allRequests = allRequests.concat((await fetchRequestsPage(nextCursor)).items)
+    filterAdminRequests()
+  } catch (error) {
+    console.error("Error loading more requests:", error)
+  }
+}
+
+/**
+ * Check whether a request belongs in the current server-side filter
+ */
+function matchesServerFilter(req) {
+  const matchesStatus = !adminStatusFilter.value || req.status === adminStatusFilter.value
+  const matchesPriority = !adminPriorityFilter.value || req.priority === adminPriorityFilter.value
+  return matchesStatus && matchesPriority
+}
+
+/**
+ * Apply a delta (changed items and deleted ids) to the loaded requests
+ */
+function mergeDelta(delta) {
+  const deleted = new Set(delta.deleted)
+  // While more pages remain, only keep changes that fall within the loaded range
+  const oldest = nextCursor && allRequests.length ? allRequests[allRequests.length - 1].created_at : ""
+  allRequests = allRequests.filter((req) => !deleted.has(req.id))
+
+  for (const req of delta.items) {
+    const index = allRequests.findIndex((existing) => existing.id === req.id)
+    // Deltas overlap the previous sync and can trail the stream; keep the newer copy
+    if (index >= 0 && (allRequests[index].version || 0) > (req.version || 0)) continue
+    const visible = matchesServerFilter(req) && req.created_at >= oldest
+    if (index >= 0 && visible) {
+      allRequests[index] = req
+    } else if (index >= 0) {
+      allRequests.splice(index, 1)
+    } else if (visible) {
+      allRequests.push(req)
     }
+  }
 
-    allRequests = await response.json()
-    displayAdminRequests(allRequests)
+  allRequests.sort((a, b) => b.created_at.localeCompare(a.created_at))
+}
+
+/**
+ * Fetch only what changed since the last sync and merge it in
+ */
+async function syncRequests() {
+  if (!watermark) return loadRequests()
+
+  try {
+    let hasMore = true
+    while (hasMore) {
+      const response = await fetch(`${API_BASE_URL}/requests?since=${encodeURIComponent(watermark)}`)
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`)
+      }
+
+      const delta = await response.json()
+      if (delta.full_resync) return loadRequests()
+
+      mergeDelta(delta)
+      watermark = delta.watermark
+      hasMore = delta.has_more
+    }
+    filterAdminRequests()
   } catch (error) {
-    console.error("Error loading requests:", error)
+    console.error("Error syncing requests:", error)
+    loadRequests()
   }
 }
 
+/**
+ * Subscribe to server-sent change events and apply them as they arrive
+ */
+function connectChangeStream() {
+  if (!window.EventSource) return
+
+  const source = new EventSource(`${API_BASE_URL}/requests/stream`)
+  let connectedOnce = false
+  source.addEventListener("open", () => {
+    // Catch up on changes made between the first page load and the stream
+    // opening; reconnects resume from Last-Event-ID on their own
+    if (!connectedOnce) syncRequests()
+    connectedOnce = true
+    liveUpdates = true
+  })
+  source.addEventListener("error", () => {
+    liveUpdates = false
+  })
+  source.addEventListener("created", (e) => applyChangeEvent(JSON.parse(e.data), null))
+  source.addEventListener("updated", (e) => applyChangeEvent(JSON.parse(e.data), null))
+  source.addEventListener("deleted", (e) => applyChangeEvent(null, JSON.parse(e.data).id))
+  source.addEventListener("resync", () => syncRequests())
+}
+
+/**
+ * Periodic delta sync for changes the stream cannot see; skipped while the
+ * page is hidden
+ */
+function backgroundSync() {
+  if (!document.hidden) refreshAdminData()
+}
+
+/**
+ * Merge one streamed change into the loaded requests. The watermark is left
+ * to the delta sync, since other hosts' earlier writes may not be in yet.
+ */
+function applyChangeEvent(req, deletedId) {
+  mergeDelta({ items: req ? [req] : [], deleted: deletedId ? [deletedId] : [] })
+  filterAdminRequests()
+  scheduleStatistics()
+}
+
+/**
+ * Reload the statistics once a burst of changes has settled
+ */
+function scheduleStatistics() {
+  clearTimeout(statsTimer)
+  statsTimer = setTimeout(loadStatistics, 1000)
+}
+
 /**
  * Display requests in admin view
  */
@@ -154,22 +323,49 @@ function displayAdminRequests(requests) {
 }
 
 /**
- * Filter admin requests
+ * Filter requests by search term; searches run server-side against the full table
  */
 function filterAdminRequests() {
-  const searchTerm = adminSearchInput.value.toLowerCase()
-  const statusTerm = adminStatusFilter.value
-  const priorityTerm = adminPriorityFilter.value
-
-  const filtered = allRequests.filter((req) => {
-    const matchesSearch =
-      req.title.toLowerCase().includes(searchTerm) || req.description.toLowerCase().includes(searchTerm)
-    const matchesStatus = !statusTerm || req.status === statusTerm
-    const matchesPriority = !priorityTerm || req.priority === priorityTerm
-    return matchesSearch && matchesStatus && matchesPriority
-  })
+  const searchTerm = adminSearchInput.value.trim()
+  clearTimeout(searchTimer)
+
+  if (!searchTerm) {
+    displayAdminRequests(allRequests)
+    return
+  }
+
+  searchTimer = setTimeout(() => searchRequests(searchTerm), 200)
+}
+
+/**
+ * Query the server-side search index, falling back to the loaded requests
+ */
+async function searchRequests(searchTerm) {
+  const params = new URLSearchParams({ q: searchTerm })
+  if (adminStatusFilter.value) params.set("status", adminStatusFilter.value)
+  if (adminPriorityFilter.value) params.set("priority", adminPriorityFilter.value)
 
-  displayAdminRequests(filtered)
+  try {
+    const response = await fetch(`${API_BASE_URL}/requests/search?${params}`)
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+
+    const results = await response.json()
+    // Ignore responses for a term the user has already changed
+    if (adminSearchInput.value.trim() === searchTerm) {
+      displayAdminRequests(results.items)
+    }
+  } catch (error) {
+    console.error("Search unavailable, filtering loaded requests:", error)
+    const term = searchTerm.toLowerCase()
+    displayAdminRequests(
+      allRequests.filter(
+        (req) => req.title.toLowerCase().includes(term) || req.description.toLowerCase().includes(term),
+      ),
+    )
+  }
 }
 
 /**
@@ -248,7 +444,7 @@ async function handleUpdateRequest(e) {
     showMessage(editMessage, "Request updated successfully!", "success")
     setTimeout(() => {
       closeModal()
-      loadAdminData()
+      if (!liveUpdates) refreshAdminData()
     }, 1000)
   } catch (error) {
     console.error("Error updating request:", error)
@@ -275,7 +471,7 @@ async function deleteRequest(requestId) {
     }
 
     alert("Request deleted successfully!")
-    loadAdminData()
+    if (!liveUpdates) refreshAdminData()
   } catch (error) {
     console.error("Error deleting request:", error)
     alert(error.message)
@@ -4,7 +4,19 @@
  */
 
 const API_BASE_URL = "/api"
+// Creates are retried on timeouts and busy responses under one Idempotency-Key
+const CREATE_TIMEOUT_MS = 10000
+const CREATE_ATTEMPTS = 3
+const RETRYABLE_STATUSES = [409, 429, 502, 503, 504]
+// The change stream only carries this host's writes, so a slow delta sync
+// keeps running underneath it to pick up the other hosts'
+const LIVE_SYNC_MS = 30000
 let allRequests = []
+let nextCursor = null
+let watermark = null
+let searchTimer = null
+// True while the change stream is connected and keeps the list current
+let liveUpdates = false
 
 // DOM Elements
 const createForm = document.getElementById("createForm")
@@ -18,14 +30,17 @@ const editForm = document.getElementById("editForm")
 const editMessage = document.getElementById("editMessage")
 const closeBtn = document.querySelector(".close")
 const cancelBtn = document.getElementById("cancelBtn")
+const loadMoreBtn = document.getElementById("loadMoreBtn")
 
 // Event Listeners
 document.addEventListener("DOMContentLoaded", () => {
-  loadRequests()
+  loadRequests().then(connectChangeStream)
+  setInterval(backgroundSync, LIVE_SYNC_MS)
   createForm.addEventListener("submit", handleCreateRequest)
-  refreshBtn.addEventListener("click", loadRequests)
+  refreshBtn.addEventListener("click", syncRequests)
   searchInput.addEventListener("input", filterRequests)
-  statusFilter.addEventListener("change", filterRequests)
+  statusFilter.addEventListener("change", loadRequests)
+  loadMoreBtn.addEventListener("click", loadMoreRequests)
   editForm.addEventListener("submit", handleUpdateRequest)
   closeBtn.addEventListener("click", closeModal)
   cancelBtn.addEventListener("click", closeModal)
@@ -35,22 +50,198 @@ document.addEventListener("DOMContentLoaded", () => {
 })
 
 /**
- * Load all maintenance requests from API
+ * Fetch one page of maintenance requests from API
+ */
+async function fetchRequestsPage(cursor) {
+  const params = new URLSearchParams()
+  if (statusFilter.value) params.set("status", statusFilter.value)
+  if (cursor) params.set("cursor", cursor)
+
+  const response = await fetch(`${API_BASE_URL}/requests?${params}`)
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`)
+  }
+
+  const page = await response.json()
+  nextCursor = page.next_cursor
+  loadMoreBtn.style.display = nextCursor ? "" : "none"
+  return page
+}
+
+/**
+ * Load the first page of maintenance requests from API
  */
 async function loadRequests() {
   try {
     showLoading()
-    const response = await fetch(`${API_BASE_URL}/requests`)
+    const page = await fetchRequestsPage(null)
+    allRequests = page.items
+    // The server holds this back by its overlap window, like delta watermarks
+    watermark = page.watermark
+    filterRequests()
+  } catch (error) {
+    console.error("Error loading requests:", error)
+    showError("Failed to load requests. Please try again.")
+  }
+}
 
-    if (!response.ok) {
-      throw new Error(`HTTP error! status: ${response.status}`)
+/**
+ * Append the next page of maintenance requests
+ */
+async function loadMoreRequests() {
+  if (!nextCursor) return
+  try {
+    allRequests = allRequests.concat((await fetchRequestsPage(nextCursor)).items)
+    filterRequests()
+  } catch (error) {
+    console.error("Error loading more requests:", error)
+    showError("Failed to load more requests. Please try again.")
+  }
+}
+
+/**
+ * Check whether a request belongs in the current server-side filter
+ */
+function matchesServerFilter(req) {
+  return !statusFilter.value || req.status === statusFilter.value
+}
+
+/**
+ * Apply a delta (changed items and deleted ids) to the loaded requests
+ */
+function mergeDelta(delta) {
+  const deleted = new Set(delta.deleted)
+  // While more pages remain, only keep changes that fall within the loaded range
+  const oldest = nextCursor && allRequests.length ? allRequests[allRequests.length - 1].created_at : ""
+  allRequests = allRequests.filter((req) => !deleted.has(req.id))
+
+  for (const req of delta.items) {
+    const index = allRequests.findIndex((existing) => existing.id === req.id)
+    // Deltas overlap the previous sync and can trail the stream; keep the newer copy
+    if (index >= 0 && (allRequests[index].version || 0) > (req.version || 0)) continue
+    const visible = matchesServerFilter(req) && req.created_at >= oldest
+    if (index >= 0 && visible) {
+      allRequests[index] = req
+    } else if (index >= 0) {
+      allRequests.splice(index, 1)
+    } else if (visible) {
+      allRequests.push(req)
     }
+  }
 
-    allRequests = await response.json()
-    displayRequests(allRequests)
+  allRequests.sort((a, b) => b.created_at.localeCompare(a.created_at))
+}
+
+/**
+ * Fetch only what changed since the last sync and merge it in
+ */
+async function syncRequests() {
+  if (!watermark) return loadRequests()
+
+  try {
+    let hasMore = true
+    while (hasMore) {
+      const response = await fetch(`${API_BASE_URL}/requests?since=${encodeURIComponent(watermark)}`)
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`)
+      }
+
+      const delta = await response.json()
+      if (delta.full_resync) return loadRequests()
+
+      mergeDelta(delta)
+      watermark = delta.watermark
+      hasMore = delta.has_more
+    }
+    filterRequests()
   } catch (error) {
-    console.error("Error loading requests:", error)
-    showError("Failed to load requests. Please try again.")
+    console.error("Error syncing requests:", error)
+    loadRequests()
+  }
+}
+
+/**
+ * Subscribe to server-sent change events and apply them as they arrive
+ */
+function connectChangeStream() {
+  if (!window.EventSource) return
+
+  const source = new EventSource(`${API_BASE_URL}/requests/stream`)
+  let connectedOnce = false
+  source.addEventListener("open", () => {
+    // Catch up on changes made between the first page load and the stream
+    // opening; reconnects resume from Last-Event-ID on their own
+    if (!connectedOnce) syncRequests()
+    connectedOnce = true
+    liveUpdates = true
+  })
+  source.addEventListener("error", () => {
+    liveUpdates = false
+  })
+  source.addEventListener("created", (e) => applyChangeEvent(JSON.parse(e.data), null))
+  source.addEventListener("updated", (e) => applyChangeEvent(JSON.parse(e.data), null))
+  source.addEventListener("deleted", (e) => applyChangeEvent(null, JSON.parse(e.data).id))
+  source.addEventListener("resync", () => syncRequests())
+}
+
+/**
+ * Periodic delta sync for changes the stream cannot see; skipped while the
+ * page is hidden
+ */
+function backgroundSync() {
+  if (!document.hidden) syncRequests()
+}
+
+/**
+ * Merge one streamed change into the loaded requests. The watermark is left
+ * to the delta sync, since other hosts' earlier writes may not be in yet.
+ */
+function applyChangeEvent(req, deletedId) {
+  mergeDelta({ items: req ? [req] : [], deleted: deletedId ? [deletedId] : [] })
+  filterRequests()
+}
+
+/**
+ * Random key identifying one create, so that its retries are stored once
+ */
+function newIdempotencyKey() {
+  if (window.crypto && crypto.randomUUID) return crypto.randomUUID()
+  // randomUUID needs a secure context; plain HTTP deployments fall back here
+  return Array.from(crypto.getRandomValues(new Uint8Array(16)), (b) => b.toString(16).padStart(2, "0")).join("")
+}
+
+/**
+ * POST with a per-attempt timeout, retrying timeouts, network errors and
+ * busy responses. Every attempt carries the same Idempotency-Key, so the
+ * server replays the first result instead of creating a duplicate.
+ */
+async function postWithRetry(url, payload) {
+  const idempotencyKey = newIdempotencyKey()
+  for (let attempt = 1; ; attempt++) {
+    const controller = new AbortController()
+    const timer = setTimeout(() => controller.abort(), CREATE_TIMEOUT_MS)
+    let delay = 500 * 2 ** (attempt - 1)
+    try {
+      const response = await fetch(url, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          "Idempotency-Key": idempotencyKey,
+        },
+        body: JSON.stringify(payload),
+        signal: controller.signal,
+      })
+      if (!RETRYABLE_STATUSES.includes(response.status) || attempt >= CREATE_ATTEMPTS) return response
+      const retryAfter = Number(response.headers.get("Retry-After"))
+      if (retryAfter > 0) delay = retryAfter * 1000
+    } catch (error) {
+      if (attempt >= CREATE_ATTEMPTS) throw error
+    } finally {
+      clearTimeout(timer)
+    }
+    await new Promise((resolve) => setTimeout(resolve, delay))
   }
 }
 
@@ -118,17 +309,11 @@ async function handleCreateRequest(e) {
   }
 
   try {
-    const response = await fetch(`${API_BASE_URL}/requests`, {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({
-        title,
-        description,
-        priority,
-        created_by: createdBy,
-      }),
+    const response = await postWithRetry(`${API_BASE_URL}/requests`, {
+      title,
+      description,
+      priority,
+      created_by: createdBy,
     })
 
     if (!response.ok) {
@@ -138,7 +323,7 @@ async function handleCreateRequest(e) {
 
     showMessage(createMessage, "Request created successfully!", "success")
     createForm.reset()
-    loadRequests()
+    if (!liveUpdates) syncRequests()
   } catch (error) {
     console.error("Error creating request:", error)
     showMessage(createMessage, error.message, "error")
@@ -221,7 +406,7 @@ async function handleUpdateRequest(e) {
     showMessage(editMessage, "Request updated successfully!", "success")
     setTimeout(() => {
       closeModal()
-      loadRequests()
+      if (!liveUpdates) syncRequests()
     }, 1000)
   } catch (error) {
     console.error("Error updating request:", error)
@@ -248,7 +433,7 @@ async function deleteRequest(requestId) {
     }
 
     showMessage(createMessage, "Request deleted successfully!", "success")
-    loadRequests()
+    if (!liveUpdates) syncRequests()
   } catch (error) {
     console.error("Error deleting request:", error)
     showMessage(createMessage, error.message, "error")
@@ -256,20 +441,48 @@ async function deleteRequest(requestId) {
 }
 
 /**
- * Filter requests based on search and status
+ * Filter requests by search term; searches run server-side against the full table
  */
 function filterRequests() {
-  const searchTerm = searchInput.value.toLowerCase()
-  const statusTerm = statusFilter.value
-
-  const filtered = allRequests.filter((req) => {
-    const matchesSearch =
-      req.title.toLowerCase().includes(searchTerm) || req.description.toLowerCase().includes(searchTerm)
-    const matchesStatus = !statusTerm || req.status === statusTerm
-    return matchesSearch && matchesStatus
-  })
+  const searchTerm = searchInput.value.trim()
+  clearTimeout(searchTimer)
+
+  if (!searchTerm) {
+    displayRequests(allRequests)
+    return
+  }
+
+  searchTimer = setTimeout(() => searchRequests(searchTerm), 200)
+}
 
-  displayRequests(filtered)
+/**
+ * Query the server-side search index, falling back to the loaded requests
+ */
+async function searchRequests(searchTerm) {
+  const params = new URLSearchParams({ q: searchTerm })
+  if (statusFilter.value) params.set("status", statusFilter.value)
+
+  try {
+    const response = await fetch(`${API_BASE_URL}/requests/search?${params}`)
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+
+    const results = await response.json()
+    // Ignore responses for a term the user has already changed
+    if (searchInput.value.trim() === searchTerm) {
+      displayRequests(results.items)
+    }
+  } catch (error) {
+    console.error("Search unavailable, filtering loaded requests:", error)
+    const term = searchTerm.toLowerCase()
+    displayRequests(
+      allRequests.filter(
+        (req) => req.title.toLowerCase().includes(term) || req.description.toLowerCase().includes(term),
+      ),
+    )
+  }
 }
 
 /**
@@ -0,0 +1,1103 @@
+"""
+Storage backends for maintenance requests
+
+The routes in app.py talk to a RequestStore rather than to DynamoDB
+directly. DynamoDBRequestStore is the production backend; SQLiteRequestStore
+keeps the same semantics (versions, stats counters, tombstones, cursors) in
+a local SQLite database so the request path can be run, profiled and
+benchmarked without an AWS table (see scripts/benchmark.py).
+
+Select the backend with STORAGE_BACKEND=dynamodb|sqlite.
+"""
+
+import json
+import time
+import bisect
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from decimal import Decimal
+from botocore.exceptions import ClientError
+from scan_engine import ParallelScanner
+
+logger = logging.getLogger(__name__)
+
+RECORD_TYPE = 'request'
+TOMBSTONE_RECORD_TYPE = 'tombstone'
+
+# Secondary indexes used for listing (see scripts/create_indexes.py).
+# Every request item carries RECORD_TYPE so the unfiltered list can be
+# served by a Query ordered on created_at instead of a full-table scan.
+INDEX_ALL = 'record_type-created_at-index'
+INDEX_STATUS = 'status-created_at-index'
+INDEX_PRIORITY = 'priority-created_at-index'
+INDEX_CHANGES = 'record_type-updated_at-index'
+
+# Aggregate counters for /api/admin/stats, kept in a single item of the
+# requests table and adjusted atomically alongside every write.
+STATS_ITEM_ID = '__stats__'
+STATUS_COUNTERS = {
+    'Pending': 'pending',
+    'In Progress': 'in_progress',
+    'Resolved': 'resolved',
+    'Closed': 'closed'
+}
+PRIORITY_COUNTERS = {
+    'Critical': 'critical',
+    'High': 'high',
+    'Medium': 'medium',
+    'Low': 'low'
+}
+STATS_FIELDS = ['total'] + list(STATUS_COUNTERS.values()) + list(PRIORITY_COUNTERS.values())
+
+# Daily rollups for /api/admin/analytics, one item per UTC day, adjusted
+# alongside every write like the stats item. They count the requests that
+# exist (hot or archived) in their current state. Per priority, a day holds:
+#   created_<p>    requests created that day
+#   resolved_<p>   closed requests whose resolution fell on that day
+#   ttr_sum_<p>    their summed time-to-resolve in seconds
+#   ttr_<p>_<i>    their time-to-resolve histogram (TTR_BUCKET_HOURS)
+#   open_<p>       requests created that day that are still open (backlog age)
+ROLLUP_ITEM_PREFIX = '__rollup__#'
+OPEN_STATUSES = ('Pending', 'In Progress')
+CLOSED_STATUSES = ('Resolved', 'Closed')
+# Upper bounds of the time-to-resolve buckets; the last bucket is open-ended
+TTR_BUCKET_HOURS = (1, 4, 8, 24, 72, 168, 336, 720)
+
+# Actions accepted by one TransactWriteItems call
+TRANSACT_MAX_ITEMS = 100
+# Attempts at a read-then-transact write that loses a race with another writer
+TRANSACT_ATTEMPTS = 3
+
+class RequestNotFound(Exception):
+    """The request does not exist"""
+
+class RequestExists(Exception):
+    """A request with the same id is already stored"""
+
+class VersionConflict(Exception):
+    """The request exists but its version does not match If-Match"""
+
+class TransitionConflict(Exception):
+    """Another writer changed a request in a bulk transition group"""
+
+def utc_timestamp():
+    return datetime.utcnow().isoformat() + 'Z'
+
+def counter_deltas(old_item=None, new_item=None):
+    """Return the counter increments for moving a request from old_item to new_item"""
+    deltas = {}
+    for item, step in ((old_item, -1), (new_item, 1)):
+        if not item:
+            continue
+        deltas['total'] = deltas.get('total', 0) + step
+        for value, counters in ((item.get('status'), STATUS_COUNTERS),
+                                (item.get('priority'), PRIORITY_COUNTERS)):
+            if value in counters:
+                counter = counters[value]
+                deltas[counter] = deltas.get(counter, 0) + step
+    return {name: delta for name, delta in deltas.items() if delta}
+
+def sum_deltas(delta_dicts):
+    totals = {}
+    for deltas in delta_dicts:
+        for name, delta in deltas.items():
+            totals[name] = totals.get(name, 0) + delta
+    return {name: delta for name, delta in totals.items() if delta}
+
+def parse_timestamp(value):
+    """Parse a utc_timestamp() string (ISO 8601 with a trailing Z)"""
+    return datetime.fromisoformat(value.rstrip('Z'))
+
+def rollup_day_range(first_day, last_day):
+    """Every YYYY-MM-DD day from first_day to last_day inclusive"""
+    day = datetime.strptime(first_day, '%Y-%m-%d')
+    last = datetime.strptime(last_day, '%Y-%m-%d')
+    days = []
+    while day <= last:
+        days.append(day.strftime('%Y-%m-%d'))
+        day += timedelta(days=1)
+    return days
+
+def ttr_bucket(seconds):
+    return bisect.bisect_right(TTR_BUCKET_HOURS, seconds / 3600)
+
+def item_rollups(item):
+    """
+    The rollup counters one request contributes in its current state, as
+    {day: {name: value}}; the same rules analytics.build_rollups applies
+    """
+    if not item or item.get('priority') not in PRIORITY_COUNTERS or not item.get('created_at'):
+        return {}
+    priority = PRIORITY_COUNTERS[item['priority']]
+    created_day = item['created_at'][:10]
+    rollups = {created_day: {f'created_{priority}': 1}}
+    if item.get('status') in OPEN_STATUSES:
+        # The backlog counts open requests under the day they were created
+        rollups[created_day][f'open_{priority}'] = 1
+    elif item.get('status') in CLOSED_STATUSES:
+        # Requests resolved before resolved_at was recorded fall back to updated_at
+        resolved_at = item.get('resolved_at') or item.get('updated_at') or item['created_at']
+        seconds = max(0, int((parse_timestamp(resolved_at[:19]) -
+                              parse_timestamp(item['created_at'][:19])).total_seconds()))
+        counters = rollups.setdefault(resolved_at[:10], {})
+        counters[f'resolved_{priority}'] = 1
+        counters[f'ttr_sum_{priority}'] = seconds
+        counters[f'ttr_{priority}_{ttr_bucket(seconds)}'] = 1
+    return rollups
+
+def rollup_deltas(old_item=None, new_item=None):
+    """
+    Return the rollup increments, as {day: {name: delta}}, for moving a
+    request from old_item to new_item: what new_item contributes less what
+    old_item did, so reopening or deleting a request takes back its counts
+    """
+    taken_back = {day: {name: -value for name, value in counters.items()}
+                  for day, counters in item_rollups(old_item).items()}
+    return sum_rollups([taken_back, item_rollups(new_item)])
+
+def sum_rollups(rollup_dicts):
+    totals = {}
+    for rollups in rollup_dicts:
+        for day, deltas in rollups.items():
+            totals[day] = sum_deltas([totals.get(day, {}), deltas])
+    return {day: deltas for day, deltas in totals.items() if deltas}
+
+def resolution_change(old_item, fields):
+    """
+    'resolve' if updating old_item with fields moves it from an open to a
+    closed status, 'reopen' for the reverse, otherwise None
+    """
+    old_status = old_item.get('status')
+    new_status = fields.get('status', old_status)
+    if old_status in OPEN_STATUSES and new_status in CLOSED_STATUSES:
+        return 'resolve'
+    if old_status in CLOSED_STATUSES and new_status in OPEN_STATUSES:
+        return 'reopen'
+    return None
+
+def transitioned_item(old_item, fields, timestamp):
+    """The new image of old_item after an update of fields at timestamp"""
+    new_item = dict(old_item, **fields)
+    new_item['updated_at'] = timestamp
+    new_item['version'] = int(old_item.get('version', 0)) + 1
+    # resolved_at records the transition itself; later edits of a closed
+    # request move updated_at but not resolved_at
+    change = resolution_change(old_item, fields)
+    if change == 'resolve':
+        new_item['resolved_at'] = timestamp
+    elif change == 'reopen':
+        new_item.pop('resolved_at', None)
+    return new_item
+
+def tombstone_id(request_id):
+    return f'__tombstone__#{request_id}'
+
+def tombstone_item(request_id, timestamp, retention_days):
+    """Marker for a deleted request, visible to ?since= delta queries"""
+    return {
+        'id': tombstone_id(request_id),
+        'record_type': TOMBSTONE_RECORD_TYPE,
+        'request_id': request_id,
+        'updated_at': timestamp,
+        'expires_at': int(time.time()) + retention_days * 86400
+    }
+
+def chunked(values, size):
+    """Yield successive slices of values with at most size elements"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+class RequestStore(ABC):
+    """
+    Interface implemented by every storage backend.
+
+    Items are plain dicts. Write methods keep the stats counters and the
+    change feed (updated_at order plus tombstones) consistent with the data.
+    """
+
+    name = 'abstract'
+
+    @abstractmethod
+    def list_page(self, limit, start_key=None, status=None, priority=None):
+        """One page of requests, newest first. Returns (items, last_key or None)."""
+
+    @abstractmethod
+    def get(self, request_id):
+        """The request with request_id, or None"""
+
+    @abstractmethod
+    def batch_get(self, request_ids):
+        """Dict of id -> item for the ids that exist"""
+
+    @abstractmethod
+    def lookup(self, request_id):
+        """(item or None, whether a tombstone records request_id as deleted)"""
+
+    @abstractmethod
+    def create(self, item):
+        """Store a new request and count it; raises RequestExists for a duplicate id"""
+
+    @abstractmethod
+    def create_many(self, items):
+        """Store many new requests and count them"""
+
+    @abstractmethod
+    def create_missing(self, items):
+        """
+        Store and count the items whose id does not exist yet, tombstones
+        included, and return them. Replaying the same items is a no-op.
+        """
+
+    @abstractmethod
+    def update(self, request_id, fields, expected_version=None):
+        """
+        Apply fields to a request, bumping updated_at and version. Returns
+        (old_item, new_item); raises RequestNotFound or VersionConflict.
+        """
+
+    @abstractmethod
+    def delete(self, request_id, expected_version=None, archived=False):
+        """
+        Delete a request and leave a tombstone. Returns the old item; raises
+        RequestNotFound or VersionConflict. An archived request keeps its
+        place in the rollups, since it still exists in the archive.
+        """
+
+    @abstractmethod
+    def bulk_transition(self, old_items, fields):
+        """
+        Apply fields to every item at once, guarded on each item's previous
+        status and priority. Returns the new items; raises TransitionConflict.
+        """
+
+    @abstractmethod
+    def changes(self, record_type, since, limit):
+        """Up to limit items of record_type with updated_at after since, oldest first"""
+
+    @abstractmethod
+    def iter_pages(self, fields, created_from=None, created_to=None, page_size=500):
+        """Yield pages of requests projected to fields, optionally bounded on created_at"""
+
+    @abstractmethod
+    def iter_closed(self, statuses, closed_before, page_size=500):
+        """
+        Yield pages of whole requests in statuses that were closed before
+        closed_before: resolved_at, or updated_at for requests closed before
+        resolved_at was recorded
+        """
+
+    @abstractmethod
+    def get_stats(self):
+        """The stats counters, or None if they have never been built"""
+
+    @abstractmethod
+    def recount_stats(self):
+        """Rebuild the stats counters from the stored requests"""
+
+    @abstractmethod
+    def get_rollups(self, first_day, last_day):
+        """The daily rollups from first_day to last_day as {day: {name: value}}"""
+
+    @abstractmethod
+    def replace_rollups(self, rollups, first_day, last_day):
+        """Overwrite the rollups of every day from first_day to last_day"""
+
+    @abstractmethod
+    def ping(self):
+        """Raise if the backend is unreachable"""
+
+    def reset(self):
+        """Drop connections inherited across fork"""
+
+class DynamoDBRequestStore(RequestStore):
+    """Requests in the maintenance_requests DynamoDB table"""
+
+    name = 'DynamoDB'
+
+    def __init__(self, dynamodb, table, table_name, tombstone_retention_days=7,
+                 recount_segments=8):
+        self.dynamodb = dynamodb
+        self.table = table
+        self.table_name = table_name
+        self.tombstone_retention_days = tombstone_retention_days
+        self.recount_segments = recount_segments
+
+    # Listing and reads
+
+    def list_page(self, limit, start_key=None, status=None, priority=None):
+        query_kwargs = {
+            'ScanIndexForward': False,
+            'Limit': limit,
+            'ExpressionAttributeNames': {},
+            'ExpressionAttributeValues': {},
+        }
+        if status:
+            query_kwargs['IndexName'] = INDEX_STATUS
+            query_kwargs['KeyConditionExpression'] = '#status = :status'
+            query_kwargs['ExpressionAttributeNames']['#status'] = 'status'
+            query_kwargs['ExpressionAttributeValues'][':status'] = status
+            if priority:
+                query_kwargs['FilterExpression'] = '#priority = :priority'
+                query_kwargs['ExpressionAttributeNames']['#priority'] = 'priority'
+                query_kwargs['ExpressionAttributeValues'][':priority'] = priority
+        elif priority:
+            query_kwargs['IndexName'] = INDEX_PRIORITY
+            query_kwargs['KeyConditionExpression'] = '#priority = :priority'
+            query_kwargs['ExpressionAttributeNames']['#priority'] = 'priority'
+            query_kwargs['ExpressionAttributeValues'][':priority'] = priority
+        else:
+            query_kwargs['IndexName'] = INDEX_ALL
+            query_kwargs['KeyConditionExpression'] = '#record_type = :record_type'
+            query_kwargs['ExpressionAttributeNames']['#record_type'] = 'record_type'
+            query_kwargs['ExpressionAttributeValues'][':record_type'] = RECORD_TYPE
+        if start_key:
+            query_kwargs['ExclusiveStartKey'] = start_key
+
+        # A FilterExpression is applied after Limit, so keep reading until the
+        # page is full or the index is exhausted.
+        items = []
+        while True:
+            response = self.table.query(**query_kwargs)
+            items.extend(response.get('Items', []))
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key or len(items) >= limit:
+                break
+            query_kwargs['ExclusiveStartKey'] = last_key
+            query_kwargs['Limit'] = limit - len(items)
+        return items, last_key
+
+    def get(self, request_id):
+        return self.table.get_item(Key={'id': request_id}).get('Item')
+
+    def batch_get(self, request_ids):
+        """BatchGetItem in groups of 100, retrying unprocessed keys"""
+        items = {}
+        for chunk in chunked(request_ids, 100):
+            request_items = {self.table_name: {'Keys': [{'id': rid} for rid in chunk], 'ConsistentRead': True}}
+            while request_items:
+                response = self.dynamodb.batch_get_item(RequestItems=request_items)
+                for item in response.get('Responses', {}).get(self.table_name, []):
+                    items[item['id']] = item
+                request_items = response.get('UnprocessedKeys') or None
+        return items
+
+    def lookup(self, request_id):
+        found = self.batch_get([request_id, tombstone_id(request_id)])
+        return found.get(request_id), tombstone_id(request_id) in found
+
+    # Stats counters
+
+    def _stats_update_action(self, deltas, item_id=STATS_ITEM_ID):
+        """Build a TransactWriteItems Update that applies deltas to the stats (or a rollup) item"""
+        names = {}
+        values = {}
+        clauses = []
+        for i, (name, delta) in enumerate(sorted(deltas.items())):
+            names[f'#c{i}'] = name
+            values[f':d{i}'] = delta
+            clauses.append(f'#c{i} :d{i}')
+        return {
+            'Update': {
+                'TableName': self.table_name,
+                'Key': {'id': item_id},
+                'UpdateExpression': 'ADD ' + ', '.join(clauses),
+                'ExpressionAttributeNames': names,
+                'ExpressionAttributeValues': values
+            }
+        }
+
+    def _rollup_update_actions(self, rollups):
+        return [self._stats_update_action(deltas, ROLLUP_ITEM_PREFIX + day)
+                for day, deltas in sorted(rollups.items())]
+
+    def _transact_with_stats(self, action, deltas, rollups=None):
+        """Run a single item write and its stats and rollup adjustments in one transaction"""
+        actions = [action]
+        if deltas:
+            actions.append(self._stats_update_action(deltas))
+        actions.extend(self._rollup_update_actions(rollups or {}))
+        self.table.meta.client.transact_write_items(TransactItems=actions)
+
+    def _apply_stats_deltas(self, deltas):
+        """
+        Apply counter deltas with a single atomic ADD, for batch writes that
+        cannot share a transaction with their counters
+        """
+        if deltas:
+            action = self._stats_update_action(deltas)['Update']
+            action.pop('TableName')
+            self.table.update_item(**action)
+
+    def _apply_rollup_deltas(self, rollups):
+        """Apply rollup deltas with one atomic ADD per day, like _apply_stats_deltas"""
+        for action in self._rollup_update_actions(rollups):
+            action = action['Update']
+            action.pop('TableName')
+            self.table.update_item(**action)
+
+    def _apply_deltas_after(self, deltas, rollups):
+        """
+        Best-effort counter adjustments for writes that already committed:
+        a failure is logged rather than raised, and a recount (or analytics
+        rebuild) repairs the drift
+        """
+        try:
+            self._apply_stats_deltas(deltas)
+            self._apply_rollup_deltas(rollups)
+        except ClientError as e:
+            logger.error(f"Could not adjust stats/rollups after a committed write, "
+                         f"run a recount and an analytics rebuild: {e}")
+
+    def get_stats(self):
+        item = self.table.get_item(Key={'id': STATS_ITEM_ID}, ConsistentRead=True).get('Item')
+        if item is None:
+            return None
+        return {name: int(item.get(name, 0)) for name in STATS_FIELDS}
+
+    def recount_stats(self):
+        """Rebuild the stats item from a parallel scan of the table"""
+        counts = dict.fromkeys(STATS_FIELDS, 0)
+        scanner = ParallelScanner(self.table, self.recount_segments)
+        for item in scanner.iter_items(
+                projection=['status', 'priority'],
+                filter_expression='#record_type = :record_type',
+                expression_names={'#record_type': 'record_type'},
+                expression_values={':record_type': RECORD_TYPE}):
+            for name, delta in counter_deltas(new_item=item).items():
+                counts[name] += delta
+        self.table.put_item(Item={'id': STATS_ITEM_ID, **counts})
+        return counts
+
+    # Analytics rollups
+
+    def get_rollups(self, first_day, last_day):
+        items = self.batch_get([ROLLUP_ITEM_PREFIX + day for day in rollup_day_range(first_day, last_day)])
+        return {item_id[len(ROLLUP_ITEM_PREFIX):]: {name: int(value) for name, value in item.items() if name != 'id'}
+                for item_id, item in items.items()}
+
+    def replace_rollups(self, rollups, first_day, last_day):
+        with self.table.batch_writer() as batch:
+            for day in rollup_day_range(first_day, last_day):
+                if rollups.get(day):
+                    batch.put_item(Item={'id': ROLLUP_ITEM_PREFIX + day, **rollups[day]})
+                else:
+                    batch.delete_item(Key={'id': ROLLUP_ITEM_PREFIX + day})
+
+    # Writes
+
+    def create(self, item):
+        # Put the item and count it in the same transaction
+        try:
+            self._transact_with_stats({
+                'Put': {
+                    'TableName': self.table_name,
+                    'Item': item,
+                    'ConditionExpression': 'attribute_not_exists(id)'
+                }
+            }, counter_deltas(new_item=item), rollup_deltas(new_item=item))
+        except ClientError as e:
+            reasons = e.response.get('CancellationReasons') or [{}]
+            if e.response['Error']['Code'] == 'TransactionCanceledException' and \
+                    reasons[0].get('Code') == 'ConditionalCheckFailed':
+                raise RequestExists(item['id']) from e
+            raise
+
+    def create_many(self, items):
+        # batch_writer groups puts into 25-item BatchWriteItem calls and
+        # resubmits any UnprocessedItems
+        with self.table.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+        self._apply_deltas_after(sum_deltas(counter_deltas(new_item=item) for item in items),
+                                 sum_rollups(rollup_deltas(new_item=item) for item in items))
+
+    def create_missing(self, items):
+        # Tombstones are read too, so a replay never resurrects a deleted
+        # request or overwrites a later update
+        ids = [item['id'] for item in items]
+        existing = self.batch_get(ids + [tombstone_id(request_id) for request_id in ids])
+        missing = [item for item in items
+                   if item['id'] not in existing and tombstone_id(item['id']) not in existing]
+        if missing:
+            self.create_many(missing)
+        return missing
+
+    @staticmethod
+    def _update_expression(old_item, fields, timestamp):
+        """
+        Build a SET expression for fields plus updated_at and the version bump,
+        and the resolved_at change of old_item's transition.
+        Returns (update_expression, names, values).
+        """
+        update_expressions = []
+        expression_names = {}
+        expression_values = {}
+        change = resolution_change(old_item, fields)
+        set_fields = dict(fields, updated_at=timestamp)
+        if change == 'resolve':
+            set_fields['resolved_at'] = timestamp
+        for name, value in set_fields.items():
+            update_expressions.append(f'#{name} = :{name}')
+            expression_names[f'#{name}'] = name
+            expression_values[f':{name}'] = value
+
+        # Bump the version used for optimistic concurrency
+        update_expressions.append('#version = if_not_exists(#version, :zero) + :one')
+        expression_names['#version'] = 'version'
+        expression_values[':zero'] = 0
+        expression_values[':one'] = 1
+
+        update_expression = "SET " + ", ".join(update_expressions)
+        if change == 'reopen':
+            expression_names['#resolved_at'] = 'resolved_at'
+            update_expression += " REMOVE #resolved_at"
+        return update_expression, expression_names, expression_values
+
+    @staticmethod
+    def _is_item_condition_failure(error):
+        """True if a transaction was cancelled by the condition on its first action"""
+        reasons = error.response.get('CancellationReasons') or [{}]
+        return error.response['Error']['Code'] == 'TransactionCanceledException' and \
+            reasons[0].get('Code') == 'ConditionalCheckFailed'
+
+    @staticmethod
+    def _version_condition(old_item, names, values):
+        """Condition that the item is still the version old_item was read at"""
+        names['#version'] = 'version'
+        if 'version' not in old_item:
+            return 'attribute_exists(id) AND attribute_not_exists(#version)'
+        values[':old_version'] = old_item['version']
+        return 'attribute_exists(id) AND #version = :old_version'
+
+    def _transact_versioned(self, request_id, expected_version, build_actions):
+        """
+        Read request_id, then commit build_actions(old_item) in one transaction
+        guarded by the version that was read; the item write comes first, so
+        its counters and rollups commit with it or not at all. Every write
+        bumps the version, so a cancelled condition means another writer got
+        in between: re-read, and retry unless the request is gone or no
+        longer at expected_version. Returns the old item.
+        """
+        for attempt in range(TRANSACT_ATTEMPTS):
+            old_item = self.table.get_item(Key={'id': request_id}, ConsistentRead=True).get('Item')
+            if old_item is None:
+                raise RequestNotFound(request_id)
+            if expected_version is not None and int(old_item.get('version', 0)) != expected_version:
+                raise VersionConflict(request_id)
+            try:
+                self.table.meta.client.transact_write_items(TransactItems=build_actions(old_item))
+                return old_item
+            except ClientError as e:
+                if not self._is_item_condition_failure(e) or attempt == TRANSACT_ATTEMPTS - 1:
+                    raise
+
+    def update(self, request_id, fields, expected_version=None):
+        timestamp = utc_timestamp()
+
+        def build_actions(old_item):
+            update_expression, names, values = self._update_expression(old_item, fields, timestamp)
+            condition = self._version_condition(old_item, names, values)
+            new_item = transitioned_item(old_item, fields, timestamp)
+            actions = [{
+                'Update': {
+                    'TableName': self.table_name,
+                    'Key': {'id': request_id},
+                    'UpdateExpression': update_expression,
+                    'ConditionExpression': condition,
+                    'ExpressionAttributeNames': names,
+                    'ExpressionAttributeValues': values
+                }
+            }]
+            deltas = counter_deltas(old_item, new_item)
+            if deltas:
+                actions.append(self._stats_update_action(deltas))
+            actions.extend(self._rollup_update_actions(rollup_deltas(old_item, new_item)))
+            return actions
+
+        old_item = self._transact_versioned(request_id, expected_version, build_actions)
+        return old_item, transitioned_item(old_item, fields, timestamp)
+
+    def delete(self, request_id, expected_version=None, archived=False):
+        def build_actions(old_item):
+            names = {}
+            values = {}
+            condition = self._version_condition(old_item, names, values)
+            delete_action = {
+                'TableName': self.table_name,
+                'Key': {'id': request_id},
+                'ConditionExpression': condition,
+                'ExpressionAttributeNames': names
+            }
+            if values:
+                delete_action['ExpressionAttributeValues'] = values
+            # Record the deletion for delta clients in the same transaction
+            actions = [
+                {'Delete': delete_action},
+                {'Put': {'TableName': self.table_name,
+                         'Item': tombstone_item(request_id, utc_timestamp(), self.tombstone_retention_days)}}
+            ]
+            deltas = counter_deltas(old_item=old_item)
+            if deltas:
+                actions.append(self._stats_update_action(deltas))
+            if not archived:
+                actions.extend(self._rollup_update_actions(rollup_deltas(old_item=old_item)))
+            return actions
+
+        return self._transact_versioned(request_id, expected_version, build_actions)
+
+    def bulk_transition(self, old_items, fields):
+        """
+        One TransactWriteItems call: the guarded updates plus the summed stats
+        adjustment, and the rollups when they fit
+        """
+        timestamp = utc_timestamp()
+        actions = []
+        new_items = []
+        for old_item in old_items:
+            update_expression, names, item_values = self._update_expression(old_item, fields, timestamp)
+            item_values[':old_status'] = old_item.get('status')
+            item_values[':old_priority'] = old_item.get('priority')
+            actions.append({
+                'Update': {
+                    'TableName': self.table_name,
+                    'Key': {'id': old_item['id']},
+                    'UpdateExpression': update_expression,
+                    'ConditionExpression': 'attribute_exists(id) AND #status = :old_status AND #priority = :old_priority',
+                    'ExpressionAttributeNames': dict(names, **{'#status': 'status', '#priority': 'priority'}),
+                    'ExpressionAttributeValues': item_values
+                }
+            })
+            new_items.append(transitioned_item(old_item, fields, timestamp))
+        deltas = sum_deltas(counter_deltas(old, new) for old, new in zip(old_items, new_items))
+        if deltas:
+            actions.append(self._stats_update_action(deltas))
+        rollups = sum_rollups(rollup_deltas(old, new) for old, new in zip(old_items, new_items))
+        rollup_actions = self._rollup_update_actions(rollups)
+        if len(actions) + len(rollup_actions) <= TRANSACT_MAX_ITEMS:
+            actions.extend(rollup_actions)
+            rollups = {}
+        try:
+            self.table.meta.client.transact_write_items(TransactItems=actions)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'TransactionCanceledException':
+                raise TransitionConflict() from e
+            raise
+        # A group whose backlog entries span more days than fit in the
+        # transaction adjusts the remaining rollups afterwards
+        self._apply_deltas_after({}, rollups)
+        return new_items
+
+    # Change feed and bulk reads
+
+    def changes(self, record_type, since, limit):
+        query_kwargs = {
+            'IndexName': INDEX_CHANGES,
+            'KeyConditionExpression': '#record_type = :record_type AND #updated_at > :since',
+            'ExpressionAttributeNames': {'#record_type': 'record_type', '#updated_at': 'updated_at'},
+            'ExpressionAttributeValues': {':record_type': record_type, ':since': since},
+            'ScanIndexForward': True,
+            'Limit': limit
+        }
+        items = []
+        while len(items) < limit:
+            response = self.table.query(**query_kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            query_kwargs['Limit'] = limit - len(items)
+        return items[:limit]
+
+    def iter_pages(self, fields, created_from=None, created_to=None, page_size=500):
+        """
+        A created_at range is served from the created_at-sorted index; a
+        full read uses the parallel scanner.
+        """
+        names = {f'#f{i}': field for i, field in enumerate(fields)}
+        projection = ', '.join(names)
+        names['#record_type'] = 'record_type'
+        values = {':record_type': RECORD_TYPE}
+
+        if not created_from and not created_to:
+            scanner = ParallelScanner(self.table)
+            yield from scanner.iter_pages(
+                projection=projection,
+                filter_expression='#record_type = :record_type',
+                expression_names=names,
+                expression_values=values,
+                page_size=page_size
+            )
+            return
+
+        names['#created_at'] = 'created_at'
+        values[':from'] = created_from or ''
+        values[':to'] = created_to or '~'
+        query_kwargs = {
+            'IndexName': INDEX_ALL,
+            'KeyConditionExpression': '#record_type = :record_type AND #created_at BETWEEN :from AND :to',
+            'ProjectionExpression': projection,
+            'ExpressionAttributeNames': names,
+            'ExpressionAttributeValues': values,
+            'Limit': page_size
+        }
+        while True:
+            response = self.table.query(**query_kwargs)
+            yield response.get('Items', [])
+            if 'LastEvaluatedKey' not in response:
+                return
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def iter_closed(self, statuses, closed_before, page_size=500):
+        # A request closed before the cutoff was also created before it,
+        # which bounds the status index query; the closing time is filtered
+        for status in statuses:
+            query_kwargs = {
+                'IndexName': INDEX_STATUS,
+                'KeyConditionExpression': '#status = :status AND #created_at < :cutoff',
+                'FilterExpression': '#resolved_at < :cutoff OR '
+                                    '(attribute_not_exists(#resolved_at) AND #updated_at < :cutoff)',
+                'ExpressionAttributeNames': {
+                    '#status': 'status', '#created_at': 'created_at', '#updated_at': 'updated_at',
+                    '#resolved_at': 'resolved_at'
+                },
+                'ExpressionAttributeValues': {':status': status, ':cutoff': closed_before},
+                'Limit': page_size
+            }
+            while True:
+                response = self.table.query(**query_kwargs)
+                if response.get('Items'):
+                    yield response['Items']
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def ping(self):
+        # A single-key data-plane read: cheap, exercises credentials and the
+        # table, and unlike DescribeTable does not use control-plane quota
+        self.table.get_item(Key={'id': STATS_ITEM_ID}, ProjectionExpression='id')
+
+class _Encoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return int(o) if o == o.to_integral_value() else float(o)
+        return super().default(o)
+
+class SQLiteRequestStore(RequestStore):
+    """
+    Requests in a local SQLite database (':memory:' by default).
+
+    Each item is stored as JSON next to the columns the list, change-feed
+    and stats queries need, with indexes mirroring the DynamoDB GSIs. One
+    connection is shared by all threads behind a lock, so writes are
+    serialized and every multi-row change is a single transaction.
+    """
+
+    name = 'SQLite'
+
+    def __init__(self, path=':memory:', tombstone_retention_days=7):
+        self.path = path
+        self.tombstone_retention_days = tombstone_retention_days
+        self._lock = threading.RLock()
+        self._conn = None
+        self._connect()
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS requests ('
+                ' id TEXT PRIMARY KEY, record_type TEXT NOT NULL,'
+                ' status TEXT, priority TEXT, created_at TEXT, updated_at TEXT,'
+                ' expires_at INTEGER, data TEXT NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS requests_all ON requests (record_type, created_at, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS requests_status ON requests (status, created_at, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS requests_priority ON requests (priority, created_at, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS requests_changes ON requests (record_type, updated_at)')
+            conn.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rollups ('
+                ' day TEXT NOT NULL, name TEXT NOT NULL, value INTEGER NOT NULL, PRIMARY KEY (day, name))'
+            )
+            self._conn = conn
+        return self._conn
+
+    def reset(self):
+        # A private in-memory database has nothing to reopen
+        if self.path != ':memory:':
+            with self._lock:
+                self._conn = None
+
+    @staticmethod
+    def _row(item):
+        return (item['id'], item.get('record_type', RECORD_TYPE), item.get('status'),
+                item.get('priority'), item.get('created_at'), item.get('updated_at'),
+                item.get('expires_at'), json.dumps(item, cls=_Encoder, separators=(',', ':')))
+
+    def _put(self, conn, items):
+        conn.executemany('INSERT OR REPLACE INTO requests VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                         [self._row(item) for item in items])
+
+    def _apply_deltas(self, conn, deltas):
+        conn.executemany(
+            'INSERT INTO stats (name, value) VALUES (?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+            list(deltas.items())
+        )
+
+    def _apply_rollups(self, conn, rollups):
+        conn.executemany(
+            'INSERT INTO rollups (day, name, value) VALUES (?, ?, ?) '
+            'ON CONFLICT(day, name) DO UPDATE SET value = value + excluded.value',
+            [(day, name, delta) for day, deltas in rollups.items() for name, delta in deltas.items()]
+        )
+
+    def _write(self, fn):
+        """Run fn(conn) in one transaction"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = fn(conn)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            return result
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._connect().execute(sql, params).fetchall()
+
+    def _fetch(self, conn, request_id):
+        row = conn.execute('SELECT data FROM requests WHERE id = ? AND record_type = ?',
+                           (request_id, RECORD_TYPE)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_page(self, limit, start_key=None, status=None, priority=None):
+        clauses = ['record_type = ?']
+        params = [RECORD_TYPE]
+        for column, value in (('status', status), ('priority', priority)):
+            if value:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if start_key:
+            clauses.append('(created_at, id) < (?, ?)')
+            params.extend([start_key.get('created_at', ''), start_key.get('id', '')])
+        rows = self._query(
+            f"SELECT data FROM requests WHERE {' AND '.join(clauses)} "
+            'ORDER BY created_at DESC, id DESC LIMIT ?',
+            params + [limit + 1]
+        )
+        items = [json.loads(row[0]) for row in rows[:limit]]
+        last_key = None
+        if len(rows) > limit:
+            last_key = {'id': items[-1]['id'], 'created_at': items[-1]['created_at']}
+        return items, last_key
+
+    def get(self, request_id):
+        with self._lock:
+            return self._fetch(self._connect(), request_id)
+
+    def batch_get(self, request_ids):
+        items = {}
+        for chunk in chunked(list(request_ids), 500):
+            rows = self._query(
+                f"SELECT data FROM requests WHERE record_type = ? AND id IN ({','.join('?' * len(chunk))})",
+                [RECORD_TYPE] + chunk
+            )
+            for row in rows:
+                item = json.loads(row[0])
+                items[item['id']] = item
+        return items
+
+    def lookup(self, request_id):
+        rows = dict(self._query('SELECT id, data FROM requests WHERE id IN (?, ?)',
+                                (request_id, tombstone_id(request_id))))
+        item = rows.get(request_id)
+        return (json.loads(item) if item else None), tombstone_id(request_id) in rows
+
+    def get_stats(self):
+        rows = dict(self._query('SELECT name, value FROM stats'))
+        if not rows:
+            return None
+        return {name: int(rows.get(name, 0)) for name in STATS_FIELDS}
+
+    def recount_stats(self):
+        def recount(conn):
+            counts = dict.fromkeys(STATS_FIELDS, 0)
+            for status, priority in conn.execute(
+                    'SELECT status, priority FROM requests WHERE record_type = ?', (RECORD_TYPE,)):
+                for name, delta in counter_deltas(new_item={'status': status, 'priority': priority}).items():
+                    counts[name] += delta
+            conn.execute('DELETE FROM stats')
+            conn.executemany('INSERT INTO stats (name, value) VALUES (?, ?)', list(counts.items()))
+            return counts
+        return self._write(recount)
+
+    def get_rollups(self, first_day, last_day):
+        rollups = {}
+        for day, name, value in self._query(
+                'SELECT day, name, value FROM rollups WHERE day BETWEEN ? AND ?', (first_day, last_day)):
+            rollups.setdefault(day, {})[name] = value
+        return rollups
+
+    def replace_rollups(self, rollups, first_day, last_day):
+        def replace(conn):
+            conn.execute('DELETE FROM rollups WHERE day BETWEEN ? AND ?', (first_day, last_day))
+            self._apply_rollups(conn, {day: deltas for day, deltas in rollups.items()
+                                       if first_day <= day <= last_day})
+        self._write(replace)
+
+    def create(self, item):
+        def create(conn):
+            if conn.execute('SELECT 1 FROM requests WHERE id = ?', (item['id'],)).fetchone():
+                raise RequestExists(item['id'])
+            self._put(conn, [item])
+            self._apply_deltas(conn, counter_deltas(new_item=item))
+            self._apply_rollups(conn, rollup_deltas(new_item=item))
+        self._write(create)
+
+    def create_many(self, items):
+        def create_many(conn):
+            self._put(conn, items)
+            self._apply_deltas(conn, sum_deltas(counter_deltas(new_item=item) for item in items))
+            self._apply_rollups(conn, sum_rollups(rollup_deltas(new_item=item) for item in items))
+        self._write(create_many)
+
+    def create_missing(self, items):
+        def create_missing(conn):
+            ids = [item['id'] for item in items]
+            ids += [tombstone_id(request_id) for request_id in ids]
+            existing = {row[0] for row in conn.execute(
+                f"SELECT id FROM requests WHERE id IN ({','.join('?' * len(ids))})", ids)}
+            missing = [item for item in items
+                       if item['id'] not in existing and tombstone_id(item['id']) not in existing]
+            self._put(conn, missing)
+            self._apply_deltas(conn, sum_deltas(counter_deltas(new_item=item) for item in missing))
+            self._apply_rollups(conn, sum_rollups(rollup_deltas(new_item=item) for item in missing))
+            return missing
+        return self._write(create_missing) if items else []
+
+    def update(self, request_id, fields, expected_version=None):
+        def update(conn):
+            old_item = self._fetch(conn, request_id)
+            if old_item is None:
+                raise RequestNotFound(request_id)
+            if expected_version is not None and int(old_item.get('version', 0)) != expected_version:
+                raise VersionConflict(request_id)
+            new_item = transitioned_item(old_item, fields, utc_timestamp())
+            self._put(conn, [new_item])
+            self._apply_deltas(conn, counter_deltas(old_item, new_item))
+            self._apply_rollups(conn, rollup_deltas(old_item, new_item))
+            return old_item, new_item
+        return self._write(update)
+
+    def delete(self, request_id, expected_version=None, archived=False):
+        def delete(conn):
+            old_item = self._fetch(conn, request_id)
+            if old_item is None:
+                raise RequestNotFound(request_id)
+            if expected_version is not None and int(old_item.get('version', 0)) != expected_version:
+                raise VersionConflict(request_id)
+            conn.execute('DELETE FROM requests WHERE id = ?', (request_id,))
+            # SQLite has no TTL, so expired tombstones are purged here
+            conn.execute('DELETE FROM requests WHERE record_type = ? AND expires_at < ?',
+                         (TOMBSTONE_RECORD_TYPE, int(time.time())))
+            self._put(conn, [tombstone_item(request_id, utc_timestamp(), self.tombstone_retention_days)])
+            self._apply_deltas(conn, counter_deltas(old_item=old_item))
+            if not archived:
+                self._apply_rollups(conn, rollup_deltas(old_item=old_item))
+            return old_item
+        return self._write(delete)
+
+    def bulk_transition(self, old_items, fields):
+        def transition(conn):
+            timestamp = utc_timestamp()
+            new_items = []
+            for old_item in old_items:
+                current = self._fetch(conn, old_item['id'])
+                if current is None or current.get('status') != old_item.get('status') or \
+                        current.get('priority') != old_item.get('priority'):
+                    raise TransitionConflict()
+                new_items.append(transitioned_item(current, fields, timestamp))
+            self._put(conn, new_items)
+            self._apply_deltas(conn, sum_deltas(counter_deltas(old, new) for old, new in zip(old_items, new_items)))
+            self._apply_rollups(conn, sum_rollups(rollup_deltas(old, new) for old, new in zip(old_items, new_items)))
+            return new_items
+        return self._write(transition)
+
+    def changes(self, record_type, since, limit):
+        rows = self._query(
+            'SELECT data FROM requests WHERE record_type = ? AND updated_at > ? ORDER BY updated_at LIMIT ?',
+            (record_type, since, limit)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def iter_pages(self, fields, created_from=None, created_to=None, page_size=500):
+        # Keyset pagination so the lock is only held for one page at a time
+        position = (created_from or '', '')
+        created_to = created_to or '~'
+        while True:
+            rows = self._query(
+                'SELECT created_at, id, data FROM requests WHERE record_type = ? '
+                'AND (created_at, id) > (?, ?) AND created_at <= ? '
+                'ORDER BY created_at, id LIMIT ?',
+                (RECORD_TYPE, position[0], position[1], created_to, page_size)
+            )
+            if not rows:
+                return
+            page = []
+            for _, _, data in rows:
+                item = json.loads(data)
+                page.append({field: item[field] for field in fields if field in item})
+            yield page
+            if len(rows) < page_size:
+                return
+            position = rows[-1][:2]
+
+    def iter_closed(self, statuses, closed_before, page_size=500):
+        # Walks the status index below the cutoff like the DynamoDB query and
+        # filters on the closing time kept in the JSON document
+        position = ('', '')
+        placeholders = ','.join('?' * len(statuses))
+        while True:
+            rows = self._query(
+                f'SELECT created_at, id, data FROM requests WHERE record_type = ? AND status IN ({placeholders}) '
+                "AND created_at < ? AND COALESCE(json_extract(data, '$.resolved_at'), updated_at) < ? "
+                'AND (created_at, id) > (?, ?) ORDER BY created_at, id LIMIT ?',
+                [RECORD_TYPE] + list(statuses) + [closed_before, closed_before, position[0], position[1],
+                                                  page_size]
+            )
+            if not rows:
+                return
+            yield [json.loads(data) for _, _, data in rows]
+            if len(rows) < page_size:
+                return
+            position = rows[-1][:2]
+
+    def ping(self):
+        self._query('SELECT 1')
+
+def create_store(backend, **options):
+    """
+    Build the configured backend. dynamodb needs dynamodb, table and
+    table_name; sqlite accepts path.
+    """
+    retention = options.get('tombstone_retention_days', 7)
+    if backend == 'sqlite':
+        path = options.get('path') or ':memory:'
+        logger.info(f"Using SQLite request store at {path}")
+        return SQLiteRequestStore(path, retention)
+    if backend != 'dynamodb':
+        raise ValueError(f'Unknown storage backend: {backend}')
+    return DynamoDBRequestStore(
+        options['dynamodb'], options['table'], options['table_name'],
+        tombstone_retention_days=retention,
+        recount_segments=options.get('recount_segments', 8)
+    )
@@ -0,0 +1,74 @@
+"""
+Shared fixtures
+
+app.py reads its configuration at import time, so the environment is set
+up here first: the SQLite storage backend, and every host-shared file
+(cache, admission, change events, idempotency, search snapshot) in a
+temporary directory instead of /dev/shm.
+"""
+
+import os
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_shared_dir = tempfile.mkdtemp(prefix='maintenance-tests-')
+os.environ.update({
+    'STORAGE_BACKEND': 'sqlite',
+    'SQLITE_PATH': os.path.join(_shared_dir, 'store.sqlite3'),
+    'CACHE_ENABLED': 'false',
+    'RATE_LIMIT_ENABLED': 'false',
+    'RATE_LIMIT_PATH': os.path.join(_shared_dir, 'admission.sqlite3'),
+    'SEARCH_INDEX_ENABLED': 'false',
+    'SEARCH_SNAPSHOT_PATH': os.path.join(_shared_dir, 'search-snapshot.jsonl.gz'),
+    'CHANGE_STREAM_ENABLED': 'false',
+    'CHANGE_EVENTS_PATH': os.path.join(_shared_dir, 'change-events.sqlite3'),
+    'IDEMPOTENCY_PATH': os.path.join(_shared_dir, 'idempotency.sqlite3'),
+    'WRITE_BEHIND_ENABLED': 'false',
+    'ASSETS_ENABLED': 'false',
+})
+
+from storage import SQLiteRequestStore, RECORD_TYPE, utc_timestamp  # noqa: E402
+from idempotency import IdempotencyStore  # noqa: E402
+
+@pytest.fixture
+def store():
+    return SQLiteRequestStore(':memory:')
+
+@pytest.fixture
+def make_request():
+    """Factory for a new request item as build_new_request would produce it"""
+    counter = iter(range(1, 1000000))
+
+    def make(**fields):
+        timestamp = fields.pop('created_at', None) or utc_timestamp()
+        item = {
+            'id': f'req-{next(counter)}',
+            'record_type': RECORD_TYPE,
+            'title': 'Leaking tap',
+            'description': 'Kitchen tap drips all night',
+            'status': 'Pending',
+            'priority': 'High',
+            'created_by': 'tenant',
+            'created_at': timestamp,
+            'updated_at': timestamp,
+            'version': 1
+        }
+        item.update(fields)
+        return item
+    return make
+
+@pytest.fixture
+def app_module(monkeypatch, store, tmp_path):
+    """The app module with a fresh store and idempotency table for this test"""
+    import app as app_module
+    monkeypatch.setattr(app_module, 'store', store)
+    monkeypatch.setattr(app_module, 'idempotency', IdempotencyStore(str(tmp_path / 'idempotency.sqlite3')))
+    return app_module
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
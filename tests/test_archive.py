@@ -0,0 +1,26 @@
+"""Archiving long-closed requests"""
+
+import os
+from datetime import datetime, timedelta
+from archive import RequestArchive, archive_closed
+
+def days_ago(days):
+    return (datetime.utcnow() - timedelta(days=days)).isoformat() + 'Z'
+
+def test_a_closed_request_edited_later_is_archived_by_its_closing_date(store, make_request, tmp_path):
+    archive = RequestArchive(str(tmp_path / 'archive'))
+    resolved_at = days_ago(100)
+    edited = make_request(created_at=days_ago(120), status='Closed', resolved_at=resolved_at,
+                          updated_at=days_ago(1))
+    recent = make_request(created_at=days_ago(120), status='Closed', resolved_at=days_ago(10),
+                          updated_at=days_ago(10))
+    legacy = make_request(created_at=days_ago(120), status='Resolved', updated_at=days_ago(95))
+    store.create_many([edited, recent, legacy])
+
+    archived_ids, counts = archive_closed(store, archive, older_than_days=90)
+    assert sorted(archived_ids) == sorted([edited['id'], legacy['id']])
+    assert counts['archived'] == 2
+    assert store.get(recent['id']) is not None
+    assert archive.get(edited['id'])['updated_at'] == edited['updated_at']
+    assert os.listdir(os.path.join(archive.directory, f'closed_date={resolved_at[:10]}'))
+    assert os.listdir(os.path.join(archive.directory, f"closed_date={legacy['updated_at'][:10]}"))
@@ -0,0 +1,12 @@
+"""Bulk status/priority transitions"""
+
+import pytest
+from storage import TransitionConflict
+
+def test_bulk_transition_rejects_a_changed_group(store, make_request):
+    item = make_request()
+    store.create(item)
+    store.update(item['id'], {'priority': 'Low'})
+    with pytest.raises(TransitionConflict):
+        store.bulk_transition([item], {'status': 'Closed'})
+    assert store.get(item['id'])['status'] == 'Pending'
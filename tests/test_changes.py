@@ -0,0 +1,80 @@
+"""Delta sync: GET /api/requests?since= and get_changes_since"""
+
+from datetime import datetime, timedelta
+
+OLD = '2026-01-01T00:00:00.000000Z'
+
+def test_changes_include_updates_and_deleted_ids(app_module, store, make_request):
+    kept, removed = make_request(updated_at='2026-01-02T00:00:00Z'), make_request()
+    store.create(kept)
+    store.create(removed)
+    store.delete(removed['id'])
+
+    delta = app_module.get_changes_since(OLD)
+    assert [item['id'] for item in delta['items']] == [kept['id']]
+    assert delta['deleted'] == [removed['id']]
+    assert not delta['has_more']
+
+def test_paging_makes_progress_and_never_splits_a_timestamp(app_module, store, make_request):
+    timestamps = ['2026-01-02T00:00:00Z'] * 3 + ['2026-01-03T00:00:00Z'] * 2 + ['2026-01-04T00:00:00Z']
+    created = [make_request(updated_at=timestamp) for timestamp in timestamps]
+    store.create_many(created)
+
+    seen, since, pages = [], OLD, 0
+    while True:
+        delta = app_module.get_changes_since(since, limit=2)
+        seen.extend(item['id'] for item in delta['items'])
+        since, pages = delta['watermark'], pages + 1
+        if not delta['has_more']:
+            break
+        assert pages < 10
+    assert sorted(seen) == sorted(item['id'] for item in created)
+
+def test_last_page_holds_the_watermark_back_by_the_overlap(app_module, store, make_request):
+    store.create(make_request())
+    delta = app_module.get_changes_since(OLD)
+    assert len(delta['items']) == 1
+    watermark = datetime.fromisoformat(delta['watermark'].rstrip('Z'))
+    assert watermark <= datetime.utcnow() - timedelta(seconds=app_module.CHANGES_OVERLAP_SECONDS)
+    # A write that lands inside the window is picked up again by the next sync
+    assert app_module.get_changes_since(delta['watermark'])['items']
+
+def test_since_endpoint_validates_and_expires_watermarks(client, app_module):
+    assert client.get('/api/requests?since=yesterday').status_code == 400
+    expired = (datetime.utcnow() - timedelta(days=app_module.TOMBSTONE_RETENTION_DAYS + 1)).isoformat() + 'Z'
+    assert client.get('/api/requests', query_string={'since': expired}).get_json() == {'full_resync': True}
+    recent = (datetime.utcnow() - timedelta(hours=1)).isoformat() + 'Z'
+    assert client.get('/api/requests', query_string={'since': recent}).get_json()['items'] == []
+
+def test_a_bulk_write_larger_than_a_page_is_sent_whole(app_module, store, make_request):
+    bulk = [make_request(updated_at='2026-01-02T00:00:00Z') for _ in range(5)]
+    later = make_request(updated_at='2026-01-03T00:00:00Z')
+    store.create_many(bulk + [later])
+
+    first = app_module.get_changes_since(OLD, limit=2)
+    assert sorted(item['id'] for item in first['items']) == sorted(item['id'] for item in bulk)
+    assert first['has_more'] and first['watermark'] == '2026-01-02T00:00:00Z'
+    second = app_module.get_changes_since(first['watermark'], limit=2)
+    assert [item['id'] for item in second['items']] == [later['id']]
+    assert not second['has_more']
+
+def test_delete_leaves_a_tombstone(store, make_request):
+    item = make_request()
+    store.create(item)
+    assert store.lookup(item['id']) == (item, False)
+    store.delete(item['id'])
+    assert store.lookup(item['id']) == (None, True)
+    assert store.create_missing([item]) == []
+
+def test_list_watermark_is_held_back_by_the_overlap(client, app_module, store, make_request):
+    store.create(make_request())
+    page = client.get('/api/requests').get_json()
+    watermark = datetime.fromisoformat(page['watermark'].rstrip('Z'))
+    assert watermark <= datetime.utcnow() - timedelta(seconds=app_module.CHANGES_OVERLAP_SECONDS)
+    # The item just listed is sent again by the first delta sync
+    assert app_module.get_changes_since(page['watermark'])['items']
+
+def test_list_watermark_starts_from_the_newest_listed_change(client, store, make_request):
+    store.create(make_request(updated_at='2026-01-02T00:00:00Z'))
+    store.create(make_request(updated_at='2026-01-05T00:00:00Z'))
+    assert client.get('/api/requests').get_json()['watermark'] == '2026-01-05T00:00:00Z'
@@ -0,0 +1,19 @@
+"""Conditional updates and deletes"""
+
+import pytest
+from storage import RequestNotFound, VersionConflict
+
+def test_update_and_delete_check_existence_and_version(store, make_request):
+    item = make_request()
+    store.create(item)
+    with pytest.raises(VersionConflict):
+        store.update(item['id'], {'priority': 'Low'}, expected_version=7)
+    with pytest.raises(RequestNotFound):
+        store.update('missing', {'priority': 'Low'})
+    old, new = store.update(item['id'], {'priority': 'Low'}, expected_version=1)
+    assert (old['version'], new['version']) == (1, 2)
+    with pytest.raises(VersionConflict):
+        store.delete(item['id'], expected_version=1)
+    store.delete(item['id'], expected_version=2)
+    with pytest.raises(RequestNotFound):
+        store.delete(item['id'])
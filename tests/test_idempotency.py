@@ -0,0 +1,82 @@
+"""Idempotency-Key handling on POST /api/requests"""
+
+from idempotency import IdempotencyStore, scoped_key, fingerprint, PRUNE_EVERY
+from write_behind import WriteBehindBuffer
+
+PAYLOAD = {
+    'title': 'Broken heater',
+    'description': 'No heat in the living room',
+    'priority': 'High',
+    'created_by': 'tenant'
+}
+
+def post(client, payload=PAYLOAD, key='key-1'):
+    return client.post('/api/requests', json=payload, headers={'Idempotency-Key': key})
+
+def forget_keys(app_module):
+    """Simulate the local entry expiring, or the retry landing on another host"""
+    app_module.idempotency._connect().execute('DELETE FROM keys')
+
+def test_retry_replays_the_first_response(client, app_module):
+    first = post(client)
+    retry = post(client)
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json() == first.get_json()
+    assert app_module.store.get_stats()['total'] == 1
+
+def test_key_reused_for_a_different_body_is_rejected(client):
+    post(client)
+    response = post(client, dict(PAYLOAD, title='Broken boiler'))
+    assert response.status_code == 422
+
+def test_retry_while_the_first_call_runs_gets_409(client, app_module):
+    app_module.idempotency.begin(scoped_key('addr:127.0.0.1', 'key-1'), fingerprint(PAYLOAD))
+    response = post(client)
+    assert response.status_code == 409
+    assert response.headers['Retry-After'] == '1'
+
+def test_retry_after_expiry_replays_the_stored_request_even_if_edited(client, app_module):
+    created = post(client).get_json()
+    app_module.store.update(created['id'], {'priority': 'Low'})
+    forget_keys(app_module)
+
+    retry = post(client)
+    assert retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json()['priority'] == 'Low'
+    assert app_module.store.get_stats()['total'] == 1
+
+def test_retry_of_a_deleted_request_gets_410(client, app_module):
+    created = post(client).get_json()
+    app_module.store.delete(created['id'])
+    forget_keys(app_module)
+    assert post(client).status_code == 410
+
+def test_keys_are_scoped_to_the_client(client, app_module):
+    first = post(client).get_json()
+    other = app_module.app.test_client()
+    other.set_cookie(app_module.CLIENT_ID_COOKIE, 'another-browser')
+    response = post(other)
+    assert response.status_code == 201
+    assert response.get_json()['id'] != first['id']
+
+def test_write_behind_retry_after_flush_replays_instead_of_requeueing(client, app_module, monkeypatch, tmp_path):
+    buffer = WriteBehindBuffer(app_module.store, str(tmp_path / 'write-behind.sqlite3'))
+    monkeypatch.setattr(app_module, 'write_behind', buffer)
+    accepted = post(client)
+    assert accepted.status_code == 202
+    buffer.flush_all()
+    forget_keys(app_module)
+
+    retry = post(client)
+    assert retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert buffer.pending_count() == 0
+    assert app_module.store.get_stats()['total'] == 1
+
+def test_prune_runs_on_every_nth_claim(tmp_path):
+    keys = IdempotencyStore(str(tmp_path / 'keys.sqlite3'), max_entries=10)
+    for i in range(PRUNE_EVERY):
+        keys.begin(f'key-{i}', 'fingerprint')
+    assert keys._connect().execute('SELECT COUNT(*) FROM keys').fetchone()[0] == 10
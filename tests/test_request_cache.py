@@ -0,0 +1,38 @@
+"""Host-wide read cache for items and list pages"""
+
+import pytest
+from request_cache import SharedLRUCache
+
+@pytest.fixture
+def cache(app_module, monkeypatch, tmp_path):
+    cache = SharedLRUCache(str(tmp_path / 'cache.sqlite3'))
+    monkeypatch.setattr(app_module, 'cache', cache)
+    return cache
+
+def test_set_is_skipped_once_the_generation_moves(cache):
+    generation = cache.generation()
+    cache.set_raw('item:req-1', '{"v":1}', generation=generation)
+    assert cache.get_raw('item:req-1') == '{"v":1}'
+    cache.bump_generation()
+    cache.set_raw('item:req-2', '{"v":1}', generation=generation)
+    assert cache.get_raw('item:req-2') is None
+
+def test_a_write_during_a_miss_is_not_cached_stale(client, app_module, cache, store, make_request, monkeypatch):
+    item = make_request()
+    store.create(item)
+    read = store.get
+
+    def read_then_write(request_id):
+        # The write commits and invalidates between the read and the cache fill
+        stale = read(request_id)
+        _, updated = store.update(request_id, {'priority': 'Low'})
+        app_module.after_write(items=[updated])
+        return stale
+    monkeypatch.setattr(store, 'get', read_then_write)
+    assert client.get(f"/api/requests/{item['id']}").get_json()['priority'] == 'High'
+
+    monkeypatch.setattr(store, 'get', read)
+    assert client.get(f"/api/requests/{item['id']}").get_json()['priority'] == 'Low'
+    # The fresh copy is cached
+    assert client.get(f"/api/requests/{item['id']}").get_json()['priority'] == 'Low'
+    assert cache.get(app_module.item_cache_key(item['id']))['priority'] == 'Low'
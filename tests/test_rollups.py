@@ -0,0 +1,54 @@
+"""Daily rollups kept up to date by the writes"""
+
+import pytest
+from storage import rollup_deltas, transitioned_item
+
+def test_rollup_deltas_count_creation_resolution_and_backlog(make_request):
+    item = make_request(created_at='2026-03-01T08:00:00Z')
+    assert rollup_deltas(new_item=item) == {'2026-03-01': {'created_high': 1, 'open_high': 1}}
+
+    resolved = transitioned_item(item, {'status': 'Resolved'}, '2026-03-02T10:00:00Z')
+    assert resolved['resolved_at'] == '2026-03-02T10:00:00Z'
+    assert rollup_deltas(item, resolved) == {
+        '2026-03-01': {'open_high': -1},
+        # 26 hours falls in the 24-72h bucket
+        '2026-03-02': {'resolved_high': 1, 'ttr_sum_high': 26 * 3600, 'ttr_high_4': 1}
+    }
+
+def test_resolved_at_survives_later_edits_and_is_dropped_on_reopen(make_request):
+    item = make_request(created_at='2026-03-01T08:00:00Z')
+    resolved = transitioned_item(item, {'status': 'Resolved'}, '2026-03-02T10:00:00Z')
+    closed = transitioned_item(resolved, {'status': 'Closed', 'priority': 'Low'}, '2026-03-09T10:00:00Z')
+    assert closed['resolved_at'] == '2026-03-02T10:00:00Z'
+    assert 'resolved_at' not in transitioned_item(closed, {'status': 'Pending'}, '2026-03-10T10:00:00Z')
+
+def test_rollups_follow_writes(store, make_request):
+    item = make_request(created_at='2026-03-01T08:00:00Z', updated_at='2026-03-01T08:00:00Z')
+    store.create(item)
+    _, resolved = store.update(item['id'], {'status': 'Resolved'})
+    day = resolved['resolved_at'][:10]
+
+    rollups = store.get_rollups('2026-03-01', day)
+    assert rollups['2026-03-01']['created_high'] == 1
+    assert rollups['2026-03-01'].get('open_high', 0) == 0
+    assert rollups[day]['resolved_high'] == 1
+
+def test_incremental_rollups_match_a_rebuild(store, make_request):
+    analytics = pytest.importorskip('analytics')
+    pytest.importorskip('numpy')
+    kept = make_request(created_at='2026-03-01T08:00:00Z')
+    removed = make_request(created_at='2026-03-01T09:00:00Z', priority='Low')
+    for item in (kept, removed):
+        store.create(item)
+    store.update(kept['id'], {'status': 'Resolved'})
+    store.update(kept['id'], {'status': 'Pending'})
+    store.update(kept['id'], {'status': 'Closed'})
+    store.update(removed['id'], {'status': 'Resolved'})
+    store.delete(removed['id'])
+
+    expected, count = analytics.build_rollups(store.iter_pages(analytics.SNAPSHOT_FIELDS))
+    assert count == 1
+    stored = store.get_rollups(min(expected), max(expected))
+    # Counters taken back to zero stay on the day item
+    assert {day: {name: value for name, value in counters.items() if value}
+            for day, counters in stored.items()} == expected
@@ -0,0 +1,13 @@
+"""Server-side search index"""
+
+def test_writes_skip_the_index_when_search_is_disabled(app_module, make_request, monkeypatch):
+    applied = []
+    monkeypatch.setattr(app_module, 'SEARCH_INDEX_ENABLED', False)
+    monkeypatch.setattr(app_module.search_manager, 'apply', lambda **change: applied.append(change))
+    app_module.after_write(items=[make_request()], deleted_ids=['req-0'])
+    assert applied == []
+
+    monkeypatch.setattr(app_module, 'SEARCH_INDEX_ENABLED', True)
+    item = make_request()
+    app_module.after_write(items=[item])
+    assert applied == [{'item': item}]
@@ -0,0 +1,24 @@
+"""Stats counters maintained alongside every write"""
+
+from storage import STATS_FIELDS, counter_deltas
+
+def test_counter_deltas_for_a_transition():
+    old = {'status': 'Pending', 'priority': 'High'}
+    new = {'status': 'Resolved', 'priority': 'High'}
+    assert counter_deltas(new_item=old) == {'total': 1, 'pending': 1, 'high': 1}
+    assert counter_deltas(old, new) == {'pending': -1, 'resolved': 1}
+    assert counter_deltas(old_item=new) == {'total': -1, 'resolved': -1, 'high': -1}
+
+def test_writes_keep_stats_consistent_with_recount(store, make_request):
+    items = [make_request(priority=priority) for priority in ('High', 'Low', 'Critical')]
+    store.create(items[0])
+    store.create_many(items[1:])
+    store.update(items[0]['id'], {'status': 'In Progress'})
+    store.bulk_transition([store.get(items[1]['id'])], {'status': 'Resolved'})
+    store.delete(items[2]['id'])
+
+    stats = store.get_stats()
+    assert stats == dict.fromkeys(STATS_FIELDS, 0) | {
+        'total': 2, 'in_progress': 1, 'resolved': 1, 'high': 1, 'low': 1
+    }
+    assert store.recount_stats() == stats
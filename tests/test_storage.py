@@ -0,0 +1,17 @@
+"""The RequestStore interface every backend implements"""
+
+import pytest
+from storage import RequestStore, SQLiteRequestStore
+
+def test_request_store_is_abstract():
+    with pytest.raises(TypeError):
+        RequestStore()
+
+def test_a_backend_must_implement_the_whole_interface():
+    class PartialStore(RequestStore):
+        def get(self, request_id):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialStore()
+    assert isinstance(SQLiteRequestStore(':memory:'), RequestStore)
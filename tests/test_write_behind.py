@@ -0,0 +1,64 @@
+"""Write-behind log: append, flush to the store, and replay after failures"""
+
+import pytest
+from storage import RequestExists
+from write_behind import WriteBehindBuffer, create_write_behind
+
+@pytest.fixture
+def buffer(store, tmp_path):
+    flushed = []
+    buffer = WriteBehindBuffer(store, str(tmp_path / 'write-behind.sqlite3'), batch_size=2,
+                               on_flush=flushed.extend)
+    buffer.flushed = flushed
+    return buffer
+
+def test_enabled_buffer_needs_an_explicit_path(store):
+    with pytest.raises(ValueError):
+        create_write_behind(True, store)
+    assert not create_write_behind(False, store).enabled
+
+def test_pending_entries_are_readable_and_unique(buffer, make_request):
+    item = make_request()
+    buffer.append(item)
+    assert buffer.get(item['id']) == item
+    with pytest.raises(RequestExists):
+        buffer.append(item)
+
+def test_flush_stores_and_counts_every_entry(buffer, store, make_request):
+    items = [make_request() for _ in range(5)]
+    for item in items:
+        buffer.append(item)
+    assert buffer.flush_all() == 5
+    assert buffer.pending_count() == 0
+    assert set(store.batch_get([item['id'] for item in items])) == {item['id'] for item in items}
+    assert store.get_stats()['total'] == 5
+    assert [item['id'] for item in buffer.flushed] == [item['id'] for item in items]
+
+def test_replay_skips_stored_and_deleted_requests(buffer, store, make_request):
+    stored, deleted, new = make_request(), make_request(), make_request()
+    store.create(stored)
+    store.create(deleted)
+    store.delete(deleted['id'])
+    for item in (stored, deleted, new):
+        buffer.append(item)
+
+    buffer.flush_all()
+    assert buffer.pending_count() == 0
+    assert [item['id'] for item in buffer.flushed] == [new['id']]
+    assert store.get(deleted['id']) is None
+    assert store.get_stats()['total'] == 2
+
+def test_failed_flush_keeps_entries_for_the_next_attempt(buffer, store, make_request, monkeypatch):
+    item = make_request()
+    buffer.append(item)
+
+    def unavailable(items):
+        raise ConnectionError('store unavailable')
+    monkeypatch.setattr(store, 'create_missing', unavailable)
+    with pytest.raises(ConnectionError):
+        buffer.flush_all()
+    assert buffer.pending_count() == 1
+
+    monkeypatch.undo()
+    assert buffer.flush_all() == 1
+    assert store.get(item['id']) == item
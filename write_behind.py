@@ -0,0 +1,238 @@
+"""
+Write-behind buffer for new maintenance requests
+
+In write-behind mode POST /api/requests appends the new item to a local
+SQLite log and answers 202 at once. A background thread in each worker
+drains the log in batches through RequestStore.create_missing, which
+batches the puts (batch_writer on DynamoDB) and skips ids that already
+exist, so replaying an entry is harmless.
+
+The log is shared by every worker on the host. A flusher leases the oldest
+entries before writing them, so workers do not flush the same rows, and
+entries are only deleted after the store has accepted them. Entries left
+behind by a crash are replayed once their lease runs out. GET by id falls
+back to the log, so a pending request can be read before it is stored.
+
+The log must be on a persistent disk (not /dev/shm or a temp directory) to
+survive a reboot, so there is no default path: WRITE_BEHIND_PATH has to be
+set when the mode is enabled.
+"""
+
+import json
+import time
+import sqlite3
+import logging
+import threading
+from decimal import Decimal
+from storage import RequestExists
+
+logger = logging.getLogger(__name__)
+
+# Longest pause between flush attempts while the store keeps failing
+MAX_BACKOFF_SECONDS = 30
+
+class _Encoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return int(o) if o == o.to_integral_value() else float(o)
+        return super().default(o)
+
+class WriteBehindBuffer:
+    """Append-only log of new requests, flushed to the store in the background"""
+
+    enabled = True
+
+    def __init__(self, store, path, flush_interval=1.0, batch_size=100, lease_seconds=60,
+                 on_flush=None):
+        self.store = store
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # Longer than any single flush can take, or two workers may write the same rows
+        self.lease_seconds = lease_seconds
+        self.on_flush = on_flush
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started = False
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS pending ('
+            ' seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE,'
+            ' data TEXT NOT NULL, appended_at REAL NOT NULL, lease_until REAL NOT NULL DEFAULT 0)'
+        )
+
+    def reset(self):
+        """Forget connections inherited across fork; they reopen on next use"""
+        self._local = threading.local()
+        self._started = False
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # An acknowledged request must survive a crash, so commits are fsynced
+            conn.execute('PRAGMA synchronous=FULL')
+            self._local.conn = conn
+        return conn
+
+    def append(self, item):
+        """Durably record a new request; raises RequestExists if its id is already pending"""
+        try:
+            self._connect().execute(
+                'INSERT INTO pending (id, data, appended_at) VALUES (?, ?, ?)',
+                (item['id'], json.dumps(item, cls=_Encoder, separators=(',', ':')), time.time())
+            )
+        except sqlite3.IntegrityError as e:
+            raise RequestExists(item['id']) from e
+
+    def get(self, request_id):
+        """The pending request with request_id, or None"""
+        row = self._connect().execute('SELECT data FROM pending WHERE id = ?', (request_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def pending_count(self):
+        return self._connect().execute('SELECT COUNT(*) FROM pending').fetchone()[0]
+
+    def _claim(self):
+        """Lease the oldest unleased entries. Returns [(seq, item)]."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                'SELECT seq, data FROM pending WHERE lease_until < ? ORDER BY seq LIMIT ?',
+                (now, self.batch_size)
+            ).fetchall()
+            if rows:
+                conn.executemany('UPDATE pending SET lease_until = ? WHERE seq = ?',
+                                 [(now + self.lease_seconds, seq) for seq, _ in rows])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return [(seq, json.loads(data)) for seq, data in rows]
+
+    def _write(self, entries):
+        """Store leased entries, then drop them from the log"""
+        conn = self._connect()
+        try:
+            created = self.store.create_missing([item for _, item in entries])
+        except Exception:
+            conn.executemany('UPDATE pending SET lease_until = 0 WHERE seq = ?', [(seq,) for seq, _ in entries])
+            raise
+        conn.executemany('DELETE FROM pending WHERE seq = ?', [(seq,) for seq, _ in entries])
+        if created and self.on_flush:
+            self.on_flush(created)
+        return len(entries)
+
+    def flush_once(self):
+        """Flush one batch. Returns the number of entries written."""
+        entries = self._claim()
+        return self._write(entries) if entries else 0
+
+    def flush_all(self):
+        """Flush until the log has no unleased entries"""
+        total = 0
+        while True:
+            flushed = self.flush_once()
+            total += flushed
+            if flushed < self.batch_size:
+                return total
+
+    def _claim_id(self, request_id):
+        """Lease one entry. Returns (seq, item), None if it is gone, or False if it is leased."""
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT seq, data, lease_until FROM pending WHERE id = ?',
+                               (request_id,)).fetchone()
+            if row is not None and row[2] < now:
+                conn.execute('UPDATE pending SET lease_until = ? WHERE seq = ?',
+                             (now + self.lease_seconds, row[0]))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if row is None:
+            return None
+        if row[2] >= now:
+            return False
+        return row[0], json.loads(row[1])
+
+    def flush(self, request_id, wait_seconds=5.0):
+        """
+        Make sure a pending request has reached the store before it is
+        updated or deleted. If another flusher holds it, wait for that flush.
+        """
+        deadline = time.time() + wait_seconds
+        while True:
+            entry = self._claim_id(request_id)
+            if entry is None:
+                return
+            if entry:
+                self._write([entry])
+                return
+            if time.time() >= deadline:
+                logger.warning(f"Timed out waiting for pending request {request_id} to flush")
+                return
+            time.sleep(0.05)
+
+    def start(self):
+        """Start the flusher thread once per process"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        thread.start()
+
+    def _run(self):
+        backoff = self.flush_interval
+        while True:
+            try:
+                flushed = self.flush_once()
+                backoff = self.flush_interval
+            except Exception as e:
+                logger.error(f"Write-behind flush failed, retrying in {backoff:.0f}s: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+                continue
+            # A full batch means more is waiting
+            if flushed < self.batch_size:
+                time.sleep(self.flush_interval)
+
+class NullWriteBehindBuffer:
+    """Synchronous writes; used when write-behind mode is off"""
+
+    enabled = False
+
+    def reset(self):
+        pass
+
+    def get(self, request_id):
+        return None
+
+    def pending_count(self):
+        return 0
+
+    def flush(self, request_id):
+        pass
+
+    def flush_all(self):
+        return 0
+
+    def start(self):
+        pass
+
+def create_write_behind(enabled, store, path=None, **options):
+    """Build the configured buffer; an enabled buffer needs an explicit, persistent path"""
+    if not enabled:
+        return NullWriteBehindBuffer()
+    if not path:
+        raise ValueError('WRITE_BEHIND_PATH must be set to a file on persistent disk '
+                         'when WRITE_BEHIND_ENABLED=true')
+    buffer = WriteBehindBuffer(store, path, **options)
+    logger.info(f"Write-behind mode enabled, log at {buffer.path}")
+    return buffer